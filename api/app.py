@@ -1,578 +1,873 @@
-from flask import Flask, request, jsonify
+import time
+_startup_begin = time.perf_counter()
+
+from flask import Flask, Response, request, jsonify
 import pandas as pd
 import util as utils
 import os
 import json
+import threading
 from datetime import datetime, timedelta, timezone
-from collections import deque
 import numpy as np
+from coalescer import MicroBatcher
+from shadow import ShadowScorer
+from prediction_cache import PredictionCache
+from compiled_models import CompiledForestModel
+from registry import ModelRegistry, MODEL1_NAME, MODEL2_NAME
+from streaming_drift import StreamingDrift
+from windowed_drift import WindowedDrift, WINDOWS
+from reference_stats import ARTIFACT_NAME, load_reference
+from drift_scheduler import DriftScheduler
+from log_store import LogStore
+from log_buffer import LogBuffer
+import requests
+import drift
 
-# Evidently for Data Drift Detection (v0.4.x API)
-from evidently.report import Report
-from evidently.metrics import DataDriftTable, DatasetDriftMetric
+# Startup-time report (seconds per phase), exposed under /stats
+startup_timings = {"imports_s": round(time.perf_counter() - _startup_begin, 3)}
 
 app = Flask(__name__)
 
+# Upper bound on rows accepted by /predict/batch in a single request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "50000"))
+
 # -----------------------------------------------------------------------------
-# PREDICTION LOGGING SYSTEM
+# SERVER MODE
 # -----------------------------------------------------------------------------
-MAX_LOG_SIZE = 100
-prediction_logs = deque(maxlen=MAX_LOG_SIZE)
-
-def log_prediction(input_data, prediction, status="success", error_msg=None, model_used="Unknown", details=None):
-    """Log each prediction request"""
-    log_entry = {
-        "timestamp": datetime.now(timezone(timedelta(hours=7))).strftime("%Y-%m-%d %H:%M:%S"),
-        "input": input_data,
-        "prediction": prediction,
-        "status": status,
-        "error": error_msg,
-        "model_used": model_used,
-        "details": details
-    }
-    prediction_logs.append(log_entry)
-    return log_entry
+# PREFORK=1 (set by gunicorn.conf.py): the app is imported once in the gunicorn
+# master and forked into the workers, which share the loaded model arrays
+# copy-on-write. Threads are started in each worker after the fork
+# (start_background_tasks), and state shared by the workers (logs, counters,
+# drift windows and snapshots) goes through the SQLite log store and files.
+PREFORK = os.getenv("PREFORK", "0") == "1"
 
 # -----------------------------------------------------------------------------
-# DATA DRIFT DETECTION WITH EVIDENTLY
+# PREDICTION LOGGING SYSTEM
 # -----------------------------------------------------------------------------
-# Reference data from training (will be loaded on startup)
-reference_data = None
-reference_stats = None
+# Columnar ring buffer of the most recent predictions (about 165 bytes per entry when
+# full: 115 B of columns plus the status/model indexes; 1M entries ~ 165 MB)
+MAX_LOG_SIZE = int(os.getenv("LOG_CAPACITY", "100000"))
+prediction_logs = LogBuffer(MAX_LOG_SIZE)
+# /drift compares the last DRIFT_WINDOW logged requests against the reference
+DRIFT_WINDOW = int(os.getenv("DRIFT_WINDOW", "100"))
+log_lock = threading.Lock()
+# Notified on every logged request; wakes /logs/stream subscribers
+log_events = threading.Condition()
 
-def load_reference_stats():
-    """Load training data for drift detection with Evidently"""
-    global reference_data, reference_stats
-    
-    # helper for stats
-    def calc_stats(df):
-        return {
-            "mean": df.mean().to_dict(),
-            "std": df.std().to_dict(),
-            "min": df.min().to_dict(),
-            "max": df.max().to_dict(),
-            "count": len(df)
-        }
+# "sqlite": every entry is also persisted to a SQLite log store (WAL mode) by a
+# background writer, and /logs and /drift read from it. "memory": ring buffer only.
+LOG_STORE = os.getenv("LOG_STORE", "memory")
+if PREFORK and LOG_STORE != "sqlite":
+    print(f"LOG_STORE={LOG_STORE} is per process; workers share logs through LOG_STORE=sqlite instead.")
+    LOG_STORE = "sqlite"
+LOG_STORE_PATH = os.getenv("LOG_STORE_PATH", os.path.join(utils.get_data_dir(), "monitoring", "predictions.db"))
 
-    try:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        data_dirs = [
-            os.path.join(base_dir, "..", "data"), # Local
-            os.path.join(base_dir, "data")        # Docker
-        ]
-        
-        # 1. Try Pickle
-        try:
-            for d in data_dirs:
-                p = os.path.join(d, "processed", "x_train.pkl")
-                if os.path.exists(p):
-                    print(f"Loading reference from {p}")
-                    reference_data = pd.read_pickle(p)
-                    reference_stats = calc_stats(reference_data)
-                    print(f"Loaded {len(reference_data)} rows from pickle.")
-                    return
-        except Exception as e:
-            print(f"Failed to load pickle: {e}")
-
-        # 2. Try Excel
-        try:
-            for d in data_dirs:
-                p = os.path.join(d, "raw", "DATA RUMAH.xlsx")
-                if os.path.exists(p):
-                    print(f"Loading reference from {p}")
-                    df = pd.read_excel(p)
-                    features = ["LB", "LT", "KT", "KM", "GRS"]
-                    reference_data = df[features].dropna()
-                    reference_stats = calc_stats(reference_data)
-                    print(f"Loaded {len(reference_data)} rows from Excel.")
-                    return
-        except Exception as e:
-            print(f"Failed to load Excel: {e}")
-
-        # 3. Fallback: Synthetic
-        print("Using synthetic reference data.")
-        np.random.seed(42)
-        n_samples = 100
-        reference_data = pd.DataFrame({
-            "LB": np.random.normal(150, 80, n_samples).clip(30, 500),
-            "LT": np.random.normal(180, 100, n_samples).clip(50, 600),
-            "KT": np.random.normal(4, 1.5, n_samples).clip(1, 10).astype(int),
-            "KM": np.random.normal(3, 1.2, n_samples).clip(1, 8).astype(int),
-            "GRS": np.random.normal(2, 1, n_samples).clip(0, 5).astype(int)
-        })
-        reference_stats = calc_stats(reference_data)
+log_store = None
+if LOG_STORE == "sqlite":
+    log_store = LogStore(
+        LOG_STORE_PATH,
+        max_rows=int(os.getenv("LOG_STORE_MAX_ROWS", "1000000")),
+        max_age_days=float(os.getenv("LOG_STORE_MAX_AGE_DAYS", "30")),
+        # Under PREFORK one worker enforces retention for all of them
+        shared=PREFORK
+    )
+    print(f"Prediction log store: {LOG_STORE_PATH} ({log_store.last_id()} rows so far).")
 
-    except Exception as e:
-        print(f"Critical error in load_reference_stats: {e}")
-        # Final safety net
-        reference_data = pd.DataFrame(columns=["LB", "LT", "KT", "KM", "GRS"])
-        reference_stats = calc_stats(reference_data)
-
-def calculate_drift_evidently(recent_predictions):
-    """Calculate data drift using Evidently library"""
-    global reference_data
-    
-    # Check if reference data is available and not empty
-    if reference_data is None or len(reference_data) == 0:
-        return None
-        
-    if len(recent_predictions) < 5:
-        return None
-    
-    # Extract input features from recent predictions
-    recent_inputs = []
-    for log in recent_predictions:
-        if log["status"] == "success":
-            input_data = log["input"]
-            clean_input = {}
-            for key, val in input_data.items():
-                if isinstance(val, list):
-                    clean_input[key] = val[0] if len(val) > 0 else 0
-                else:
-                    clean_input[key] = val
-            recent_inputs.append(clean_input)
-    
-    if len(recent_inputs) < 5:
-        return None
-    
-    # Create current data DataFrame
-    current_data = pd.DataFrame(recent_inputs)
-    features = ["LB", "LT", "KT", "KM", "GRS"]
-    
-    # Ensure both dataframes have the same columns
-    for f in features:
-        if f not in current_data.columns:
-            current_data[f] = 0
-    
-    current_data = current_data[features]
-    ref_data = reference_data[features].copy()
-    
-    try:
-        # Create Evidently Data Drift Report
-        drift_report = Report(metrics=[
-            DatasetDriftMetric(),
-            DataDriftTable()
-        ])
-        
-        drift_report.run(reference_data=ref_data, current_data=current_data)
-        
-        # Extract results from report
-        report_dict = drift_report.as_dict()
-        
-        # Parse Evidently results
-        drift_results = parse_evidently_report(report_dict, current_data, ref_data)
-        drift_results["sample_size"] = len(recent_inputs)
-        drift_results["reference_size"] = len(reference_data)
-        drift_results["method"] = "evidently"
-        
-        return drift_results
-        
-    except Exception as e:
-        print(f"Evidently error: {e}")
-        # Fallback to simple method if Evidently fails
-        return calculate_drift_simple(recent_inputs, features)
-
-def parse_evidently_report(report_dict, current_data, ref_data):
-    """Parse Evidently report dictionary to extract drift information"""
-    features = ["LB", "LT", "KT", "KM", "GRS"]
-    feature_names = {
-        "LB": "Luas Bangunan",
-        "LT": "Luas Tanah",
-        "KT": "Kamar Tidur",
-        "KM": "Kamar Mandi",
-        "GRS": "Garasi"
-    }
-    
-    drift_report = {}
-    dataset_drift = False
-    drift_share = 0.0
-    
-    # Extract metrics from report
-    for metric_result in report_dict.get("metrics", []):
-        metric_id = metric_result.get("metric", "")
-        result = metric_result.get("result", {})
-        
-        # Dataset-level drift
-        if "DatasetDriftMetric" in metric_id:
-            dataset_drift = result.get("dataset_drift", False)
-            drift_share = result.get("drift_share", 0.0)
-        
-        # Per-column drift from DataDriftTable
-        if "DataDriftTable" in metric_id:
-            drift_by_columns = result.get("drift_by_columns", {})
-            
-            for feature in features:
-                if feature in drift_by_columns:
-                    col_data = drift_by_columns[feature]
-                    
-                    is_drifted = col_data.get("drift_detected", False)
-                    drift_score = col_data.get("drift_score", 0)
-                    stattest_name = col_data.get("stattest_name", "unknown")
-                    p_value = col_data.get("p_value", 1.0) if col_data.get("p_value") is not None else 1.0
-                    
-                    # Determine severity based on p-value and drift detection
-                    if is_drifted:
-                        if p_value < 0.01:
-                            severity = "high"
-                        elif p_value < 0.05:
-                            severity = "medium"
-                        else:
-                            severity = "medium"
-                    else:
-                        severity = "low"
-                    
-                    drift_report[feature] = {
-                        "feature_name": feature_names.get(feature, feature),
-                        "drift_detected": is_drifted,
-                        "drift_score": round(drift_score, 4) if drift_score else 0,
-                        "p_value": round(p_value, 4) if p_value else 1.0,
-                        "stattest": stattest_name,
-                        "severity": severity,
-                        "reference_mean": round(ref_data[feature].mean(), 2),
-                        "current_mean": round(current_data[feature].mean(), 2),
-                        "reference_std": round(ref_data[feature].std(), 2),
-                        "current_std": round(current_data[feature].std(), 2)
-                    }
-    
-    # If no per-column data, create basic report
-    if not drift_report:
-        for feature in features:
-            if feature in current_data.columns and feature in ref_data.columns:
-                ref_mean = ref_data[feature].mean()
-                cur_mean = current_data[feature].mean()
-                ref_std = ref_data[feature].std()
-                
-                # Simple drift score
-                drift_score = abs(cur_mean - ref_mean) / ref_std if ref_std > 0 else 0
-                
-                drift_report[feature] = {
-                    "feature_name": feature_names.get(feature, feature),
-                    "drift_detected": drift_score > 0.5,
-                    "drift_score": round(drift_score, 4),
-                    "p_value": None,
-                    "stattest": "z-score",
-                    "severity": "high" if drift_score > 1.5 else ("medium" if drift_score > 0.5 else "low"),
-                    "reference_mean": round(ref_mean, 2),
-                    "current_mean": round(cur_mean, 2),
-                    "reference_std": round(ref_std, 2),
-                    "current_std": round(current_data[feature].std(), 2)
-                }
-    
-    # Determine overall status
-    severities = [d["severity"] for d in drift_report.values()]
-    drifted_count = sum(1 for d in drift_report.values() if d.get("drift_detected", False))
-    
-    if dataset_drift or drifted_count >= 3 or "high" in severities:
-        overall_status = "high"
-    elif drifted_count >= 1 or "medium" in severities:
-        overall_status = "medium"
-    else:
-        overall_status = "low"
-    
-    return {
-        "overall_status": overall_status,
-        "dataset_drift": dataset_drift,
-        "drift_share": round(drift_share, 2),
-        "drifted_features_count": drifted_count,
-        "total_features": len(features),
-        "features": drift_report
-    }
+def log_prediction(input_data, prediction, status="success", error_msg=None, model_used="Unknown", details=None, track=False, latency_ms=None):
+    """Log each prediction request; returns its sequence number.
 
-def calculate_drift_simple(recent_inputs, features):
-    """Fallback simple drift calculation"""
-    df_recent = pd.DataFrame(recent_inputs)
-    
-    drift_report = {}
-    feature_names = {
-        "LB": "Luas Bangunan",
-        "LT": "Luas Tanah",
-        "KT": "Kamar Tidur",
-        "KM": "Kamar Mandi",
-        "GRS": "Garasi"
-    }
-    
-    for feature in features:
-        if feature in df_recent.columns:
-            recent_mean = df_recent[feature].mean()
-            recent_std = df_recent[feature].std()
-            ref_mean = reference_stats["mean"].get(feature, 0)
-            ref_std = reference_stats["std"].get(feature, 1)
-            
-            drift_score = abs(recent_mean - ref_mean) / ref_std if ref_std > 0 else 0
-            
-            if drift_score < 0.5:
-                severity = "low"
-            elif drift_score < 1.5:
-                severity = "medium"
-            else:
-                severity = "high"
-            
-            drift_report[feature] = {
-                "feature_name": feature_names.get(feature, feature),
-                "drift_detected": drift_score > 0.5,
-                "drift_score": round(drift_score, 4),
-                "p_value": None,
-                "stattest": "z-score",
-                "severity": severity,
-                "reference_mean": round(ref_mean, 2),
-                "current_mean": round(recent_mean, 2),
-                "reference_std": round(ref_std, 2),
-                "current_std": round(recent_std, 2)
-            }
-    
-    severities = [d["severity"] for d in drift_report.values()]
-    drifted_count = sum(1 for d in drift_report.values() if d.get("drift_detected", False))
-    
-    if "high" in severities:
-        overall_status = "high"
-    elif "medium" in severities:
-        overall_status = "medium"
-    else:
-        overall_status = "low"
-    
-    return {
-        "overall_status": overall_status,
-        "dataset_drift": overall_status in ["high", "medium"],
-        "drift_share": drifted_count / len(features),
-        "drifted_features_count": drifted_count,
-        "total_features": len(features),
-        "features": drift_report,
-        "method": "fallback"
-    }
+    `track=True` allows `details` to be persisted again later (async shadow results).
+    """
+    now = time.time()
+    with log_lock:
+        seq = prediction_logs.append(now, input_data, prediction, status, error_msg, model_used, details, latency_ms)
+        values = prediction_logs.feature_row(seq) if status == "success" else None
+        if values is not None:
+            if drift_stream is not None:
+                drift_stream.update(values)
+            if drift_windows is not None and log_store is None:
+                # With a log store the windows are fed from it (sync_drift_windows)
+                drift_windows.add(values, now)
+    if log_store is not None:
+        log_store.append(seq, now, input_data, prediction, status, error_msg, model_used, details, track=track, latency_ms=latency_ms)
+    with log_events:
+        log_events.notify_all()
+    return seq
+
+def log_predictions(entries):
+    """Log a batch of requests under one lock and one log store write; returns their sequence numbers.
+
+    `entries` are (input_data, prediction, status, error_msg, model_used, latency_ms) tuples.
+    """
+    now = time.time()
+    seqs = []
+    with log_lock:
+        for input_data, prediction, status, error_msg, model_used, latency_ms in entries:
+            seq = prediction_logs.append(now, input_data, prediction, status, error_msg, model_used, None, latency_ms)
+            seqs.append(seq)
+            values = prediction_logs.feature_row(seq) if status == "success" else None
+            if values is not None:
+                if drift_stream is not None:
+                    drift_stream.update(values)
+                if drift_windows is not None and log_store is None:
+                    drift_windows.add(values, now)
+    if log_store is not None:
+        log_store.append_many(now, entries)
+    with log_events:
+        log_events.notify_all()
+    return seqs
 
 # Load config
 config_path = utils.get_config_path()
 config = utils.load_params(config_path)
 
-# Load Models (Model 1: Linear Regression, Model 2: Random Forest)
-model1 = None
-model2 = None
-model1_metadata = {}
-model2_metadata = {}
+# Load Models (Model 1: Linear Regression, Model 2: Random Forest).
+# "compiled" backend scores with NumPy arrays (feature order checked once at
+# load); "sklearn" keeps the DataFrame path.
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "compiled")
+# Under PREFORK, POST /admin/reload touches this file so every worker's watcher reloads too
+MODEL_RELOAD_SIGNAL = os.getenv("MODEL_RELOAD_SIGNAL", os.path.join(utils.get_data_dir(), "monitoring", "reload.signal"))
+registry = ModelRegistry(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"),
+    config,
+    backend=MODEL_BACKEND,
+    signal_path=MODEL_RELOAD_SIGNAL if PREFORK else None
+)
+_phase_begin = time.perf_counter()
+registry.load()
+startup_timings["model_load_s"] = round(time.perf_counter() - _phase_begin, 3)
 
-try:
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    model1_path = os.path.join(base_dir, "models", "model_1.pkl")
-    model2_path = os.path.join(base_dir, "models", "model_2.pkl")
-    
-    if os.path.exists(model1_path):
-        model1 = utils.pickle_load(model1_path)
-        print("Model 1 (Linear Regression) loaded.")
-    
-    if os.path.exists(model2_path):
-        model2 = utils.pickle_load(model2_path)
-        print("Model 2 (Random Forest) loaded.")
-        
-    # Also load the old production_model if model 1 is missing, for backward compatibility
-    if model1 is None:
-        prod_path = os.path.join(base_dir, "models", "production_model.pkl")
-        if os.path.exists(prod_path):
-             model1 = utils.pickle_load(prod_path)
-             print("Legacy Production Model loaded as Model 1.")
-
-    # Load Metrics to determine accuracy
-    metrics_path = os.path.join(base_dir, "models", "metrics.json")
-    if os.path.exists(metrics_path):
-        with open(metrics_path, 'r') as f:
-            metrics_data = json.load(f)
-            # Parse structure: could be old (flat) or new (nested)
-            if "model1" in metrics_data:
-                model1_metadata = metrics_data["model1"]
-                model2_metadata = metrics_data.get("model2", {})
-            else:
-                # Old format
-                model1_metadata = {"r2": metrics_data.get("r2", 0), "mape": metrics_data.get("mape", 0)}
-                model2_metadata = {}
-    
-except Exception as e:
-    print(f"Error loading models: {e}")
+# Optional: pick up retrained artifacts automatically (seconds between mtime checks, 0 = off)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+if PREFORK and MODEL_WATCH_INTERVAL <= 0:
+    # The watcher is how a reload reaches the workers that did not receive the request
+    MODEL_WATCH_INTERVAL = 2.0
+    print(f"PREFORK: watching for reloads every {MODEL_WATCH_INTERVAL}s (MODEL_WATCH_INTERVAL was off).")
+
+# -----------------------------------------------------------------------------
+# REQUEST COALESCING (MICRO-BATCHING)
+# -----------------------------------------------------------------------------
+def score_rows(rows):
+    """Score a list of feature rows with one predict call per model; returns (pred1, pred2) per row"""
+    models = registry.current
+    X = np.asarray(rows, dtype=np.int64)
+    pred1 = models.model1.predict(X) if models.model1 else np.zeros(len(X))
+    pred2 = models.model2.predict(X) if models.model2 else np.zeros(len(X))
+    return list(zip(pred1, pred2))
 
-# Load reference stats for drift detection
-load_reference_stats()
+# Opt-in: collect single-row /predict calls arriving within a short window
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "0") == "1"
+COALESCE_WINDOW_MS = float(os.getenv("COALESCE_WINDOW_MS", "2"))
+COALESCE_MAX_BATCH = int(os.getenv("COALESCE_MAX_BATCH", "64"))
+
+coalescer = None
+if COALESCE_ENABLED:
+    coalescer = MicroBatcher(score_rows, window_ms=COALESCE_WINDOW_MS, max_batch=COALESCE_MAX_BATCH)
+    print(f"Request coalescing enabled (window {COALESCE_WINDOW_MS} ms, max batch {COALESCE_MAX_BATCH}).")
+
+# -----------------------------------------------------------------------------
+# SHADOW SCORING
+# -----------------------------------------------------------------------------
+# "sync": both models run inline (default). "async": only the active model runs
+# inline, the other one is scored on a bounded background pool. Has no effect
+# when requests are coalesced: each batch already scores both models.
+SHADOW_MODE = os.getenv("SHADOW_MODE", "sync")
+SHADOW_WORKERS = int(os.getenv("SHADOW_WORKERS", "1"))
+SHADOW_MAX_QUEUE = int(os.getenv("SHADOW_MAX_QUEUE", "1000"))
+
+shadow_scorer = None
+if SHADOW_MODE == "async":
+    shadow_scorer = ShadowScorer(max_workers=SHADOW_WORKERS, max_queue=SHADOW_MAX_QUEUE)
+    print(f"Async shadow scoring enabled ({SHADOW_WORKERS} workers, queue {SHADOW_MAX_QUEUE}).")
+    if coalescer is not None:
+        # Coalesced batches score both models together, so there is nothing left to defer
+        print("WARNING: SHADOW_MODE=async has no effect with COALESCE_ENABLED=1; both models are scored inline.")
+
+# -----------------------------------------------------------------------------
+# PREDICTION CACHE
+# -----------------------------------------------------------------------------
+# LRU/TTL cache of (model1, model2) outputs per (feature tuple, model version);
+# repeated listings skip scoring but are still logged. 0 entries = off.
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+prediction_cache = None
+if PREDICTION_CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
 
 import data_preparation
 # Helper needed for pickle loading if it uses classes from these modules
 
+# "evidently": /drift reruns the Evidently report (default). "streaming": KS/PSI
+# statistics are updated on every prediction and /drift only reads them.
+DRIFT_ENGINE = os.getenv("DRIFT_ENGINE", "evidently")
+if PREFORK and DRIFT_ENGINE == "streaming":
+    print("DRIFT_ENGINE=streaming only sees one worker's requests; using the shared log store (evidently) instead.")
+    DRIFT_ENGINE = "evidently"
+
+drift_stream = None
+if DRIFT_ENGINE == "streaming":
+    # The reference CDFs are needed before the first prediction is logged
+    drift.ensure_reference()
+    drift_stream = StreamingDrift(drift.reference_data, config, window=DRIFT_WINDOW)
+    print(f"Streaming drift detection enabled (window {DRIFT_WINDOW}, reference {len(drift.reference_data)} rows).")
+
+# Wall-clock drift windows (1h/24h/7d) from per-bucket sketches on the reference
+# histogram bins; needs the precomputed reference artifact
+drift_windows = None
+_reference_artifact = os.path.join(registry.models_dir, ARTIFACT_NAME)
+if os.path.exists(_reference_artifact):
+    try:
+        drift_windows = WindowedDrift(load_reference(_reference_artifact))
+    except Exception as e:
+        print(f"Windowed drift disabled: {e}")
+else:
+    print(f"Windowed drift disabled: {_reference_artifact} not found")
+
+# Reference data and Evidently are only needed by /drift: load them on the first
+# /drift call, or ahead of time in a background warm-up thread (default)
+DRIFT_WARMUP = os.getenv("DRIFT_WARMUP", "1") == "1" and drift_stream is None
+if PREFORK:
+    # Load them in the master instead, so the forked workers share them
+    drift.ensure_reference()
+    drift.load_evidently()
+elif DRIFT_WARMUP:
+    drift.start_warmup()
+
+# Refresh interval of the cached Evidently report: full rerun after this many new
+# predictions; in between /drift serves the last report (refresh "interval", at most
+# DRIFT_REFRESH_EVERY - 1 predictions behind) with fresh window moments
+DRIFT_REFRESH_EVERY = int(os.getenv("DRIFT_REFRESH_EVERY", "10"))
+drift_cache = drift.DriftCache(refresh_every=DRIFT_REFRESH_EVERY)
+
+startup_timings["ready_s"] = round(time.perf_counter() - _startup_begin, 3)
+print(f"API ready in {startup_timings['ready_s']}s (imports {startup_timings['imports_s']}s, "
+      f"models {startup_timings['model_load_s']}s; drift reference {'loaded' if drift_stream or PREFORK else 'loads in background' if DRIFT_WARMUP else 'loads on first /drift'}).")
+
+# -----------------------------------------------------------------------------
+# ROUTES
+# -----------------------------------------------------------------------------
+# The handle_* functions take the parsed JSON body / query parameters and return
+# (response dict, HTTP status) without touching Flask. The views below wrap them,
+# and so does the asyncio variant in asgi_app.py, so both serve the same contract.
+def respond(body, status):
+    return jsonify(body), status
+
 @app.route('/')
 def home():
     return "House Price Prediction API is Up! (Dual Model Supported)"
 
-@app.route('/predict', methods=['POST'])
-def predict():
+def handle_predict(data_json):
+    """Score one listing; returns (response dict, HTTP status)"""
+    started = time.perf_counter()
     try:
-        data_json = request.get_json()
-        
         # Expecting input keys matching the predictors
         predictors = config['prediktor'] # LB, LT, KT, KM, GRS
         
         # Ensure all predictors are present
-        input_data = {}
-        missing_fields = []
-        for p in predictors:
-            if p not in data_json:
-                missing_fields.append(p)
-            else:
-                input_data[p] = [data_json[p]]
+        missing_fields = [p for p in predictors if p not in data_json]
         
         if missing_fields:
-             return jsonify({"error": f"Missing features: {missing_fields}"}), 400
+             return {"error": f"Missing features: {missing_fields}"}, 400
 
-        # Create DataFrame
-        df = pd.DataFrame(input_data)
-        
-        # Ensure correct data types (int64)
-        for p in predictors:
-            df[p] = df[p].astype('int64')
-
-        # Validate data
-        try:
-           data_preparation.cek_data(df, config, True)
-        except AssertionError as ae:
-            return jsonify({"status": "error", "message": f"Validation Error: {str(ae)}"}), 400
-
-        # Predict with Model 1 (Linear Regression)
-        pred1 = 0
-        if model1:
-            pred1 = model1.predict(df)[0]
-        
-        # Predict with Model 2 (Random Forest)
-        pred2 = 0
-        if model2:
-            pred2 = model2.predict(df)[0]
-        
-        # Decision Logic: Use the model with higher accuracy
-        active_prediction = pred1
-        active_model_name = "Model 1 (Linear Regression)"
-        
-        model1_r2 = model1_metadata.get("r2", 0)
-        model2_r2 = model2_metadata.get("r2", 0)
+        # Feature row in config order; same rules and messages as /predict/batch
+        row, errors = data_preparation.validasi_baris(data_json, config)
+        if errors:
+            message = "; ".join(errors)
+            log_prediction(loggable_input(data_json), None, "error", message, latency_ms=(time.perf_counter() - started) * 1000)
+            return {"status": "error", "message": message}, 400
+
+        # Active model was decided when the models were loaded
+        models = registry.current
+        use_model2 = models.use_model2
+        active_model_name = models.active_name
+        shadow_key = models.shadow_key
+        run_shadow_async = shadow_scorer is not None and coalescer is None and models.shadow_model is not None
+
+        # A reload changes the version, so cached outputs of old models are never served
+        cache_key = (tuple(row), models.version)
+        cached = prediction_cache.get(cache_key) if prediction_cache is not None else None
+        if cached is not None:
+            pred1, pred2 = cached
+            # Shadow scoring is only needed if the cached entry lacks the shadow model's output
+            run_shadow_async = run_shadow_async and None in cached
+        elif coalescer:
+            # Scored together with other requests arriving in the same window
+            pred1, pred2 = coalescer.submit(row)
+        elif run_shadow_async:
+            # Only the active model runs inline; the shadow result is attached to the log later
+            active_pred = models.predict_active(row)
+            pred1, pred2 = (None, active_pred) if use_model2 else (active_pred, None)
+        else:
+            # Predict with Model 1 (Linear Regression)
+            pred1 = 0
+            if models.model1:
+                pred1 = models.model1.predict_one(row)
+            
+            # Predict with Model 2 (Random Forest)
+            pred2 = 0
+            if models.model2:
+                pred2 = models.model2.predict_one(row)
         
-        use_model2 = False
+        if cached is None and prediction_cache is not None:
+            prediction_cache.put(cache_key, (pred1, pred2))
         
-        if model2 and model1:
-             if model2_r2 > model1_r2:
-                 use_model2 = True
-                 print(f"Choosing Model 2 (R2: {model2_r2:.4f}) over Model 1 (R2: {model1_r2:.4f})")
-             else:
-                 print(f"Choosing Model 1 (R2: {model1_r2:.4f}) over Model 2 (R2: {model2_r2:.4f})")
-        elif model2 and not model1:
-            use_model2 = True
-            print("Model 1 missing, using Model 2")
-             
-        if use_model2:
-            active_prediction = pred2
-            active_model_name = "Model 2 (Random Forest)"
+        active_prediction = pred2 if use_model2 else pred1
         
         # Result
         result = float(active_prediction)
         
         # Log the successful prediction with clean data (not list format)
-        log_input = {p: data_json[p] for p in predictors}
+        log_input = dict(zip(predictors, row))
         
         details = {
             "model1": {
-                "prediction": float(pred1) if model1 else None,
-                "r2": model1_r2
+                "prediction": float(pred1) if models.model1 and pred1 is not None else None,
+                "r2": models.model1_metadata.get("r2", 0)
             },
             "model2": {
-                "prediction": float(pred2) if model2 else None,
-                "r2": model2_metadata.get("r2", 0)
+                "prediction": float(pred2) if models.model2 and pred2 is not None else None,
+                "r2": models.model2_metadata.get("r2", 0)
             },
             "switched": active_model_name.startswith("Model 2")
         }
+        if run_shadow_async:
+            details["shadow"] = {"model": shadow_key, "status": "pending", "lag_ms": None}
+        
+        # The log stores the numbers from `details`; the shadow result is filled in after responding
+        latency_ms = (time.perf_counter() - started) * 1000
+        seq = log_prediction(log_input, result, "success", model_used=active_model_name, details=details, track=run_shadow_async, latency_ms=latency_ms)
+        
+        if run_shadow_async:
+            def attach_shadow(prediction, lag):
+                with log_lock:
+                    prediction_logs.set_shadow(seq, "done", float(prediction), round(lag * 1000, 2))
+                    persisted = prediction_logs.details(seq) if log_store is not None else None
+                if persisted:
+                    log_store.update_details(seq, persisted)
+                if prediction_cache is not None:
+                    outputs = {"model1": pred1, "model2": pred2, shadow_key: prediction}
+                    prediction_cache.put(cache_key, (outputs["model1"], outputs["model2"]))
+            
+            if not shadow_scorer.submit(lambda: models.predict_shadow(row), attach_shadow):
+                details["shadow"]["status"] = "dropped"
+                with log_lock:
+                    prediction_logs.set_shadow(seq, "dropped")
+                if log_store is not None:
+                    log_store.update_details(seq, details)
         
-        log_prediction(log_input, result, "success", model_used=active_model_name, details=details)
-        
-        return jsonify({
+        return {
             "status": "success",
             "prediction": result,
             "model_used": active_model_name,
             "details": details
-        })
+        }, 200
         
     except Exception as e:
         # Log the failed prediction
-        log_prediction(data_json if 'data_json' in dir() else {}, None, "error", str(e))
-        return jsonify({"status": "error", "message": str(e)}), 500
+        log_prediction(loggable_input(data_json) if data_json is not None else {}, None, "error", str(e), latency_ms=(time.perf_counter() - started) * 1000)
+        return {"status": "error", "message": str(e)}, 500
 
-@app.route('/metrics', methods=['GET'])
-def get_metrics():
-    try:
-        # Resolve metrics.json relative to this file
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        metrics_path = os.path.join(base_dir, "models", "metrics.json")
-        
-        if os.path.exists(metrics_path):
-            import json
-            with open(metrics_path, "r") as f:
-                metrics = json.load(f)
-            return jsonify({"status": "success", "data": metrics})
-        else:
-            return jsonify({"status": "error", "message": "Metrics not found"}), 404
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+def loggable_input(record):
+    """Rejected input for the log, with ±inf/NaN as strings (they are not valid JSON numbers)"""
+    if not isinstance(record, dict):
+        return record
+    return {k: str(v) if isinstance(v, float) and not np.isfinite(v) else v for k, v in record.items()}
 
-@app.route('/logs', methods=['GET'])
-def get_logs():
-    """Get prediction logs with optional filtering"""
+@app.route('/predict', methods=['POST'])
+def predict():
+    return respond(*handle_predict(request.get_json(silent=True)))
+
+def handle_predict_batch(data_json):
+    """Score many listings with one predict call per model; bad rows don't fail the batch"""
+    started = time.perf_counter()
     try:
-        limit = request.args.get('limit', 50, type=int)
-        status_filter = request.args.get('status', None)
-        
-        logs_list = list(prediction_logs)
+        records = data_json.get("records") if isinstance(data_json, dict) else data_json
         
-        # Filter by status if specified
-        if status_filter:
-            logs_list = [log for log in logs_list if log["status"] == status_filter]
+        if not isinstance(records, list) or not records:
+            return {"status": "error", "message": "Expected a non-empty list of records"}, 400
+        if len(records) > MAX_BATCH_SIZE:
+            return {"status": "error", "message": f"Batch too large: {len(records)} > {MAX_BATCH_SIZE}"}, 413
         
-        # Return most recent first, limited
-        logs_list = logs_list[-limit:][::-1]
+        predictors = config['prediktor'] # LB, LT, KT, KM, GRS
         
-        # Calculate summary stats
-        total_logs = len(prediction_logs)
-        success_count = sum(1 for log in prediction_logs if log["status"] == "success")
-        error_count = total_logs - success_count
+        # Non-object records become empty rows so they are reported as missing features
+        rows = [r if isinstance(r, dict) else {} for r in records]
+        df = pd.DataFrame.from_records(rows, columns=predictors)
+        
+        # Column-wise validation against rentang_* in params.yaml
+        df_valid, errors = data_preparation.validasi_batch(df, config)
+        
+        models = registry.current
+        pred1 = np.zeros(len(df_valid))
+        pred2 = np.zeros(len(df_valid))
+        if len(df_valid) > 0:
+            if models.model1:
+                pred1 = models.model1.predict(df_valid)
+            if models.model2:
+                pred2 = models.model2.predict(df_valid)
+        
+        active_model_name = models.active_name
+        active = pred2 if models.use_model2 else pred1
+        
+        # Plain Python values once per column, not a pandas lookup per cell
+        X = df_valid[predictors].to_numpy(dtype=np.int64).tolist()
+        model1_out = pred1.tolist() if models.model1 else [None] * len(X)
+        model2_out = pred2.tolist() if models.model2 else [None] * len(X)
+        # Each row is logged with its share of the batch latency
+        latency_ms = (time.perf_counter() - started) * 1000 / len(records)
+        
+        results = [None] * len(records)
+        log_entries = []
+        for idx, values, prediction, p1, p2 in zip(df_valid.index.tolist(), X, active.tolist(), model1_out, model2_out):
+            results[idx] = {"index": idx, "status": "success", "prediction": prediction, "details": {"model1": p1, "model2": p2}}
+            log_entries.append((dict(zip(predictors, values)), prediction, "success", None, active_model_name, latency_ms))
+        
+        for idx, messages in errors.items():
+            message = "; ".join(messages)
+            results[idx] = {"index": int(idx), "status": "error", "message": message}
+            log_entries.append((loggable_input(rows[idx]), None, "error", message, "Unknown", latency_ms))
+        
+        log_predictions(log_entries)
         
-        return jsonify({
+        return {
             "status": "success",
+            "model_used": active_model_name,
             "data": {
-                "logs": logs_list,
+                "results": results,
                 "summary": {
-                    "total_requests": total_logs,
-                    "success_count": success_count,
-                    "error_count": error_count,
-                    "success_rate": round(success_count / total_logs * 100, 2) if total_logs > 0 else 0
+                    "total": len(records),
+                    "success_count": len(df_valid),
+                    "error_count": len(errors)
                 }
             }
-        })
+        }, 200
+        
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return {"status": "error", "message": str(e)}, 500
 
-@app.route('/drift', methods=['GET'])
-def get_drift():
-    """Get data drift analysis using Evidently"""
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    return respond(*handle_predict_batch(request.get_json(silent=True)))
+
+def handle_metrics():
+    """Training metrics of the loaded models"""
     try:
-        recent_logs = list(prediction_logs)
+        # Served from the registry; metrics.json is read when models are (re)loaded
+        metrics = registry.current.metrics
         
-        # Use Evidently-based drift detection
-        drift_analysis = calculate_drift_evidently(recent_logs)
-        
-        if drift_analysis:
-            return jsonify({
-                "status": "success",
-                "data": drift_analysis
-            })
+        if metrics is not None:
+            return {"status": "success", "data": metrics}, 200
         else:
-            return jsonify({
-                "status": "success",
-                "data": {
-                    "overall_status": "insufficient_data",
-                    "message": "Minimal 5 prediksi berhasil diperlukan untuk analisis drift",
-                    "current_samples": len([l for l in recent_logs if l.get("status") == "success"])
-                }
-            })
+            return {"status": "error", "message": "Metrics not found"}, 404
+    except Exception as e:
+        return {"status": "error", "message": str(e)}, 500
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return respond(*handle_metrics())
+
+def admin_authorized():
+    """Admin endpoints require X-Admin-Token when ADMIN_TOKEN is configured"""
+    token = os.getenv("ADMIN_TOKEN")
+    return not token or request.headers.get("X-Admin-Token") == token
+
+@app.route('/admin/reload', methods=['GET', 'POST'])
+def reload_models():
+    """POST: reload model artifacts in the background (?wait=1 to block). GET: last reload report.
+
+    Under PREFORK the reload runs in the worker that got the request and is
+    signalled to the other workers, which pick it up within two watcher
+    intervals; the report covers this worker only.
+    """
+    if not admin_authorized():
+        return jsonify({"status": "error", "message": "Unauthorized"}), 401
+    try:
+        if request.method == 'POST':
+            wait = request.args.get('wait', '0') == '1'
+            if PREFORK:
+                registry.request_reload()
+            started = registry.reload(wait=wait)
+            if not started:
+                return jsonify({"status": "error", "message": "Reload already in progress", "data": registry.last_reload}), 409
+        
+        return jsonify({
+            "status": "success",
+            "data": {
+                "current_version": registry.current.version,
+                "reloading": registry.is_reloading(),
+                "last_reload": registry.last_reload,
+                # "all_workers": other workers follow within 2 * MODEL_WATCH_INTERVAL seconds
+                "scope": "all_workers" if PREFORK else "process",
+                "pid": os.getpid()
+            }
+        }), 202 if registry.is_reloading() else 200
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+def handle_stats():
+    """Serving-path statistics (request coalescing, shadow scoring, model backends)"""
+    models = registry.current
+    return {
+        "status": "success",
+        "data": {
+            "coalescer": {"enabled": True, **coalescer.stats()} if coalescer else {"enabled": False},
+            "startup": {**startup_timings, **drift.timings},
+            "log_store": {"enabled": True, **log_store.stats()} if log_store else {"enabled": False},
+            "log_stream_clients": log_stream_clients,
+            "server": {"prefork": PREFORK, "pid": os.getpid()},
+            "drift_scheduler": {"enabled": True, **drift_scheduler.stats()} if drift_scheduler else {"enabled": False},
+            "prediction_cache": {"enabled": True, **prediction_cache.stats()} if prediction_cache else {"enabled": False},
+            "shadow": {
+                "mode": SHADOW_MODE,
+                **({"status": "disabled (coalescer)"} if shadow_scorer and coalescer else {}),
+                **(shadow_scorer.stats() if shadow_scorer else {})
+            },
+            "models": {
+                "backend": MODEL_BACKEND,
+                "version": models.version,
+                "loaded_at": models.loaded_at,
+                "last_reload": registry.last_reload,
+                "active": models.active_name,
+                "model1": type(models.model1).__name__ if models.model1 else None,
+                "model2": type(models.model2).__name__ if models.model2 else None,
+                "model2_footprint": models.model2.footprint() if isinstance(models.model2, CompiledForestModel) else None
+            }
+        }
+    }, 200
+
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    return respond(*handle_stats())
+
+def handle_logs(args):
+    """Get prediction logs with optional filtering.
+
+    ?status= and ?model= (name, or model1/model2) filter through indexes.
+    ?after=<seq> and/or ?since=<epoch or "YYYY-MM-DD HH:MM:SS"> return only
+    newer entries, oldest first; poll again with after=cursor.next_after.
+    """
+    try:
+        limit = int_arg(args, 'limit', 50)
+        status_filter = args.get('status')
+        model_filter = MODEL_ALIASES.get(args.get('model'), args.get('model'))
+        after = int_arg(args, 'after')
+        since = parse_since(args.get('since'))
+        
+        return {
+            "status": "success",
+            "data": query_logs(limit, status_filter, model_filter, after, since)
+        }, 200
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}, 400
+    except Exception as e:
+        return {"status": "error", "message": str(e)}, 500
+
+@app.route('/logs', methods=['GET'])
+def get_logs():
+    return respond(*handle_logs(request.args))
+
+def int_arg(args, name, default=None):
+    """Integer query parameter; `default` when missing or malformed (like Flask's type=int)"""
+    try:
+        return int(args[name])
+    except (KeyError, TypeError, ValueError):
+        return default
+
+def query_logs(limit=50, status=None, model=None, after=None, since=None):
+    """/logs payload: matching entries, summary counters and the cursor to resume from"""
+    if log_store is not None:
+        # Filtering and limit run in SQLite; summary covers the whole retained log.
+        # last_seq is read first so rows committed meanwhile are never skipped by the cursor.
+        last_seq = log_store.last_id()
+        logs_list = log_store.query(limit, status, model, after, since)
+        summary = log_store.counters().summary()
+    else:
+        # Only the returned entries are rendered to dicts; counters are kept at write time
+        with log_lock:
+            last_seq = prediction_logs.last_seq
+            logs_list = prediction_logs.query(limit, status, model, after, since)
+            summary = prediction_logs.counters.summary()
+    
+    # Everything up to last_seq has been checked unless a cursor page was cut off by the limit
+    seen = [log["seq"] for log in logs_list]
+    if (after is not None or since is not None) and len(seen) >= limit:
+        next_after = max(seen)
+    else:
+        next_after = max(seen + [after or 0, last_seq])
+    return {
+        "logs": logs_list,
+        "summary": summary,
+        "cursor": {"last_seq": last_seq, "next_after": next_after}
+    }
+
+MODEL_ALIASES = {"model1": MODEL1_NAME, "model2": MODEL2_NAME}
+
+def parse_since(value):
+    """?since= as epoch seconds; accepts a number or a WIB "YYYY-MM-DD HH:MM:SS" timestamp"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone(timedelta(hours=7))).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid since '{value}', expected epoch seconds or YYYY-MM-DD HH:MM:SS")
+
+# Seconds between re-checks of an idle stream (picks up rows other processes wrote to the log store)
+LOG_STREAM_POLL = float(os.getenv("LOG_STREAM_POLL", "1.0"))
+LOG_STREAM_KEEPALIVE = 15
+# Open streams per process; each one holds a server thread (a gunicorn gthread slot)
+# for as long as it lasts, so the cap keeps /predict from being starved
+LOG_STREAM_MAX_CLIENTS = int(os.getenv("LOG_STREAM_MAX_CLIENTS", "2"))
+log_stream_clients = 0
+
+def acquire_log_stream():
+    """Count a new /logs/stream client; False when LOG_STREAM_MAX_CLIENTS are already open"""
+    global log_stream_clients
+    with log_events:
+        if log_stream_clients >= LOG_STREAM_MAX_CLIENTS:
+            return False
+        log_stream_clients += 1
+        return True
+
+def release_log_stream():
+    global log_stream_clients
+    with log_events:
+        log_stream_clients -= 1
+
+@app.route('/logs/stream', methods=['GET'])
+def stream_logs():
+    """Server-Sent Events feed of new log entries and updated counters.
+
+    The first `logs` event is the same payload as /logs (same parameters);
+    after that an event is pushed only when new requests are logged, carrying
+    just the entries past the previous event plus the current summary. Each
+    event's `id` is the cursor, so a client reconnects with ?after=<id>.
+    ?timeout=<seconds> ends the stream (default: stays open). Above
+    LOG_STREAM_MAX_CLIENTS open streams a new one is refused with 503.
+    """
+    try:
+        args = request.args
+        limit = int_arg(args, 'limit', 50)
+        status_filter = args.get('status')
+        model_filter = MODEL_ALIASES.get(args.get('model'), args.get('model'))
+        after = int_arg(args, 'after')
+        since = parse_since(args.get('since'))
+        timeout = request.args.get('timeout', 0, type=float)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    def event(data):
+        return f"event: logs\nid: {data['cursor']['next_after']}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    def generate():
+        deadline = time.time() + timeout if timeout > 0 else None
+        data = query_logs(limit, status_filter, model_filter, after, since)
+        yield event(data)
+        cursor, last_seq, last_sent = data["cursor"]["next_after"], data["cursor"]["last_seq"], time.time()
+        while deadline is None or time.time() < deadline:
+            with log_events:
+                log_events.wait(LOG_STREAM_POLL if deadline is None else min(LOG_STREAM_POLL, max(deadline - time.time(), 0)))
+            data = query_logs(limit, status_filter, model_filter, cursor)
+            # New entries, or only counters moved (entries outside the filters)
+            if data["logs"] or data["cursor"]["last_seq"] != last_seq:
+                yield event(data)
+                cursor, last_seq, last_sent = data["cursor"]["next_after"], data["cursor"]["last_seq"], time.time()
+            elif time.time() - last_sent >= LOG_STREAM_KEEPALIVE:
+                yield ": keepalive\n\n"
+                last_sent = time.time()
+
+    if not acquire_log_stream():
+        return jsonify({"status": "error", "message": f"Too many open log streams (max {LOG_STREAM_MAX_CLIENTS})"}), 503
+    response = Response(generate(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Runs when the server closes the response, also if the generator never started
+    response.call_on_close(release_log_stream)
+    return response
+
+def drift_payload():
+    """Drift over the recent log window with the configured engine, in the /drift response layout"""
+    if log_store is not None and drift_stream is None:
+        # Last DRIFT_WINDOW persisted entries (shared by all processes using the store)
+        recent_logs = log_store.recent(DRIFT_WINDOW)[::-1]
+        seq = recent_logs[-1]["seq"] if recent_logs else 0
+        rows = [values for values in map(drift.feature_vector, recent_logs) if values is not None]
+        current = np.array(rows, dtype=np.float64).reshape(-1, len(drift.FEATURES))
+    else:
+        # Feature columns of the last DRIFT_WINDOW entries, successful requests only
+        with log_lock:
+            features, success = prediction_logs.window(DRIFT_WINDOW)
+            current = features[success]
+            seq = prediction_logs.last_seq
+    moments = drift.window_moments(current)
+    
+    if drift_stream is not None:
+        # Statistics are maintained per prediction; this is only a read
+        drift_analysis = drift_stream.result()
+        cache_info = {"cache_hit": True, "refresh": "streaming", "compute_ms": 0}
+    else:
+        # Use Evidently-based drift detection, cached on the log sequence number
+        drift.ensure_reference()
+        drift_analysis, cache_info = drift_cache.get(seq, moments, lambda: drift.calculate_drift_frame(pd.DataFrame(current, columns=drift.FEATURES)))
+    
+    if drift_analysis:
+        return {**drift_analysis, **cache_info, "seq": seq}
+    return {
+        "overall_status": "insufficient_data",
+        "message": "Minimal 5 prediksi berhasil diperlukan untuk analisis drift",
+        "current_samples": moments["count"],
+        **cache_info,
+        "seq": seq
+    }
+
+def handle_drift(args):
+    """Get data drift analysis (Evidently, or the streaming detectors with DRIFT_ENGINE=streaming).
+
+    With the drift scheduler enabled this is the latest persisted snapshot
+    plus its age. With ?window=1h|24h|7d the drift over that wall-clock
+    window is returned instead.
+    """
+    try:
+        window = args.get('window')
+        if window:
+            return get_windowed_drift(window)
+        
+        latest = drift_scheduler.latest() if drift_scheduler else None
+        if latest is not None:
+            data = {
+                **latest["result"],
+                "snapshot_at": latest["computed_at_str"],
+                "age_s": latest["age_s"],
+                "compute_ms": latest["compute_ms"]
+            }
+        else:
+            data = drift_payload()
+        
+        return {"status": "success", "data": data}, 200
+    except Exception as e:
+        return {"status": "error", "message": str(e)}, 500
+
+@app.route('/drift', methods=['GET'])
+def get_drift():
+    return respond(*handle_drift(request.args))
+
+def handle_drift_alerts(args):
+    """Drift alerts raised by the scheduler, most recent first"""
+    if drift_scheduler is None:
+        return {"status": "error", "message": "Drift scheduler is not enabled"}, 404
+    limit = int_arg(args, 'limit', 20)
+    return {"status": "success", "data": {"alerts": drift_scheduler.alerts[::-1][:limit]}}, 200
+
+@app.route('/drift/alerts', methods=['GET'])
+def get_drift_alerts():
+    return respond(*handle_drift_alerts(request.args))
+
+def check_window(window):
+    """Error response for an unusable ?window= value, or None"""
+    if drift_windows is None:
+        return {"status": "error", "message": "Windowed drift is not available (reference artifact missing)"}, 503
+    if window not in WINDOWS:
+        return {"status": "error", "message": f"Unknown window '{window}', expected one of {list(WINDOWS)}"}, 400
+    return None
+
+# Seq of the last log store row added to drift_windows
+drift_windows_seq = 0
+drift_windows_lock = threading.Lock()
+
+def sync_drift_windows():
+    """Add rows written to the log store since the last call (by any worker) to the drift windows"""
+    global drift_windows_seq
+    if log_store is None:
+        return
+    # Rows older than the longest window can be skipped
+    since = time.time() - max(size * count for size, count in WINDOWS.values())
+    with drift_windows_lock:
+        while True:
+            rows = log_store.success_inputs(drift_windows_seq, since)
+            for rowid, ts, input_data in rows:
+                values = drift.feature_vector({"status": "success", "input": input_data})
+                if values is not None:
+                    drift_windows.add(values, ts)
+                drift_windows_seq = rowid
+            if len(rows) < 10000:
+                break
+
+def get_windowed_drift(window):
+    error = check_window(window)
+    if error:
+        return error
+    
+    sync_drift_windows()
+    drift_analysis = drift_windows.drift(window)
+    if drift_analysis:
+        return {"status": "success", "data": drift_analysis}, 200
+    return {
+        "status": "success",
+        "data": {
+            "overall_status": "insufficient_data",
+            "message": "Minimal 5 prediksi berhasil diperlukan untuk analisis drift",
+            "window": window
+        }
+    }, 200
+
+def handle_drift_timeseries(args):
+    """Per-bucket drift (PSI, means, status) over ?window=1h|24h|7d, for charting"""
+    try:
+        window = args.get('window', '24h')
+        error = check_window(window)
+        if error:
+            return error
+        sync_drift_windows()
+        return {"status": "success", "data": drift_windows.timeseries(window)}, 200
+    except Exception as e:
+        return {"status": "error", "message": str(e)}, 500
+
+@app.route('/drift/timeseries', methods=['GET'])
+def get_drift_timeseries():
+    return respond(*handle_drift_timeseries(request.args))
+
+# -----------------------------------------------------------------------------
+# BACKGROUND DRIFT SCHEDULER
+# -----------------------------------------------------------------------------
+# Seconds between scheduled drift computations (0 = compute on demand in /drift)
+DRIFT_SCHEDULE_INTERVAL = float(os.getenv("DRIFT_SCHEDULE_INTERVAL", "0"))
+DRIFT_STATE_DIR = os.getenv("DRIFT_STATE_DIR", os.path.join(utils.get_data_dir(), "monitoring"))
+# Optional URL that receives every drift alert as a JSON POST
+DRIFT_ALERT_WEBHOOK = os.getenv("DRIFT_ALERT_WEBHOOK")
+
+def post_drift_alert(alert):
+    requests.post(DRIFT_ALERT_WEBHOOK, json=alert, timeout=5)
+
+drift_scheduler = None
+if DRIFT_SCHEDULE_INTERVAL > 0:
+    drift_scheduler = DriftScheduler(
+        drift_payload,
+        DRIFT_SCHEDULE_INTERVAL,
+        DRIFT_STATE_DIR,
+        on_alert=post_drift_alert if DRIFT_ALERT_WEBHOOK else None,
+        shared=PREFORK
+    )
+
+def start_background_tasks():
+    """Start this process's threads: log writer, micro-batcher, model watcher, drift scheduler.
+
+    Runs at import, or under PREFORK in every worker after the fork
+    (post_fork in gunicorn.conf.py), since threads do not survive fork().
+    """
+    if log_store is not None:
+        log_store.start()
+    if coalescer is not None:
+        coalescer.start()
+    if MODEL_WATCH_INTERVAL > 0:
+        registry.start_watcher(MODEL_WATCH_INTERVAL)
+    if drift_scheduler is not None:
+        drift_scheduler.start()
+
+if not PREFORK:
+    start_background_tasks()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,96 @@
+"""Asyncio (ASGI) variant of the prediction API.
+
+Serves the same routes and JSON contract as app.py by calling the same
+handle_* functions; only the transport differs. The event loop never runs
+model or drift code itself: scoring and drift work go to separate thread
+pools, so a slow Evidently report can tie up at most DRIFT_EXECUTOR_WORKERS
+threads while /predict keeps its own PREDICT_EXECUTOR_WORKERS.
+
+Run from api/:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+import app as core
+
+PREDICT_EXECUTOR_WORKERS = int(os.getenv("PREDICT_EXECUTOR_WORKERS", "4"))
+DRIFT_EXECUTOR_WORKERS = int(os.getenv("DRIFT_EXECUTOR_WORKERS", "1"))
+
+predict_executor = ThreadPoolExecutor(PREDICT_EXECUTOR_WORKERS, thread_name_prefix="predict")
+drift_executor = ThreadPoolExecutor(DRIFT_EXECUTOR_WORKERS, thread_name_prefix="drift")
+
+
+class ContractJSONResponse(JSONResponse):
+    # Encoded like Flask's jsonify (NaN allowed) so both variants return identical bodies
+    def render(self, content):
+        return json.dumps(content).encode("utf-8")
+
+
+async def run(executor, handler, *args):
+    body, status = await asyncio.get_running_loop().run_in_executor(executor, handler, *args)
+    return ContractJSONResponse(body, status_code=status)
+
+
+async def json_body(request):
+    """Parsed JSON body, or None when it is missing or malformed (like get_json(silent=True))"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def home(request):
+    return PlainTextResponse("House Price Prediction API is Up! (Dual Model Supported)")
+
+
+async def predict(request):
+    return await run(predict_executor, core.handle_predict, await json_body(request))
+
+
+async def predict_batch(request):
+    return await run(predict_executor, core.handle_predict_batch, await json_body(request))
+
+
+async def metrics(request):
+    # In-memory reads: no need to leave the event loop
+    return ContractJSONResponse(*core.handle_metrics())
+
+
+async def stats(request):
+    return ContractJSONResponse(*core.handle_stats())
+
+
+async def logs(request):
+    return await run(predict_executor, core.handle_logs, dict(request.query_params))
+
+
+async def drift(request):
+    return await run(drift_executor, core.handle_drift, dict(request.query_params))
+
+
+async def drift_timeseries(request):
+    return await run(drift_executor, core.handle_drift_timeseries, dict(request.query_params))
+
+
+async def drift_alerts(request):
+    return ContractJSONResponse(*core.handle_drift_alerts(dict(request.query_params)))
+
+
+app = Starlette(routes=[
+    Route("/", home),
+    Route("/predict", predict, methods=["POST"]),
+    Route("/predict/batch", predict_batch, methods=["POST"]),
+    Route("/metrics", metrics),
+    Route("/stats", stats),
+    Route("/logs", logs),
+    Route("/drift", drift),
+    Route("/drift/timeseries", drift_timeseries),
+    Route("/drift/alerts", drift_alerts),
+])
@@ -0,0 +1,97 @@
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Coalesce single-row prediction requests into small vectorized batches.
+
+    Callers block in `submit()` while a background worker collects rows that
+    arrive within `window_ms` (or until `max_batch` rows are waiting), scores
+    them with one call to `score_fn` and hands each caller its own result.
+    `score_fn` receives a list of rows and must return one result per row.
+    """
+
+    def __init__(self, score_fn, window_ms=2.0, max_batch=64, timeout=30.0):
+        self.score_fn = score_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._last_batch_size = 0
+        self._max_seen = 0
+        # Batch size histogram in power-of-two buckets: "1", "2", "3-4", "5-8", ...
+        self._histogram = {}
+
+        self._worker = None
+
+    def start(self):
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, row):
+        """Queue one row and wait for its result"""
+        future = Future()
+        self._queue.put((row, future))
+        return future.result(timeout=self.timeout)
+
+    def _collect(self):
+        # Block for the first row, then keep the window open for followers
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(items) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            rows = [row for row, _ in items]
+            try:
+                results = self.score_fn(rows)
+                for (_, future), result in zip(items, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+            self._record(len(items))
+
+    def _record(self, size):
+        upper = 1
+        while upper < size:
+            upper *= 2
+        bucket = str(upper) if upper <= 2 else f"{upper // 2 + 1}-{upper}"
+
+        with self._lock:
+            self._batches += 1
+            self._rows += size
+            self._last_batch_size = size
+            self._max_seen = max(self._max_seen, size)
+            self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000.0,
+                "max_batch": self.max_batch,
+                "batches": self._batches,
+                "rows": self._rows,
+                "avg_batch_size": round(self._rows / self._batches, 2) if self._batches else 0,
+                "last_batch_size": self._last_batch_size,
+                "max_batch_size_seen": self._max_seen,
+                "batch_size_histogram": dict(self._histogram),
+                "queue_depth": self._queue.qsize()
+            }
@@ -0,0 +1,192 @@
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+
+class DataFrameModel:
+    """Adapter giving a plain sklearn model the same interface as the compiled predictors"""
+
+    def __init__(self, model, feature_order):
+        self.model = model
+        self.feature_order = list(feature_order)
+
+    def _frame(self, X):
+        if isinstance(X, pd.DataFrame):
+            return X[self.feature_order]
+        return pd.DataFrame(np.asarray(X), columns=self.feature_order).astype('int64')
+
+    def predict(self, X):
+        return self.model.predict(self._frame(X))
+
+    def predict_one(self, row):
+        return self.predict([row])[0]
+
+
+class CompiledLinearModel:
+    """LinearRegression scored with a raw dot product instead of sklearn's predict.
+
+    `coef_` and `intercept_` are copied out of the fitted model once and the
+    feature order is checked against the config at construction time, so a
+    request only pays for filling a preallocated buffer and one dot product.
+    The arithmetic is the same as sklearn's (`X @ coef_ + intercept_` on
+    float64), so predictions are bit-for-bit identical.
+    """
+
+    def __init__(self, model, feature_order):
+        self.feature_order = list(feature_order)
+        check_feature_order(model, self.feature_order)
+
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        if coef.ndim != 1 or coef.shape[0] != len(self.feature_order):
+            raise ValueError(f"Unsupported coef_ shape {coef.shape} for {len(self.feature_order)} features")
+
+        self.coef_ = np.ascontiguousarray(coef)
+        self.intercept_ = model.intercept_
+        self.model = model
+        self._local = threading.local()
+
+    def _buffer(self):
+        # One preallocated row per thread; Flask serves requests on several threads
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            buf = np.empty((1, len(self.feature_order)), dtype=np.float64)
+            self._local.buf = buf
+        return buf
+
+    def predict(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_order].to_numpy(dtype=np.float64)
+        else:
+            X = np.asarray(X, dtype=np.float64)
+        return X @ self.coef_ + self.intercept_
+
+    def predict_one(self, row):
+        buf = self._buffer()
+        buf[0, :] = row
+        return (buf @ self.coef_ + self.intercept_)[0]
+
+
+class CompiledForestModel:
+    """RandomForestRegressor flattened into contiguous node arrays.
+
+    All trees are concatenated into five arrays (feature, threshold, left,
+    right, value) with child indices rebased to global offsets. Leaves point
+    to themselves, so a batch is traversed by stepping every (tree, row)
+    pair one level down per iteration until all of them sit on a leaf. Like
+    sklearn, inputs are compared as float32 and per-tree predictions are
+    summed tree by tree before dividing by the number of trees.
+    """
+
+    # Above this many rows sklearn's Cython traversal (one tree at a time over
+    # all rows) overtakes the vectorized walk, so large batches are delegated
+    SKLEARN_MIN_ROWS = 512
+
+    def __init__(self, model, feature_order):
+        self.feature_order = list(feature_order)
+        check_feature_order(model, self.feature_order)
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        trees = [est.tree_ for est in model.estimators_]
+        sizes = np.array([t.node_count for t in trees], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        feature, threshold, left, right, value = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count, dtype=np.int64) + offset
+            is_leaf = tree.children_left == -1
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(is_leaf, nodes, tree.children_left + offset))
+            right.append(np.where(is_leaf, nodes, tree.children_right + offset))
+            value.append(tree.value[:, 0, 0])
+
+        self.feature = np.ascontiguousarray(np.concatenate(feature), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(left), dtype=np.intp)
+        self.right = np.ascontiguousarray(np.concatenate(right), dtype=np.intp)
+        self.value = np.ascontiguousarray(np.concatenate(value), dtype=np.float64)
+        self.is_leaf = self.left == np.arange(len(self.left))
+        self.roots = offsets.astype(np.intp)
+        self.max_depth = max(t.max_depth for t in trees)
+        self.n_trees = len(trees)
+        self.model = model
+        self._footprint = None
+
+    def _traverse(self, X):
+        n = X.shape[0]
+        # One cursor per (tree, row) pair, tree-major
+        node = np.repeat(self.roots, n)
+        rows = np.tile(np.arange(n), self.n_trees)
+        active = np.arange(node.size)
+        while active.size:
+            current = node[active]
+            go_left = X[rows[active], self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            node[active] = current
+            # Only pairs that have not reached a leaf take part in the next step
+            active = active[~self.is_leaf[current]]
+        # Summing along axis 0 adds tree by tree, matching sklearn's accumulation order
+        return self.value[node].reshape(self.n_trees, n).sum(axis=0) / self.n_trees
+
+    def predict(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_order].to_numpy()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if len(X) >= self.SKLEARN_MIN_ROWS:
+            return self.model.predict(pd.DataFrame(X, columns=self.feature_order))
+        return self._traverse(X)
+
+    def predict_one(self, row):
+        return self._traverse(np.asarray([row], dtype=np.float32))[0]
+
+    def footprint(self):
+        """Bytes held by the flattened arrays vs the pickled sklearn object graph (computed once)"""
+        if self._footprint is None:
+            compiled = sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right, self.value, self.is_leaf, self.roots))
+            self._footprint = {
+                "n_trees": self.n_trees,
+                "n_nodes": int(len(self.value)),
+                "max_depth": int(self.max_depth),
+                "compiled_bytes": int(compiled),
+                "sklearn_pickle_bytes": len(pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL))
+            }
+        return self._footprint
+
+
+class ParityError(ValueError):
+    """A compiled model's predictions differ from the sklearn model it was compiled from"""
+
+
+def check_parity(compiled, X, rtol=1e-9):
+    """Compare a compiled model with its sklearn original; returns the max relative error"""
+    expected = compiled.model.predict(pd.DataFrame(np.asarray(X), columns=compiled.feature_order))
+    actual = compiled.predict(X)
+    scale = np.maximum(np.abs(expected), 1.0)
+    max_rel_err = float(np.max(np.abs(actual - expected) / scale)) if len(expected) else 0.0
+    if max_rel_err > rtol:
+        raise ParityError(f"Compiled {type(compiled.model).__name__} differs from sklearn (max rel err {max_rel_err:.3g})")
+    return max_rel_err
+
+
+def check_feature_order(model, feature_order):
+    """Fail fast if the model was fitted on a different column order than the config"""
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None and list(names) != list(feature_order):
+        raise ValueError(f"Model features {list(names)} do not match config prediktor {list(feature_order)}")
+
+
+def compile_model(model, feature_order, backend="compiled"):
+    """Wrap a loaded model for serving; returns None for a missing model"""
+    if model is None:
+        return None
+    if backend == "compiled" and type(model) is LinearRegression:
+        return CompiledLinearModel(model, feature_order)
+    if backend == "compiled" and type(model) is RandomForestRegressor:
+        return CompiledForestModel(model, feature_order)
+    return DataFrameModel(model, feature_order)
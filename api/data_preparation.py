@@ -1,15 +1,18 @@
+import math
+import numpy as np
 import pandas as pd
 import os
 from sklearn.model_selection import train_test_split
 import util as utils
+from dataset_cache import load_dataset
 
 def baca_data_csv(file):
     # Baca data_rumah
     return pd.read_csv(file)
     
 def baca_data_xexcel(file):
-    # Baca data_rumah
-    return pd.read_excel(file)
+    # Baca data_rumah (dari cache kolom, parsing Excel hanya jika file berubah)
+    return load_dataset(file)
 
 def cek_data(data_rumah, konfig, api: bool = False):
     
@@ -70,8 +73,92 @@ def cek_data(data_rumah, konfig, api: bool = False):
         # I should probably leave it empty or make it useful.
         # For now, preserve existing behavior (pass) to avoid breaking app.py logic if it relied on it passing.
         return data_rumah
-                                                      
-        
+
+def validasi_batch(data_rumah, konfig):
+    """Validasi kolom-per-kolom untuk input batch API.
+
+    Setiap kolom prediktor dikonversi ke numerik dan dicek terhadap
+    `rentang_<kolom>` di params.yaml sekaligus untuk semua baris.
+    Nilai harus bilangan bulat yang berhingga; boolean, ±inf dan pecahan
+    dicatat sebagai error per baris.
+    Mengembalikan (data_valid, errors): data_valid berisi baris yang lolos
+    (int64, index asli dipertahankan) dan errors memetakan index baris
+    ke daftar pesan kesalahan.
+    """
+    errors = {}
+
+    def catat(mask, pesan):
+        for idx in data_rumah.index[mask]:
+            errors.setdefault(idx, []).append(pesan)
+
+    kolom_bersih = {}
+    for kolom in konfig["prediktor"]:
+        if kolom in data_rumah.columns:
+            mentah = data_rumah[kolom]
+        else:
+            mentah = pd.Series(None, index=data_rumah.index, dtype="object")
+        # true/false bukan angka, walaupun pd.to_numeric membacanya sebagai 1/0
+        boolean = mentah.map(lambda v: isinstance(v, (bool, np.bool_)))
+        nilai = pd.to_numeric(mentah.mask(boolean), errors="coerce")
+
+        hilang = mentah.isna().to_numpy()
+        bukan_angka = (nilai.isna() & ~mentah.isna()).to_numpy()
+        catat(hilang, f"Missing feature: {kolom}")
+        catat(bukan_angka, f"{kolom} must be numeric")
+        tak_hingga = np.isinf(nilai.to_numpy(dtype="float64"))
+        catat(tak_hingga, f"{kolom} must be finite")
+        nilai = nilai.mask(tak_hingga)
+        # Nilai pecahan (mis. KT 3.7) ditolak, bukan dibulatkan diam-diam oleh astype("int64")
+        pecahan = (nilai.notna() & (nilai % 1 != 0)).to_numpy()
+        catat(pecahan, f"{kolom} must be a whole number")
+
+        batas_bawah, batas_atas = konfig[f"rentang_{kolom}"]
+        di_luar = (nilai.notna() & ~nilai.between(batas_bawah, batas_atas)).to_numpy()
+        catat(di_luar, f"{kolom} out of range [{batas_bawah}, {batas_atas}]")
+
+        kolom_bersih[kolom] = nilai
+
+    data_bersih = pd.DataFrame(kolom_bersih, index=data_rumah.index)
+    valid = ~data_bersih.index.isin(list(errors))
+    data_valid = data_bersih[valid].astype("int64")
+
+    return data_valid, errors
+
+def validasi_baris(data, konfig):
+    """Validasi satu input API dengan aturan dan pesan yang sama seperti validasi_batch.
+
+    Dipakai /predict agar tidak perlu membuat DataFrame untuk satu baris.
+    Mengembalikan (baris, errors): baris berisi nilai int sesuai urutan
+    `prediktor` (None jika ada error) dan errors daftar pesan kesalahan.
+    """
+    baris, errors = [], []
+    for kolom in konfig["prediktor"]:
+        mentah = data.get(kolom)
+        if mentah is None or (isinstance(mentah, float) and math.isnan(mentah)):
+            errors.append(f"Missing feature: {kolom}")
+            continue
+        try:
+            if isinstance(mentah, (bool, np.bool_)):
+                raise TypeError
+            nilai = float(mentah)
+        except (TypeError, ValueError):
+            errors.append(f"{kolom} must be numeric")
+            continue
+        if math.isnan(nilai):
+            errors.append(f"{kolom} must be numeric")
+            continue
+        if math.isinf(nilai):
+            errors.append(f"{kolom} must be finite")
+            continue
+        if nilai % 1 != 0:
+            errors.append(f"{kolom} must be a whole number")
+        batas_bawah, batas_atas = konfig[f"rentang_{kolom}"]
+        if not batas_bawah <= nilai <= batas_atas:
+            errors.append(f"{kolom} out of range [{batas_bawah}, {batas_atas}]")
+        baris.append(int(nilai))
+
+    return (None if errors else baris), errors
+
 if __name__ == "__main__":
     # 1. Muat file konfigurasi 
     config_path = utils.get_config_path()
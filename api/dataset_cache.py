@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Columnar cache of Excel workbooks (DATA RUMAH.xlsx): parsed once with openpyxl,
+# then every reader loads NumPy .npy columns. An entry is keyed by the SHA-256 of
+# the workbook's bytes, so any change to the file makes the next read a miss.
+#
+# Layout: <cache_dir>/<workbook stem>-<hash[:16]>/meta.json + c<i>.npy per column.
+# String columns are stored as UTF-8 bytes + offsets (+ a null mask) instead of
+# pickled objects; other object columns fall back to a pickled object array.
+CACHE_DIR_ENV = "DATASET_CACHE_DIR"
+
+
+def default_cache_dir(path):
+    """data/cache for data/raw/<workbook>, unless DATASET_CACHE_DIR is set"""
+    return os.getenv(CACHE_DIR_ENV) or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(path))), "cache")
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_dir(path, digest, cache_dir):
+    stem = os.path.splitext(os.path.basename(path))[0].replace(" ", "_")
+    return os.path.join(cache_dir or default_cache_dir(path), f"{stem}-{digest[:16]}")
+
+
+def load_dataset(path, columns=None, cache_dir=None):
+    """DataFrame of the workbook at `path` (like pd.read_excel), served from the cache when possible.
+
+    `columns` limits which columns are read; with a warm cache the others
+    are never touched.
+    """
+    digest = content_hash(path)
+    entry = _entry_dir(path, digest, cache_dir)
+    try:
+        df = load_columns(entry, columns)
+        if df is not None:
+            return df
+    except Exception as e:
+        print(f"Dataset cache entry {entry} unreadable, rebuilding: {e}")
+        shutil.rmtree(entry, ignore_errors=True)
+
+    df = pd.read_excel(path)
+    _write_entry(df, entry, path, digest)
+    return df[columns] if columns is not None else df
+
+
+def save_dataset(df, path, cache_dir=None):
+    """Write `df` to the workbook at `path` and cache it directly, so the next load skips the Excel parse"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    df.to_excel(path, index=False)
+    digest = content_hash(path)
+    _write_entry(df.reset_index(drop=True), _entry_dir(path, digest, cache_dir), path, digest)
+
+
+def load_columns(directory, columns=None):
+    """DataFrame stored by `save_columns()`, or None if `directory` holds no complete set"""
+    meta_path = os.path.join(directory, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    specs = meta["columns"]
+    if columns is not None:
+        by_name = {spec["name"]: spec for spec in specs}
+        specs = [by_name[name] for name in columns]
+    data = {spec["name"]: _read_column(directory, spec) for spec in specs}
+    return pd.DataFrame(data, columns=[spec["name"] for spec in specs])
+
+
+def save_columns(df, directory, **meta):
+    """Write `df` as one .npy file per column plus meta.json; replaces `directory` as a whole"""
+    tmp = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    specs = []
+    for i, name in enumerate(df.columns):
+        spec = {"name": str(name), "file": f"c{i}"}
+        _write_column(df[name], os.path.join(tmp, spec["file"]), spec)
+        specs.append(spec)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({**meta, "rows": len(df), "columns": specs}, f)
+    if os.path.exists(directory):
+        old = f"{directory}.old-{os.getpid()}"
+        os.rename(directory, old)
+        os.rename(tmp, directory)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        os.rename(tmp, directory)
+
+
+def _read_column(directory, spec):
+    base = os.path.join(directory, spec["file"])
+    if spec["kind"] == "string":
+        buffer = np.load(base + ".data.npy").tobytes()
+        offsets = np.load(base + ".offsets.npy").tolist()
+        nulls = np.load(base + ".nulls.npy")
+        values = [buffer[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+        for i in np.flatnonzero(nulls):
+            values[i] = None
+        return values
+    return np.load(base + ".npy", allow_pickle=spec["kind"] == "object")
+
+
+def _write_entry(df, entry, source, digest):
+    try:
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        save_columns(df, entry, source=os.path.basename(source), sha256=digest)
+    except OSError as e:
+        # Read-only cache dir, or another process replaced the entry at the same moment
+        print(f"Dataset cache not written: {e}")
+        return
+
+    # Entries of older versions of the same workbook are stale now
+    cache_dir = os.path.dirname(entry)
+    prefix = os.path.basename(entry).rsplit("-", 1)[0] + "-"
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and os.path.join(cache_dir, name) != entry \
+                and ".tmp-" not in name and ".old-" not in name:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+def _write_column(series, base, spec):
+    values = series.to_numpy()
+    if values.dtype != object and not pd.api.types.is_string_dtype(series.dtype):
+        spec["kind"] = "numeric"
+        np.save(base + ".npy", values)
+        return
+
+    values = series.to_numpy(dtype=object)
+    nulls = pd.isna(values)
+    if all(isinstance(v, str) for v in values[~nulls]):
+        spec["kind"] = "string"
+        encoded = [b"" if null else v.encode("utf-8") for v, null in zip(values, nulls)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        np.save(base + ".data.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        np.save(base + ".offsets.npy", offsets)
+        np.save(base + ".nulls.npy", nulls)
+    else:
+        spec["kind"] = "object"
+        np.save(base + ".npy", values, allow_pickle=True)
@@ -0,0 +1,475 @@
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from reference_stats import ARTIFACT_NAME, FEATURES, load_reference, summary_stats
+from dataset_cache import load_dataset
+
+# Evidently (v0.4.x API) is imported lazily: it is heavy and /predict never needs it
+_evidently = None
+
+# Timings of the lazily loaded pieces, reported in the API startup report
+timings = {
+    "evidently_import_s": None,
+    "reference_load_s": None
+}
+
+_reference_lock = threading.Lock()
+_evidently_lock = threading.Lock()
+
+# -----------------------------------------------------------------------------
+# DATA DRIFT DETECTION WITH EVIDENTLY
+# -----------------------------------------------------------------------------
+# Reference data from training (loaded on first use or by the warm-up thread)
+reference_data = None
+reference_stats = None
+
+def load_reference_stats():
+    """Load training data for drift detection with Evidently"""
+    global reference_data, reference_stats
+    
+    # helper for stats
+    def calc_stats(df):
+        return {
+            "mean": df.mean().to_dict(),
+            "std": df.std().to_dict(),
+            "min": df.min().to_dict(),
+            "max": df.max().to_dict(),
+            "count": len(df)
+        }
+
+    try:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        data_dirs = [
+            os.path.join(base_dir, "..", "data"), # Local
+            os.path.join(base_dir, "data")        # Docker
+        ]
+        
+        # 0. Try the precomputed reference artifact (written by scripts/train.py)
+        try:
+            p = os.path.join(base_dir, "models", ARTIFACT_NAME)
+            if os.path.exists(p):
+                print(f"Loading reference from {p}")
+                reference = load_reference(p)
+                reference_data = pd.DataFrame(reference["sample"])[reference["features"]]
+                reference_stats = summary_stats(reference)
+                print(f"Loaded reference artifact ({reference['count']} rows, {len(reference_data)} sampled).")
+                return
+        except Exception as e:
+            print(f"Failed to load reference artifact: {e}")
+
+        # 1. Try Pickle
+        try:
+            for d in data_dirs:
+                p = os.path.join(d, "processed", "x_train.pkl")
+                if os.path.exists(p):
+                    print(f"Loading reference from {p}")
+                    reference_data = pd.read_pickle(p)
+                    reference_stats = calc_stats(reference_data)
+                    print(f"Loaded {len(reference_data)} rows from pickle.")
+                    return
+        except Exception as e:
+            print(f"Failed to load pickle: {e}")
+
+        # 2. Try Excel
+        try:
+            for d in data_dirs:
+                p = os.path.join(d, "raw", "DATA RUMAH.xlsx")
+                if os.path.exists(p):
+                    print(f"Loading reference from {p}")
+                    features = ["LB", "LT", "KT", "KM", "GRS"]
+                    reference_data = load_dataset(p, columns=features).dropna()
+                    reference_stats = calc_stats(reference_data)
+                    print(f"Loaded {len(reference_data)} rows from Excel.")
+                    return
+        except Exception as e:
+            print(f"Failed to load Excel: {e}")
+
+        # 3. Fallback: Synthetic
+        print("Using synthetic reference data.")
+        np.random.seed(42)
+        n_samples = 100
+        reference_data = pd.DataFrame({
+            "LB": np.random.normal(150, 80, n_samples).clip(30, 500),
+            "LT": np.random.normal(180, 100, n_samples).clip(50, 600),
+            "KT": np.random.normal(4, 1.5, n_samples).clip(1, 10).astype(int),
+            "KM": np.random.normal(3, 1.2, n_samples).clip(1, 8).astype(int),
+            "GRS": np.random.normal(2, 1, n_samples).clip(0, 5).astype(int)
+        })
+        reference_stats = calc_stats(reference_data)
+
+    except Exception as e:
+        print(f"Critical error in load_reference_stats: {e}")
+        # Final safety net
+        reference_data = pd.DataFrame(columns=["LB", "LT", "KT", "KM", "GRS"])
+        reference_stats = calc_stats(reference_data)
+
+def ensure_reference():
+    """Load the reference data once; concurrent callers wait for the first load"""
+    if reference_data is not None:
+        return
+    with _reference_lock:
+        if reference_data is None:
+            start = time.perf_counter()
+            load_reference_stats()
+            timings["reference_load_s"] = round(time.perf_counter() - start, 3)
+
+def load_evidently():
+    """Import Evidently on first use; returns (Report, DataDriftTable, DatasetDriftMetric)"""
+    global _evidently
+    if _evidently is None:
+        with _evidently_lock:
+            if _evidently is None:
+                start = time.perf_counter()
+                from evidently.report import Report
+                from evidently.metrics import DataDriftTable, DatasetDriftMetric
+                _evidently = (Report, DataDriftTable, DatasetDriftMetric)
+                timings["evidently_import_s"] = round(time.perf_counter() - start, 3)
+    return _evidently
+
+def start_warmup():
+    """Load reference data and Evidently in the background so the first /drift is fast"""
+    def warm_up():
+        try:
+            ensure_reference()
+            load_evidently()
+            print("Drift subsystem warmed up.")
+        except Exception as e:
+            print(f"Drift warm-up failed: {e}")
+
+    thread = threading.Thread(target=warm_up, name="drift-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def calculate_drift_evidently(recent_predictions):
+    """Calculate data drift using Evidently library"""
+    # Extract input features from recent predictions
+    rows = [values for values in map(feature_vector, recent_predictions) if values is not None]
+    if len(rows) < 5:
+        return None
+    return calculate_drift_frame(pd.DataFrame(rows, columns=FEATURES))
+
+def calculate_drift_frame(current_data):
+    """Evidently drift report for a DataFrame of current feature values (FEATURES columns)"""
+    # Check if reference data is available and not empty
+    if reference_data is None or len(reference_data) == 0:
+        return None
+    
+    if len(current_data) < 5:
+        return None
+    
+    features = ["LB", "LT", "KT", "KM", "GRS"]
+    current_data = current_data[features]
+    ref_data = reference_data[features].copy()
+    
+    try:
+        # Create Evidently Data Drift Report
+        Report, DataDriftTable, DatasetDriftMetric = load_evidently()
+        drift_report = Report(metrics=[
+            DatasetDriftMetric(),
+            DataDriftTable()
+        ])
+        
+        drift_report.run(reference_data=ref_data, current_data=current_data)
+        
+        # Extract results from report
+        report_dict = drift_report.as_dict()
+        
+        # Parse Evidently results
+        drift_results = parse_evidently_report(report_dict, current_data, ref_data)
+        drift_results["sample_size"] = len(current_data)
+        drift_results["reference_size"] = reference_stats["count"]
+        drift_results["method"] = "evidently"
+        
+        return drift_results
+        
+    except Exception as e:
+        print(f"Evidently error: {e}")
+        # Fallback to simple method if Evidently fails
+        return calculate_drift_simple(current_data.to_dict("records"), features)
+
+def parse_evidently_report(report_dict, current_data, ref_data):
+    """Parse Evidently report dictionary to extract drift information"""
+    features = ["LB", "LT", "KT", "KM", "GRS"]
+    feature_names = {
+        "LB": "Luas Bangunan",
+        "LT": "Luas Tanah",
+        "KT": "Kamar Tidur",
+        "KM": "Kamar Mandi",
+        "GRS": "Garasi"
+    }
+    
+    drift_report = {}
+    dataset_drift = False
+    drift_share = 0.0
+    
+    # Extract metrics from report
+    for metric_result in report_dict.get("metrics", []):
+        metric_id = metric_result.get("metric", "")
+        result = metric_result.get("result", {})
+        
+        # Dataset-level drift
+        if "DatasetDriftMetric" in metric_id:
+            dataset_drift = result.get("dataset_drift", False)
+            drift_share = result.get("drift_share", 0.0)
+        
+        # Per-column drift from DataDriftTable
+        if "DataDriftTable" in metric_id:
+            drift_by_columns = result.get("drift_by_columns", {})
+            
+            for feature in features:
+                if feature in drift_by_columns:
+                    col_data = drift_by_columns[feature]
+                    
+                    is_drifted = col_data.get("drift_detected", False)
+                    drift_score = col_data.get("drift_score", 0)
+                    stattest_name = col_data.get("stattest_name", "unknown")
+                    p_value = col_data.get("p_value", 1.0) if col_data.get("p_value") is not None else 1.0
+                    
+                    # Determine severity based on p-value and drift detection
+                    if is_drifted:
+                        if p_value < 0.01:
+                            severity = "high"
+                        elif p_value < 0.05:
+                            severity = "medium"
+                        else:
+                            severity = "medium"
+                    else:
+                        severity = "low"
+                    
+                    drift_report[feature] = {
+                        "feature_name": feature_names.get(feature, feature),
+                        "drift_detected": is_drifted,
+                        "drift_score": round(drift_score, 4) if drift_score else 0,
+                        "p_value": round(p_value, 4) if p_value else 1.0,
+                        "stattest": stattest_name,
+                        "severity": severity,
+                        "reference_mean": round(reference_stats["mean"][feature], 2),
+                        "current_mean": round(current_data[feature].mean(), 2),
+                        "reference_std": round(reference_stats["std"][feature], 2),
+                        "current_std": round(current_data[feature].std(), 2)
+                    }
+    
+    # If no per-column data, create basic report
+    if not drift_report:
+        for feature in features:
+            if feature in current_data.columns and feature in ref_data.columns:
+                ref_mean = reference_stats["mean"][feature]
+                cur_mean = current_data[feature].mean()
+                ref_std = reference_stats["std"][feature]
+                
+                # Simple drift score
+                drift_score = abs(cur_mean - ref_mean) / ref_std if ref_std > 0 else 0
+                
+                drift_report[feature] = {
+                    "feature_name": feature_names.get(feature, feature),
+                    "drift_detected": drift_score > 0.5,
+                    "drift_score": round(drift_score, 4),
+                    "p_value": None,
+                    "stattest": "z-score",
+                    "severity": "high" if drift_score > 1.5 else ("medium" if drift_score > 0.5 else "low"),
+                    "reference_mean": round(ref_mean, 2),
+                    "current_mean": round(cur_mean, 2),
+                    "reference_std": round(ref_std, 2),
+                    "current_std": round(current_data[feature].std(), 2)
+                }
+    
+    # Determine overall status
+    severities = [d["severity"] for d in drift_report.values()]
+    drifted_count = sum(1 for d in drift_report.values() if d.get("drift_detected", False))
+    
+    if dataset_drift or drifted_count >= 3 or "high" in severities:
+        overall_status = "high"
+    elif drifted_count >= 1 or "medium" in severities:
+        overall_status = "medium"
+    else:
+        overall_status = "low"
+    
+    return {
+        "overall_status": overall_status,
+        "dataset_drift": dataset_drift,
+        "drift_share": round(drift_share, 2),
+        "drifted_features_count": drifted_count,
+        "total_features": len(features),
+        "features": drift_report
+    }
+
+def calculate_drift_simple(recent_inputs, features):
+    """Fallback simple drift calculation"""
+    df_recent = pd.DataFrame(recent_inputs)
+    
+    drift_report = {}
+    feature_names = {
+        "LB": "Luas Bangunan",
+        "LT": "Luas Tanah",
+        "KT": "Kamar Tidur",
+        "KM": "Kamar Mandi",
+        "GRS": "Garasi"
+    }
+    
+    for feature in features:
+        if feature in df_recent.columns:
+            recent_mean = df_recent[feature].mean()
+            recent_std = df_recent[feature].std()
+            ref_mean = reference_stats["mean"].get(feature, 0)
+            ref_std = reference_stats["std"].get(feature, 1)
+            
+            drift_score = abs(recent_mean - ref_mean) / ref_std if ref_std > 0 else 0
+            
+            if drift_score < 0.5:
+                severity = "low"
+            elif drift_score < 1.5:
+                severity = "medium"
+            else:
+                severity = "high"
+            
+            drift_report[feature] = {
+                "feature_name": feature_names.get(feature, feature),
+                "drift_detected": drift_score > 0.5,
+                "drift_score": round(drift_score, 4),
+                "p_value": None,
+                "stattest": "z-score",
+                "severity": severity,
+                "reference_mean": round(ref_mean, 2),
+                "current_mean": round(recent_mean, 2),
+                "reference_std": round(ref_std, 2),
+                "current_std": round(recent_std, 2)
+            }
+    
+    severities = [d["severity"] for d in drift_report.values()]
+    drifted_count = sum(1 for d in drift_report.values() if d.get("drift_detected", False))
+    
+    if "high" in severities:
+        overall_status = "high"
+    elif "medium" in severities:
+        overall_status = "medium"
+    else:
+        overall_status = "low"
+    
+    return {
+        "overall_status": overall_status,
+        "dataset_drift": overall_status in ["high", "medium"],
+        "drift_share": drifted_count / len(features),
+        "drifted_features_count": drifted_count,
+        "total_features": len(features),
+        "features": drift_report,
+        "method": "fallback"
+    }
+
+# -----------------------------------------------------------------------------
+# REFRESH-INTERVAL DRIFT CACHE
+# -----------------------------------------------------------------------------
+
+def feature_vector(log_entry):
+    """Numeric feature values of a successful log entry, or None"""
+    if log_entry.get("status") != "success":
+        return None
+    try:
+        values = []
+        for f in FEATURES:
+            val = log_entry["input"].get(f, 0)
+            if isinstance(val, list):
+                val = val[0] if len(val) > 0 else 0
+            values.append(float(val))
+        return values
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+def window_moments(values):
+    """Per-feature count/mean/std (ddof=1, like pandas) of a 2-D array of current feature rows"""
+    n = len(values)
+    mean = values.mean(axis=0) if n else np.zeros(len(FEATURES))
+    std = values.std(axis=0, ddof=1) if n > 1 else np.zeros(len(FEATURES))
+    return {
+        "count": n,
+        "mean": dict(zip(FEATURES, mean.tolist())),
+        "std": dict(zip(FEATURES, std.tolist()))
+    }
+
+class DriftCache:
+    """Refresh-interval cache of the Evidently drift report, keyed on the log sequence number.
+
+    Nothing is updated incrementally: the full report is rerun once
+    `refresh_every` new predictions have accumulated (refresh "full"), and
+    a GET with no new predictions returns the stored result (refresh
+    "cached"). In between (refresh "interval"), the test results
+    (drift_detected, p_value, severity, overall_status, ...) and the
+    per-feature moments next to them are those of the last full run,
+    `tests_as_of_seq`, at most `refresh_every - 1` predictions behind; the
+    moments of the newer window are reported separately under
+    `current_window` (cheap to refresh) so fresh numbers are never mixed
+    with old decisions. DRIFT_ENGINE=streaming is the per-prediction
+    alternative.
+
+    The report runs outside the lock and only one caller runs it at a
+    time; concurrent callers get the previous result (refresh "interval"), or
+    wait for the first report when there is none yet.
+    """
+
+    def __init__(self, refresh_every=10):
+        self.refresh_every = refresh_every
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._computing = False
+        self._result = None
+        self._result_seq = None
+        self._full_result = None
+        self._full_seq = None
+
+    def get(self, seq, moments, compute):
+        """Return (result, info) for log sequence `seq`; `compute()` runs the full analysis"""
+        start = time.perf_counter()
+        with self._lock:
+            while True:
+                if self._result_seq == seq:
+                    return self._result, {"cache_hit": True, "refresh": "cached", "compute_ms": 0.0}
+                due = self._full_result is None or seq - self._full_seq >= self.refresh_every
+                if not due or not self._computing:
+                    break
+                if self._full_result is not None:
+                    # Another caller is running the report: answer from the previous one
+                    due = False
+                    break
+                self._done.wait()
+            self._computing = self._computing or due
+
+        if due:
+            try:
+                full_result = compute()
+            finally:
+                with self._lock:
+                    self._computing = False
+                    self._done.notify_all()
+            with self._lock:
+                if self._full_seq is None or seq >= self._full_seq:
+                    self._full_result = full_result
+                    self._full_seq = seq
+
+        with self._lock:
+            result = self._with_window(seq, moments)
+            if self._result_seq is None or seq >= self._result_seq:
+                self._result = result
+                self._result_seq = seq
+        return result, {
+            "cache_hit": False,
+            "refresh": "full" if due else "interval",
+            "refresh_every": self.refresh_every,
+            "compute_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+
+    def _with_window(self, seq, moments):
+        if self._full_result is None:
+            return None
+        return {
+            **self._full_result,
+            "tests_as_of_seq": self._full_seq,
+            "current_window": {
+                "seq": seq,
+                "sample_size": moments["count"],
+                "features": {
+                    f: {"mean": round(moments["mean"][f], 2), "std": round(moments["std"][f], 2)}
+                    for f in self._full_result.get("features", {})
+                }
+            }
+        }
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from leader import LeaderLock
+
+STATUS_RANK = {"low": 0, "medium": 1, "high": 2}
+
+SNAPSHOT_NAME = "drift_snapshot.json"
+ALERTS_NAME = "drift_alerts.jsonl"
+
+WIB = timezone(timedelta(hours=7))
+
+
+def _json_default(o):
+    # NumPy scalars (e.g. numpy.bool_ from the fallback drift method)
+    if hasattr(o, "item"):
+        return o.item()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class DriftScheduler:
+    """Compute drift in a background thread every `interval` seconds and persist the result.
+
+    `compute()` returns a drift report (or None while there is not enough
+    data). The latest snapshot is written atomically to
+    `state_dir/drift_snapshot.json` and loaded again on startup, so /drift
+    can always answer from disk-backed state without running any
+    statistics on the request thread. When `overall_status` rises to
+    medium or high an alert is appended to `drift_alerts.jsonl` and passed
+    to `on_alert`. The alerts file keeps at most 2 * `max_alerts` lines
+    (trimmed to the last `max_alerts` when it reaches that).
+
+    With `shared=True` (several worker processes using the same state dir)
+    only the process holding an exclusive lock on `state_dir/drift_scheduler.lock`
+    computes and alerts; the others re-read the persisted snapshot and
+    alerts every interval. When the holder exits, another worker takes over.
+    """
+
+    def __init__(self, compute, interval, state_dir, on_alert=None, max_alerts=100, shared=False):
+        self.compute = compute
+        self.interval = interval
+        self.state_dir = state_dir
+        self.on_alert = on_alert
+        self.snapshot_path = os.path.join(state_dir, SNAPSHOT_NAME)
+        self.alerts_path = os.path.join(state_dir, ALERTS_NAME)
+        self.max_alerts = max_alerts
+        self.shared = shared
+        self.leader_lock = LeaderLock(os.path.join(state_dir, "drift_scheduler.lock"))
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.snapshot = None
+        self.alerts = []
+        self.runs = 0
+        self.failures = 0
+        self.last_error = None
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, "r") as f:
+                    snapshot = json.load(f)
+                with self._lock:
+                    changed = self.snapshot is None or self.snapshot["computed_at"] != snapshot["computed_at"]
+                    self.snapshot = snapshot
+                if changed and self._thread is None:
+                    print(f"Loaded drift snapshot from {snapshot['computed_at_str']}.")
+            if os.path.exists(self.alerts_path):
+                with open(self.alerts_path, "r") as f:
+                    lines = f.readlines()
+                alerts = [json.loads(line) for line in lines[-self.max_alerts:] if line.strip()]
+                with self._lock:
+                    self.alerts = alerts
+        except Exception as e:
+            print(f"Failed to load drift state: {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="drift-scheduler", daemon=True)
+        self._thread.start()
+        print(f"Drift scheduler running every {self.interval}s (state in {self.state_dir}).")
+
+    def trigger(self):
+        """Run the next computation now instead of waiting for the interval"""
+        self._wakeup.set()
+
+    def is_leader(self):
+        """True if this process runs the computations (always, unless `shared`)"""
+        if not self.shared or self.leader_lock.held:
+            return True
+        if not self.leader_lock.acquire():
+            return False
+        print(f"Drift scheduler: this process (pid {os.getpid()}) computes drift for all workers.")
+        return True
+
+    def _run(self):
+        while True:
+            if self.is_leader():
+                self.run_once()
+            else:
+                self._load()
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def run_once(self):
+        started = time.time()
+        try:
+            # Plain JSON types, for the snapshot file and for /drift alike
+            result = json.loads(json.dumps(self.compute(), default=_json_default))
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"Scheduled drift computation failed: {e}")
+            return None
+
+        snapshot = {
+            "computed_at": started,
+            "computed_at_str": datetime.fromtimestamp(started, WIB).strftime("%Y-%m-%d %H:%M:%S"),
+            "compute_ms": round((time.time() - started) * 1000, 2),
+            "result": result
+        }
+        with self._lock:
+            previous = self.snapshot
+            self.snapshot = snapshot
+            self.runs += 1
+        self._persist(snapshot)
+        self._check_alert(previous, snapshot)
+        return snapshot
+
+    def _persist(self, snapshot):
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"Failed to persist drift snapshot: {e}")
+
+    def _check_alert(self, previous, snapshot):
+        new_status = (snapshot["result"] or {}).get("overall_status")
+        old_status = ((previous or {}).get("result") or {}).get("overall_status")
+        new_rank = STATUS_RANK.get(new_status, 0)
+        if new_rank == 0 or new_rank <= STATUS_RANK.get(old_status, 0):
+            return
+
+        result = snapshot["result"]
+        alert = {
+            "at": snapshot["computed_at"],
+            "at_str": snapshot["computed_at_str"],
+            "status": new_status,
+            "previous_status": old_status,
+            "drifted_features": [f for f, d in result.get("features", {}).items() if d.get("drift_detected")],
+            "sample_size": result.get("sample_size")
+        }
+        print(f"DRIFT ALERT: status {old_status} -> {new_status} (features: {', '.join(alert['drifted_features']) or '-'})")
+        with self._lock:
+            self.alerts = (self.alerts + [alert])[-self.max_alerts:]
+        try:
+            self._persist_alert(alert)
+        except Exception as e:
+            print(f"Failed to persist drift alert: {e}")
+        if self.on_alert:
+            try:
+                self.on_alert(alert)
+            except Exception as e:
+                print(f"Drift alert hook failed: {e}")
+
+    def _persist_alert(self, alert):
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(self.alerts_path, "a") as f:
+            f.write(json.dumps(alert) + "\n")
+        with open(self.alerts_path, "r") as f:
+            lines = f.readlines()
+        if len(lines) >= 2 * self.max_alerts:
+            tmp_path = self.alerts_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.writelines(lines[-self.max_alerts:])
+            os.replace(tmp_path, self.alerts_path)
+
+    def latest(self):
+        """The last snapshot plus its age in seconds, or None before the first run"""
+        with self._lock:
+            snapshot = self.snapshot
+        if snapshot is None:
+            return None
+        return {**snapshot, "age_s": round(time.time() - snapshot["computed_at"], 1)}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "interval_s": self.interval,
+                "runs": self.runs,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "last_run": self.snapshot["computed_at_str"] if self.snapshot else None,
+                "leader": not self.shared or self.leader_lock.held,
+                "alerts": len(self.alerts)
+            }
@@ -0,0 +1,28 @@
+import multiprocessing
+import os
+
+# Production server: gunicorn -c gunicorn.conf.py app:app
+#
+# The app (models, reference data, Evidently) is imported once in the master
+# and the workers are forked from it, so they share those pages instead of
+# each loading its own copy. Logs, counters and drift state are shared
+# through the SQLite log store (see SERVER MODE in app.py).
+os.environ.setdefault("PREFORK", "1")
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+# Threads per worker: requests waiting on I/O (and open /logs/stream
+# connections) do not hold up a whole process
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+# At most half of a worker's threads may be held by /logs/stream
+os.environ.setdefault("LOG_STREAM_MAX_CLIENTS", str(max(1, threads // 2)))
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+accesslog = None
+
+
+def post_fork(server, worker):
+    # Threads started in the master do not exist in the forked worker
+    import app
+    app.start_background_tasks()
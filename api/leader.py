@@ -0,0 +1,36 @@
+import os
+
+
+class LeaderLock:
+    """Non-blocking exclusive lock on a file, held until the process exits.
+
+    Elects one process among several sharing the same state (e.g. gunicorn
+    workers): the first one to call `acquire()` gets the lock, and when it
+    exits the next caller takes over. Where fcntl is unavailable (Windows,
+    which only runs a single process) every caller is leader.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self.held = False
+
+    def acquire(self):
+        """True if this process holds the lock (now or from an earlier call)"""
+        if self.held:
+            return True
+        try:
+            import fcntl
+        except ImportError:
+            self.held = True
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        f = open(self.path, "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        self.held = True
+        return True
@@ -0,0 +1,295 @@
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from log_index import LogCounters, SeqIndex
+from reference_stats import FEATURES
+
+STATUSES = ["success", "error"]
+SHADOW_STATUSES = [None, "pending", "done", "dropped"]
+MODEL_KEYS = ["model1", "model2"]
+
+WIB = timezone(timedelta(hours=7))
+
+
+class LogBuffer:
+    """Preallocated columnar ring buffer of prediction log entries.
+
+    Every entry is a row across fixed NumPy columns (features, predictions,
+    epoch timestamp, status/model codes, shadow state), 115 bytes
+    instead of a few KB of nested dicts. Timestamps, model names and the
+    `details` dicts are only rendered by `query()`. Inputs that are not
+    numeric feature rows (failed requests) are kept as-is in a side table
+    that is trimmed as the ring wraps.
+
+    Summary counters and per-status / per-model sequence indexes are
+    updated on every append and eviction, so summaries are O(1) and
+    filtered or cursor-based reads never scan the buffer. The indexes are
+    Python lists: one slot in each plus one shared int object per entry,
+    about 50 bytes, so a full buffer takes about 165 bytes per entry
+    (`nbytes()`), plus the raw inputs of failed requests.
+
+    Not thread-safe: callers hold one lock around writes and reads.
+    """
+
+    def __init__(self, capacity, features=FEATURES):
+        self.capacity = capacity
+        self.feature_names = list(features)
+        self.seq = np.zeros(capacity, dtype=np.int64)
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.features = np.full((capacity, len(features)), np.nan)
+        self.prediction = np.full(capacity, np.nan)
+        # Per-model predictions and R2 at scoring time (details.model1 / details.model2)
+        self.model_prediction = np.full((capacity, 2), np.nan)
+        self.model_r2 = np.zeros((capacity, 2))
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.model = np.zeros(capacity, dtype=np.int16)
+        self.has_details = np.zeros(capacity, dtype=bool)
+        self.switched = np.zeros(capacity, dtype=bool)
+        self.shadow_status = np.zeros(capacity, dtype=np.int8)
+        self.shadow_model = np.zeros(capacity, dtype=np.int8)
+        self.shadow_lag_ms = np.full(capacity, np.nan, dtype=np.float32)
+        # float64: eviction must subtract from the counters exactly the value that was added
+        self.latency_ms = np.full(capacity, np.nan)
+
+        self._model_names = []
+        self._model_codes = {}
+        # seq -> (raw input, error message) for entries without a numeric feature row
+        self._extras = {}
+        self.last_seq = 0
+        self.size = 0
+
+        self.counters = LogCounters()
+        self._status_index = [SeqIndex() for _ in STATUSES]
+        self._model_index = []
+
+    def _model_code(self, name):
+        code = self._model_codes.get(name)
+        if code is None:
+            code = self._model_codes[name] = len(self._model_names)
+            self._model_names.append(name)
+            self._model_index.append(SeqIndex())
+        return code
+
+    def append(self, ts, input_data, prediction, status="success", error_msg=None, model_used="Unknown", details=None, latency_ms=None):
+        """Write one entry into the next slot (overwriting the oldest when full); returns its seq"""
+        self.last_seq += 1
+        seq = self.last_seq
+        slot = (seq - 1) % self.capacity
+        if self.size == self.capacity:
+            self._evict(slot)
+        else:
+            self.size += 1
+
+        status_code = STATUSES.index(status)
+        model_code = self._model_code(model_used)
+        self.seq[slot] = seq
+        self.ts[slot] = ts
+        self.status[slot] = status_code
+        self.model[slot] = model_code
+        self.prediction[slot] = np.nan if prediction is None else prediction
+        self.latency_ms[slot] = np.nan if latency_ms is None else latency_ms
+        self.counters.add(status, model_used, latency_ms)
+        self._status_index[status_code].append(seq)
+        self._model_index[model_code].append(seq)
+
+        row = self.features[slot]
+        try:
+            for i, f in enumerate(self.feature_names):
+                row[i] = float(input_data[f])
+            if not np.isfinite(row).all():
+                # e.g. "inf" strings of a rejected request: keep them as sent
+                raise ValueError
+            if error_msg is not None:
+                self._extras[seq] = (None, error_msg)
+        except (TypeError, ValueError, KeyError):
+            row[:] = np.nan
+            self._extras[seq] = (input_data, error_msg)
+
+        self.has_details[slot] = details is not None
+        self.shadow_status[slot] = 0
+        self.shadow_lag_ms[slot] = np.nan
+        if details is not None:
+            for j, key in enumerate(MODEL_KEYS):
+                model_details = details.get(key) or {}
+                p = model_details.get("prediction")
+                self.model_prediction[slot, j] = np.nan if p is None else p
+                self.model_r2[slot, j] = model_details.get("r2", 0)
+            self.switched[slot] = details.get("switched", False)
+            shadow = details.get("shadow")
+            if shadow:
+                self.shadow_status[slot] = SHADOW_STATUSES.index(shadow["status"])
+                self.shadow_model[slot] = MODEL_KEYS.index(shadow["model"])
+        else:
+            self.model_prediction[slot] = np.nan
+        return seq
+
+    def _evict(self, slot):
+        old_seq = int(self.seq[slot])
+        self._extras.pop(old_seq, None)
+        status_code, model_code = self.status[slot], self.model[slot]
+        self.counters.add(STATUSES[status_code], self._model_names[model_code], float(self.latency_ms[slot]), sign=-1)
+        self._status_index[status_code].evict(old_seq)
+        self._model_index[model_code].evict(old_seq)
+
+    def feature_row(self, seq):
+        """Feature values of entry `seq` as a list, or None if it has no numeric feature row"""
+        row = self.features[(seq - 1) % self.capacity]
+        if np.isnan(row).any():
+            return None
+        return row.tolist()
+
+    def set_shadow(self, seq, status, prediction=None, lag_ms=None):
+        """Record the outcome of async shadow scoring; ignored if the entry was already overwritten"""
+        slot = (seq - 1) % self.capacity
+        if self.seq[slot] != seq:
+            return False
+        self.shadow_status[slot] = SHADOW_STATUSES.index(status)
+        if prediction is not None:
+            self.model_prediction[slot, self.shadow_model[slot]] = prediction
+        if lag_ms is not None:
+            self.shadow_lag_ms[slot] = lag_ms
+        return True
+
+    def details(self, seq):
+        """Rendered `details` of entry `seq`, or None if it was overwritten or has none"""
+        slot = (seq - 1) % self.capacity
+        if self.seq[slot] != seq:
+            return None
+        return self.render_details(slot)
+
+    def slots(self, n=None):
+        """Slot indices of the last `n` entries (all by default), oldest first"""
+        n = self.size if n is None else min(n, self.size)
+        start = self.last_seq - n
+        if start % self.capacity + n <= self.capacity:
+            first = start % self.capacity
+            return slice(first, first + n)
+        return np.arange(start, start + n) % self.capacity
+
+    def window(self, n):
+        """(features, success mask) of the last `n` entries, oldest first; a view when not wrapped"""
+        idx = self.slots(n)
+        return self.features[idx], self.status[idx] == 0
+
+    def first_seq_since(self, ts):
+        """Smallest retained seq logged at or after epoch `ts` (binary search; timestamps are non-decreasing)"""
+        lo, hi = self.last_seq - self.size + 1, self.last_seq + 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ts[(mid - 1) % self.capacity] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def query(self, limit=50, status=None, model=None, after=None, since=None):
+        """Render log entries as /logs dicts.
+
+        Without a cursor: the newest `limit` entries, newest first. With
+        `after` (a seq) and/or `since` (epoch seconds): up to `limit` entries
+        past the cursor, oldest first, so a poller can resume from the last
+        seq it saw. `status` / `model` filters are served from the indexes.
+        """
+        if status is not None and status not in STATUSES:
+            return []
+        if model is not None and model not in self._model_codes:
+            return []
+        oldest = self.last_seq - self.size
+        cursor = None
+        if after is not None or since is not None:
+            cursor = max(after or 0, oldest)
+            if since is not None:
+                cursor = max(cursor, self.first_seq_since(since) - 1)
+
+        indexes = []
+        if status is not None:
+            indexes.append(self._status_index[STATUSES.index(status)])
+        if model is not None:
+            indexes.append(self._model_index[self._model_codes[model]])
+
+        if not indexes:
+            if cursor is None:
+                seqs = range(self.last_seq, self.last_seq - min(limit, self.size), -1)
+            else:
+                seqs = range(cursor + 1, min(cursor + limit, self.last_seq) + 1)
+        else:
+            # Walk the smallest index in chunks and check the other filters against theirs
+            indexes.sort(key=len)
+            index, others = indexes[0], indexes[1:]
+            seqs = []
+            chunk = max(limit, 64)
+            position = cursor if cursor is not None else self.last_seq + 1
+            while len(seqs) < limit:
+                if cursor is None:
+                    candidates = index.before(position, chunk)
+                else:
+                    candidates = index.after(position, chunk)
+                if not candidates:
+                    break
+                seqs.extend(seq for seq in candidates if all(seq in other for other in others))
+                position = candidates[-1]
+            seqs = seqs[:limit]
+        return [self.render((seq - 1) % self.capacity) for seq in seqs]
+
+    def entries(self, limit=50, status=None):
+        """The newest `limit` entries, newest first (see `query()`)"""
+        return self.query(limit, status)
+
+    def render(self, slot):
+        seq = int(self.seq[slot])
+        raw_input, error = self._extras.get(seq, (None, None))
+        if raw_input is None:
+            raw_input = {f: _number(v) for f, v in zip(self.feature_names, self.features[slot].tolist())}
+        return {
+            "seq": seq,
+            "timestamp": datetime.fromtimestamp(self.ts[slot], WIB).strftime("%Y-%m-%d %H:%M:%S"),
+            "input": raw_input,
+            "prediction": _float(self.prediction[slot]),
+            "status": STATUSES[self.status[slot]],
+            "error": error,
+            "model_used": self._model_names[self.model[slot]],
+            "details": self.render_details(slot),
+            "latency_ms": _float(self.latency_ms[slot])
+        }
+
+    def render_details(self, slot):
+        if not self.has_details[slot]:
+            return None
+        details = {
+            key: {"prediction": _float(self.model_prediction[slot, j]), "r2": float(self.model_r2[slot, j])}
+            for j, key in enumerate(MODEL_KEYS)
+        }
+        details["switched"] = bool(self.switched[slot])
+        if self.shadow_status[slot]:
+            lag = self.shadow_lag_ms[slot]
+            details["shadow"] = {
+                "model": MODEL_KEYS[self.shadow_model[slot]],
+                "status": SHADOW_STATUSES[self.shadow_status[slot]],
+                "lag_ms": None if np.isnan(lag) else round(float(lag), 2)
+            }
+        return details
+
+    def nbytes(self):
+        """Bytes held by the columns and the sequence indexes (not the side table of failed inputs)"""
+        columns = [self.seq, self.ts, self.features, self.prediction, self.model_prediction, self.model_r2,
+                   self.status, self.model, self.has_details, self.switched, self.shadow_status,
+                   self.shadow_model, self.shadow_lag_ms, self.latency_ms]
+        indexes = self._status_index + self._model_index
+        # Each entry's seq is one int object referenced from its status and its model index
+        seq_ints = self.size * sys.getsizeof(self.last_seq)
+        return sum(c.nbytes for c in columns) + sum(i.nbytes() for i in indexes) + seq_ints
+
+
+def _float(value):
+    value = float(value)
+    return None if value != value else value
+
+
+def _number(value):
+    """NaN -> None, whole floats -> int, like the input values the API originally logged"""
+    value = float(value)
+    if value != value:
+        return None
+    return int(value) if value.is_integer() and abs(value) < 2 ** 53 else value
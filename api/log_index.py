@@ -0,0 +1,136 @@
+import bisect
+import math
+import sys
+
+# Latency histogram buckets: 0.05 ms .. ~60 s, 20 per decade (~12% wide)
+LATENCY_EDGES = [0.05 * 10 ** (i / 20) for i in range(123)]
+
+
+def latency_bucket(latency_ms):
+    return bisect.bisect_left(LATENCY_EDGES, latency_ms)
+
+
+class SeqIndex:
+    """Ascending list of the sequence numbers that match one filter value (a status, a model).
+
+    Entries are appended in sequence order and evicted oldest-first, so
+    the list only grows at the tail and shrinks at the head: both O(1)
+    amortized. Lookups by cursor are a bisect.
+    """
+
+    def __init__(self):
+        self._seqs = []
+        self._start = 0
+
+    def __len__(self):
+        return len(self._seqs) - self._start
+
+    def append(self, seq):
+        self._seqs.append(seq)
+
+    def evict(self, seq):
+        """Drop `seq` if it is the oldest entry (entries leave the log in sequence order)"""
+        if self._start < len(self._seqs) and self._seqs[self._start] == seq:
+            self._start += 1
+            if self._start > 1024 and self._start * 2 > len(self._seqs):
+                del self._seqs[:self._start]
+                self._start = 0
+
+    def after(self, seq, limit):
+        """Up to `limit` sequence numbers greater than `seq`, oldest first"""
+        i = bisect.bisect_right(self._seqs, seq, lo=self._start)
+        return self._seqs[i:i + limit]
+
+    def before(self, seq, limit):
+        """Up to `limit` sequence numbers smaller than `seq`, newest first"""
+        i = bisect.bisect_left(self._seqs, seq, lo=self._start)
+        return self._seqs[max(self._start, i - limit):i][::-1]
+
+    def nbytes(self):
+        """Size of the list itself (8 B per slot); the int objects are shared with the log"""
+        return sys.getsizeof(self._seqs)
+
+    def __contains__(self, seq):
+        i = bisect.bisect_left(self._seqs, seq, lo=self._start)
+        return i < len(self._seqs) and self._seqs[i] == seq
+
+
+class LogCounters:
+    """Summary counters of a prediction log, updated on every write and eviction.
+
+    Tracks totals per status and per model plus a latency histogram (count,
+    sum and bucket counts), so /logs never scans the log to summarize it.
+    The same counters can be stored as flat key/value pairs (`items()` /
+    `from_items()`), which is how the SQLite log store keeps them.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.status = {}
+        self.model = {}
+        self.latency_count = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_EDGES) + 1)
+
+    def add(self, status, model_used, latency_ms=None, sign=1):
+        self.total += sign
+        self.status[status] = self.status.get(status, 0) + sign
+        self.model[model_used] = self.model.get(model_used, 0) + sign
+        if latency_ms is not None and not math.isnan(latency_ms):
+            self.latency_count += sign
+            self.latency_sum += sign * latency_ms
+            self.latency_buckets[latency_bucket(latency_ms)] += sign
+
+    def items(self):
+        items = {"total": self.total, "latency_count": self.latency_count, "latency_sum": self.latency_sum}
+        items.update({f"status:{k}": v for k, v in self.status.items()})
+        items.update({f"model:{k}": v for k, v in self.model.items()})
+        items.update({f"latency_bucket:{i}": v for i, v in enumerate(self.latency_buckets) if v})
+        return items
+
+    @classmethod
+    def from_items(cls, items):
+        counters = cls()
+        for key, value in items:
+            if key == "total":
+                counters.total = int(value)
+            elif key == "latency_count":
+                counters.latency_count = int(value)
+            elif key == "latency_sum":
+                counters.latency_sum = value
+            elif key.startswith("status:"):
+                counters.status[key[7:]] = int(value)
+            elif key.startswith("model:"):
+                counters.model[key[6:]] = int(value)
+            elif key.startswith("latency_bucket:"):
+                counters.latency_buckets[int(key[15:])] = int(value)
+        return counters
+
+    def latency_percentile(self, q):
+        """Upper edge of the bucket holding the q-th percentile (ms)"""
+        if self.latency_count <= 0:
+            return None
+        rank = q / 100 * self.latency_count
+        seen = 0
+        for i, count in enumerate(self.latency_buckets):
+            seen += count
+            if seen >= rank and count:
+                return round(LATENCY_EDGES[min(i, len(LATENCY_EDGES) - 1)], 3)
+        return round(LATENCY_EDGES[-1], 3)
+
+    def summary(self):
+        success = self.status.get("success", 0)
+        return {
+            "total_requests": self.total,
+            "success_count": success,
+            "error_count": self.total - success,
+            "success_rate": round(success / self.total * 100, 2) if self.total > 0 else 0,
+            "by_model": {name: count for name, count in self.model.items() if count},
+            "latency_ms": {
+                "count": self.latency_count,
+                "mean": round(self.latency_sum / self.latency_count, 3) if self.latency_count > 0 else None,
+                "p50": self.latency_percentile(50),
+                "p95": self.latency_percentile(95),
+                "p99": self.latency_percentile(99)
+            }
+        }
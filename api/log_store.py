@@ -0,0 +1,335 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from leader import LeaderLock
+from log_index import LogCounters
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    input TEXT,
+    prediction REAL,
+    status TEXT NOT NULL,
+    error TEXT,
+    model_used TEXT,
+    details TEXT,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (ts);
+CREATE INDEX IF NOT EXISTS idx_predictions_status ON predictions (status, id);
+CREATE INDEX IF NOT EXISTS idx_predictions_model ON predictions (model_used, id);
+CREATE TABLE IF NOT EXISTS log_counters (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+COLUMNS = "id, timestamp, input, prediction, status, error, model_used, details, latency_ms"
+
+INSERT_ROW = (
+    "INSERT INTO predictions (ts, timestamp, input, prediction, status, error, model_used, details, latency_ms) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+UPSERT_COUNTER = (
+    "INSERT INTO log_counters (key, value) VALUES (?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value"
+)
+
+WIB = timezone(timedelta(hours=7))
+
+
+class LogStore:
+    """Persistent prediction log in SQLite (WAL mode) with a single background writer.
+
+    `append()` only puts the entry on an in-memory queue, so logging never
+    waits for the disk. The writer thread drains the queue in batches of up
+    to `batch_size` rows per transaction, at least every `flush_interval`
+    seconds, and periodically enforces retention (`max_rows`, `max_age_days`).
+    With `shared=True` (several processes writing the same file) only the
+    process holding `<path>.retention.lock` enforces retention.
+    Readers use their own connections; WAL lets them run concurrently with
+    the writer and with other processes sharing the same file.
+
+    Summary counters (LogCounters) live in the `log_counters` table and are
+    updated in the same transaction as the rows they count, so /logs reads
+    them with one small query instead of aggregating the table.
+    """
+
+    def __init__(self, path, batch_size=1000, flush_interval=0.5, max_rows=1000000,
+                 max_age_days=30, retention_interval=60, max_queue=100000, shared=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self.retention_interval = retention_interval
+        self.retention_lock = LeaderLock(f"{path}.retention.lock") if shared else None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        self._migrate(conn)
+        conn.close()
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._local = threading.local()
+        self._writer = None
+        # Row ids of entries that may still be updated (async shadow results), by entry seq
+        self._tracked = OrderedDict()
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.deleted = 0
+        self.last_batch_ms = 0.0
+
+    def start(self):
+        """Start the writer thread (in the process that serves requests: threads do not survive fork())"""
+        if self._writer is not None:
+            return
+        # Connections opened before a fork must not be reused by the child
+        self._local = threading.local()
+        self._writer = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _migrate(self, conn):
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(predictions)")]
+        if columns and "latency_ms" not in columns:
+            conn.execute("ALTER TABLE predictions ADD COLUMN latency_ms REAL")
+        conn.executescript(SCHEMA)
+        with conn:
+            (has_counters,) = conn.execute("SELECT COUNT(*) FROM log_counters").fetchone()
+            (has_rows,) = conn.execute("SELECT COUNT(*) FROM (SELECT 1 FROM predictions LIMIT 1)").fetchone()
+            if has_rows and not has_counters:
+                # Store created before the counters existed: count it once
+                counters = LogCounters()
+                for status, model_used, latency_ms in conn.execute("SELECT status, model_used, latency_ms FROM predictions"):
+                    counters.add(status, model_used, latency_ms)
+                conn.executemany(UPSERT_COUNTER, counters.items().items())
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ----- writing -----
+
+    def append(self, seq, ts, input_data, prediction, status, error_msg, model_used, details, track=False, latency_ms=None):
+        """Queue a log entry for writing; never blocks. With `track=True` its details can be updated later.
+
+        Serialization (JSON, timestamp formatting) happens on the writer thread.
+        """
+        try:
+            self._queue.put_nowait(("insert", seq, track, (ts, input_data, prediction, status, error_msg, model_used, details, latency_ms)))
+        except queue.Full:
+            self.dropped += 1
+
+    def append_many(self, ts, entries):
+        """Queue a batch of (input_data, prediction, status, error_msg, model_used, latency_ms)
+        entries logged at `ts` as one queue item, written in one transaction"""
+        try:
+            self._queue.put_nowait(("insert_many", None, False, (ts, entries)))
+        except queue.Full:
+            self.dropped += len(entries)
+            print(f"Log store queue full, dropped {len(entries)} batch entries")
+
+    def update_details(self, seq, details):
+        """Queue a rewrite of a tracked entry's `details` (e.g. a late shadow prediction)"""
+        try:
+            self._queue.put_nowait(("update", seq, False, details))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is written"""
+        done = threading.Event()
+        self._queue.put(("flush", None, False, done))
+        done.wait(timeout)
+
+    def _run(self):
+        conn = self._connect()
+        last_retention = 0.0
+        while True:
+            try:
+                ops = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                ops = []
+            while ops and len(ops) < self.batch_size:
+                try:
+                    ops.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if ops:
+                    self._write(conn, ops)
+                if time.time() - last_retention >= self.retention_interval:
+                    last_retention = time.time()
+                    self._apply_retention(conn)
+            except Exception as e:
+                print(f"Log store write failed: {e}")
+            finally:
+                for op, _, _, payload in ops:
+                    if op == "flush":
+                        payload.set()
+
+    def _write(self, conn, ops):
+        start = time.perf_counter()
+        inserted = 0
+        counters = LogCounters()
+        with conn:
+            for op, seq, track, payload in ops:
+                if op == "insert":
+                    ts, input_data, prediction, status, error_msg, model_used, details, latency_ms = payload
+                    cur = conn.execute(INSERT_ROW, self._row(ts, input_data, prediction, status, error_msg, model_used, details, latency_ms))
+                    counters.add(status, model_used, latency_ms)
+                    inserted += 1
+                    if track:
+                        self._tracked[seq] = cur.lastrowid
+                        while len(self._tracked) > 10000:
+                            self._tracked.popitem(last=False)
+                elif op == "insert_many":
+                    ts, entries = payload
+                    conn.executemany(INSERT_ROW, [
+                        self._row(ts, input_data, prediction, status, error_msg, model_used, None, latency_ms)
+                        for input_data, prediction, status, error_msg, model_used, latency_ms in entries
+                    ])
+                    for _, _, status, _, model_used, latency_ms in entries:
+                        counters.add(status, model_used, latency_ms)
+                    inserted += len(entries)
+                elif op == "update":
+                    rowid = self._tracked.pop(seq, None)
+                    if rowid is not None:
+                        conn.execute("UPDATE predictions SET details = ? WHERE id = ?", (json.dumps(payload), rowid))
+            if inserted:
+                conn.executemany(UPSERT_COUNTER, counters.items().items())
+        self.written += inserted
+        self.batches += 1
+        self.last_batch_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    @staticmethod
+    def _row(ts, input_data, prediction, status, error_msg, model_used, details, latency_ms):
+        return (
+            ts,
+            datetime.fromtimestamp(ts, WIB).strftime("%Y-%m-%d %H:%M:%S"),
+            json.dumps(input_data, default=str),
+            prediction,
+            status,
+            error_msg,
+            model_used,
+            json.dumps(details) if details is not None else None,
+            latency_ms
+        )
+
+    def _apply_retention(self, conn):
+        if self.retention_lock is not None and not self.retention_lock.acquire():
+            return
+        # One delete per condition: each one is a range scan on a single index
+        # (the primary key, then idx_predictions_ts), where an OR scans the table
+        conditions = []
+        if self.max_rows:
+            (last_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM predictions").fetchone()
+            conditions.append(("id <= ?", last_id - self.max_rows))
+        if self.max_age_days:
+            conditions.append(("ts < ?", time.time() - self.max_age_days * 86400))
+        for where, param in conditions:
+            with conn:
+                # Take the expired rows out of the counters before deleting them
+                removed = LogCounters()
+                for status, model_used, latency_ms in conn.execute(
+                    f"SELECT status, model_used, latency_ms FROM predictions WHERE {where}", (param,)
+                ):
+                    removed.add(status, model_used, latency_ms, sign=-1)
+                deleted = conn.execute(f"DELETE FROM predictions WHERE {where}", (param,)).rowcount
+                if deleted:
+                    conn.executemany(UPSERT_COUNTER, removed.items().items())
+            self.deleted += deleted
+
+    # ----- reading -----
+
+    def query(self, limit=50, status=None, model=None, after=None, since=None):
+        """Log entries as /logs dicts, with the same semantics as LogBuffer.query().
+
+        Without a cursor: newest `limit` first. With `after` (a seq/row id)
+        and/or `since` (epoch seconds): entries past the cursor, oldest first.
+        Filters use the (status, id) / (model_used, id) / ts indexes.
+        """
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if model:
+            conditions.append("model_used = ?")
+            params.append(model)
+        if after is not None:
+            conditions.append("id > ?")
+            params.append(after)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "ASC" if after is not None or since is not None else "DESC"
+        rows = self._reader().execute(
+            f"SELECT {COLUMNS} FROM predictions {where} ORDER BY id {order} LIMIT ?", params + [limit]
+        ).fetchall()
+        return [self._to_entry(row) for row in rows]
+
+    def recent(self, limit=50, status=None):
+        """Most recent entries first, optionally only one status"""
+        return self.query(limit, status)
+
+    def success_inputs(self, after=0, since=None, limit=10000):
+        """(id, ts, input dict) of successful entries with id > `after` (and ts >= `since`), oldest first"""
+        query = "SELECT id, ts, input FROM predictions WHERE status = 'success' AND id > ?"
+        params = [after]
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(since)
+        rows = self._reader().execute(query + " ORDER BY id LIMIT ?", params + [limit]).fetchall()
+        return [(rowid, ts, json.loads(input_json) if input_json else {}) for rowid, ts, input_json in rows]
+
+    def last_id(self):
+        (last_id,) = self._reader().execute("SELECT COALESCE(MAX(id), 0) FROM predictions").fetchone()
+        return last_id
+
+    def counters(self):
+        return LogCounters.from_items(self._reader().execute("SELECT key, value FROM log_counters").fetchall())
+
+    @staticmethod
+    def _to_entry(row):
+        rowid, timestamp, input_json, prediction, status, error, model_used, details_json, latency_ms = row
+        return {
+            "seq": rowid,
+            "timestamp": timestamp,
+            "input": json.loads(input_json) if input_json else {},
+            "prediction": prediction,
+            "status": status,
+            "error": error,
+            "model_used": model_used,
+            "details": json.loads(details_json) if details_json else None,
+            "latency_ms": latency_ms
+        }
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "queue_depth": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "deleted_by_retention": self.deleted,
+            "last_batch_ms": self.last_batch_ms
+        }
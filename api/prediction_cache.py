@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Bounded LRU cache of model outputs with a time-to-live.
+
+    Keys are (feature tuple, model version): a reload produces a new
+    version, so entries of the previous models are never served again and
+    simply age out. At most `capacity` entries are kept; the least recently
+    used one is evicted first, and entries older than `ttl` seconds are
+    treated as misses.
+    """
+
+    def __init__(self, capacity=10000, ttl=3600):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._inserts = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key):
+        """Cached value for `key`, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl <= 0 or now - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            self._inserts += 1
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "ttl_s": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                # Share of inserted entries that were pushed out by capacity
+                "eviction_rate": round(self._evictions / self._inserts, 4) if self._inserts else 0
+            }
@@ -0,0 +1,96 @@
+import json
+import os
+import datetime
+import numpy as np
+
+FEATURES = ["LB", "LT", "KT", "KM", "GRS"]
+
+# Rows kept for the drift tests. Larger than Evidently's 1000-row cut-over so the
+# stattest choice is the same as when running on the full training set.
+RESERVOIR_SIZE = 5000
+N_BINS = 20
+N_QUANTILES = 101
+
+ARTIFACT_NAME = "reference_stats.json"
+
+
+def reservoir_sample(values, k, seed=42, chunk_size=65536):
+    """Uniform sample of k rows of the in-memory array `values` (Algorithm R).
+
+    Rows after the first k are visited in chunks of `chunk_size`, which only
+    bounds the size of the random slot draws; `values` is not streamed.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir = np.asarray(values[:k]).copy()
+    seen = len(reservoir)
+    for start in range(k, len(values), chunk_size):
+        chunk = np.asarray(values[start:start + chunk_size])
+        # Row number i (0-based) replaces slot j when j = randint(0, i) < k
+        slots = rng.integers(0, np.arange(seen, seen + len(chunk)) + 1)
+        for pos in np.flatnonzero(slots < k):
+            reservoir[slots[pos]] = chunk[pos]
+        seen += len(chunk)
+    return reservoir
+
+
+def build_reference(df, features=FEATURES, sample_size=RESERVOIR_SIZE, n_bins=N_BINS, n_quantiles=N_QUANTILES, seed=42):
+    """Summarize the training features into a compact, JSON-serializable reference.
+
+    Holds per-feature summary stats, fixed-bin histograms, a quantile sketch
+    and a reservoir sample of whole rows for the drift tests, so the API
+    never has to read the training set itself.
+    """
+    data = df[features].dropna().to_numpy(dtype=np.float64)
+    probs = np.linspace(0, 1, n_quantiles)
+
+    per_feature = {}
+    for i, feature in enumerate(features):
+        col = data[:, i]
+        lo, hi = (float(col.min()), float(col.max())) if len(col) else (0.0, 1.0)
+        if hi <= lo:
+            hi = lo + 1.0
+        counts, edges = np.histogram(col, bins=n_bins, range=(lo, hi))
+        per_feature[feature] = {
+            "mean": float(col.mean()) if len(col) else 0.0,
+            "std": float(col.std(ddof=1)) if len(col) > 1 else 0.0,
+            "min": float(col.min()) if len(col) else 0.0,
+            "max": float(col.max()) if len(col) else 0.0,
+            "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+            "quantiles": np.quantile(col, probs).tolist() if len(col) else []
+        }
+
+    sample = reservoir_sample(data, sample_size, seed=seed)
+    return {
+        "features": list(features),
+        "count": int(len(data)),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "quantile_probs": probs.tolist(),
+        "stats": per_feature,
+        "sample": {feature: sample[:, i].tolist() for i, feature in enumerate(features)}
+    }
+
+
+def save_reference(reference, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(reference, f)
+    # Atomic replace so a running API never reads a half-written artifact
+    os.replace(tmp_path, path)
+
+
+def load_reference(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def summary_stats(reference):
+    """The {mean,std,min,max,count} layout used by the drift module"""
+    stats = reference["stats"]
+    return {
+        "mean": {f: s["mean"] for f, s in stats.items()},
+        "std": {f: s["std"] for f, s in stats.items()},
+        "min": {f: s["min"] for f, s in stats.items()},
+        "max": {f: s["max"] for f, s in stats.items()},
+        "count": reference["count"]
+    }
@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+import util as utils
+from compiled_models import compile_model, check_parity, ParityError, CompiledLinearModel, CompiledForestModel
+
+MODEL1_NAME = "Model 1 (Linear Regression)"
+MODEL2_NAME = "Model 2 (Random Forest)"
+
+
+class ModelSet:
+    """One loaded generation of models plus the decision which of them is active.
+
+    Instances are never mutated after construction; request handlers grab
+    the current set once and use it for the whole request.
+    """
+
+    def __init__(self, model1, model2, model1_metadata, model2_metadata, metrics, version=None, signature=None):
+        self.version = version
+        # Artifact signature the set was loaded from (see ModelRegistry.artifact_signature)
+        self.signature = signature
+        self.loaded_at = time.time()
+        self.model1 = model1
+        self.model2 = model2
+        self.model1_metadata = model1_metadata
+        self.model2_metadata = model2_metadata
+        self.metrics = metrics
+
+        # Decision Logic: Use the model with higher accuracy
+        model1_r2 = model1_metadata.get("r2", 0)
+        model2_r2 = model2_metadata.get("r2", 0)
+        self.use_model2 = False
+        if model2 and model1:
+            self.use_model2 = model2_r2 > model1_r2
+        elif model2 and not model1:
+            self.use_model2 = True
+
+        self.active_name = MODEL2_NAME if self.use_model2 else MODEL1_NAME
+        self.active_key = "model2" if self.use_model2 else "model1"
+        self.shadow_key = "model1" if self.use_model2 else "model2"
+        self.active_model = model2 if self.use_model2 else model1
+        self.shadow_model = model1 if self.use_model2 else model2
+
+    def predict_active(self, row):
+        """Score one feature row (config order) with the active model"""
+        return self.active_model.predict_one(row)
+
+    def predict_shadow(self, row):
+        """Score one feature row with the non-active model"""
+        return self.shadow_model.predict_one(row)
+
+    def describe(self):
+        model1_r2 = self.model1_metadata.get("r2", 0)
+        model2_r2 = self.model2_metadata.get("r2", 0)
+        if self.model1 and self.model2:
+            if self.use_model2:
+                return f"Choosing Model 2 (R2: {model2_r2:.4f}) over Model 1 (R2: {model1_r2:.4f})"
+            return f"Choosing Model 1 (R2: {model1_r2:.4f}) over Model 2 (R2: {model2_r2:.4f})"
+        if self.model2:
+            return "Model 1 missing, using Model 2"
+        if self.model1:
+            return "Model 2 missing, using Model 1"
+        return "No models loaded"
+
+
+class ModelRegistry:
+    """Loads the model artifacts from `models_dir` and decides the active model once per load.
+
+    `reload()` builds and warms up a complete new ModelSet before replacing
+    `current` with a single reference assignment, so in-flight requests
+    keep using the set they started with and never see a half-loaded one.
+
+    With several processes (gunicorn workers) a reload in one process is
+    passed on to the others through `signal_path`: `request_reload()`
+    touches that file, and it is part of the artifact signature every
+    process's watcher polls.
+    """
+
+    ARTIFACTS = ["model_1.pkl", "model_2.pkl", "production_model.pkl", "metrics.json"]
+
+    def __init__(self, models_dir, config, backend="compiled", signal_path=None):
+        self.models_dir = models_dir
+        self.signal_path = signal_path
+        self.config = config
+        self.backend = backend
+        self.current = ModelSet(None, None, {}, {}, None)
+        self.last_reload = None
+
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
+        self._watcher = None
+
+    def load(self):
+        """Load models and metrics from disk and make them the current set"""
+        self.current = self._build()
+        print(self.current.describe())
+        return self.current
+
+    def artifact_signature(self):
+        """(name, mtime, size) of every model artifact present on disk"""
+        signature = []
+        for name in self.ARTIFACTS:
+            path = os.path.join(self.models_dir, name)
+            if os.path.exists(path):
+                st = os.stat(path)
+                signature.append((name, st.st_mtime_ns, st.st_size))
+        if self.signal_path and os.path.exists(self.signal_path):
+            st = os.stat(self.signal_path)
+            signature.append(("reload-signal", st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def request_reload(self):
+        """Ask every process watching `signal_path` to reload (its watcher sees a new signature)"""
+        os.makedirs(os.path.dirname(self.signal_path), exist_ok=True)
+        with open(self.signal_path, "w") as f:
+            f.write(f"{time.time()} {os.getpid()}\n")
+
+    def _version(self, signature):
+        return hashlib.sha1(repr(signature).encode()).hexdigest()[:12]
+
+    def reload(self, wait=False):
+        """Load new artifacts in a background thread and swap them in when ready.
+
+        Returns False if a reload is already running. With `wait=True` the
+        call blocks until the reload has finished.
+        """
+        with self._reload_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+            self._reload_thread = threading.Thread(target=self._reload, name="model-reload", daemon=True)
+            self._reload_thread.start()
+            thread = self._reload_thread
+        if wait:
+            thread.join()
+        return True
+
+    def is_reloading(self):
+        thread = self._reload_thread
+        return thread is not None and thread.is_alive()
+
+    def _reload(self):
+        old = self.current
+        started = time.time()
+        report = {
+            "status": "running",
+            "started_at": started,
+            "old_version": old.version,
+            "new_version": None,
+            "trained_at": None,
+            "duration_ms": None,
+            "error": None
+        }
+        self.last_reload = report
+        try:
+            new = self._build(strict=True)
+            self._warm_up(new)
+            # Atomic swap: a single reference assignment
+            self.current = new
+            report["status"] = "success"
+            report["new_version"] = new.version
+            report["trained_at"] = (new.metrics or {}).get("last_updated")
+            print(f"Models reloaded: {old.version} -> {new.version}. {new.describe()}")
+        except Exception as e:
+            report["status"] = "error"
+            report["error"] = str(e)
+            print(f"Model reload failed, keeping version {old.version}: {e}")
+        report["duration_ms"] = round((time.time() - started) * 1000, 1)
+
+    def _warm_up(self, models):
+        """Run a dummy prediction through every model so the first real request is not a cold one"""
+        if models.model1 is None and models.model2 is None:
+            raise RuntimeError("No models found")
+        row = [self.config[f"rentang_{p}"][0] for p in self.config['prediktor']]
+        for model in (models.model1, models.model2):
+            if model is not None:
+                model.predict_one(row)
+                model.predict([row, row])
+
+    def start_watcher(self, interval):
+        """Poll the artifact mtimes every `interval` seconds and reload when they change"""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            known = self.artifact_signature()
+            while True:
+                time.sleep(interval)
+                seen = self.artifact_signature()
+                if seen == known or seen == self.current.signature:
+                    # Nothing new, or this process already reloaded it (POST /admin/reload)
+                    known = seen
+                    continue
+                # Wait until the writer is done: the files must be stable for one interval
+                time.sleep(interval)
+                if self.artifact_signature() != seen:
+                    continue
+                print("Model artifacts changed on disk, reloading...")
+                # Only a successful swap consumes the change; a failed one (a pickle
+                # that does not load, or a compiled model failing the parity check,
+                # e.g. while still being written) is retried next tick
+                if self.reload(wait=True) and self.last_reload["status"] == "success":
+                    known = seen
+
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+        print(f"Watching {self.models_dir} for new models every {interval}s.")
+
+    def _build(self, strict=False):
+        """Load a ModelSet from disk.
+
+        With `strict=True` load errors and parity failures of compiled models
+        are raised instead of logged / served through the sklearn fallback.
+        """
+        signature = self.artifact_signature()
+        model1 = None
+        model2 = None
+        model1_metadata = {}
+        model2_metadata = {}
+        metrics_data = None
+
+        try:
+            model1_path = os.path.join(self.models_dir, "model_1.pkl")
+            model2_path = os.path.join(self.models_dir, "model_2.pkl")
+
+            if os.path.exists(model1_path):
+                model1 = utils.pickle_load(model1_path)
+                print("Model 1 (Linear Regression) loaded.")
+
+            if os.path.exists(model2_path):
+                model2 = utils.pickle_load(model2_path)
+                print("Model 2 (Random Forest) loaded.")
+
+            # Also load the old production_model if model 1 is missing, for backward compatibility
+            if model1 is None:
+                prod_path = os.path.join(self.models_dir, "production_model.pkl")
+                if os.path.exists(prod_path):
+                    model1 = utils.pickle_load(prod_path)
+                    print("Legacy Production Model loaded as Model 1.")
+
+            # Load Metrics to determine accuracy
+            metrics_path = os.path.join(self.models_dir, "metrics.json")
+            if os.path.exists(metrics_path):
+                with open(metrics_path, 'r') as f:
+                    metrics_data = json.load(f)
+                # Parse structure: could be old (flat) or new (nested)
+                if "model1" in metrics_data:
+                    model1_metadata = metrics_data["model1"]
+                    model2_metadata = metrics_data.get("model2", {})
+                else:
+                    # Old format
+                    model1_metadata = {"r2": metrics_data.get("r2", 0), "mape": metrics_data.get("mape", 0)}
+                    model2_metadata = {}
+
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Error loading models: {e}")
+
+        return ModelSet(
+            self._prepare(model1, strict),
+            self._prepare(model2, strict),
+            model1_metadata,
+            model2_metadata,
+            metrics_data,
+            version=self._version(signature),
+            signature=signature
+        )
+
+    def _parity_sample(self, n=256, seed=0):
+        """Random feature rows inside the rentang_* ranges, used to verify compiled models"""
+        rng = np.random.default_rng(seed)
+        return np.column_stack([
+            rng.integers(self.config[f"rentang_{p}"][0], self.config[f"rentang_{p}"][1] + 1, size=n)
+            for p in self.config['prediktor']
+        ])
+
+    def _prepare(self, model, strict=False):
+        """Compile a loaded model and verify it against sklearn; falls back to the DataFrame path.
+
+        With `strict=True` a parity failure is raised instead: the artifact
+        may be half-written, and a reload should rather fail and be retried.
+        """
+        predictors = self.config['prediktor']
+        try:
+            served = compile_model(model, predictors, self.backend)
+            if isinstance(served, (CompiledLinearModel, CompiledForestModel)):
+                max_err = check_parity(served, self._parity_sample())
+                print(f"{type(served).__name__} parity OK (max rel err {max_err:.2g}).")
+            if isinstance(served, CompiledForestModel):
+                fp = served.footprint()
+                print(f"Forest footprint: compiled {fp['compiled_bytes'] / 1e6:.1f} MB vs sklearn pickle {fp['sklearn_pickle_bytes'] / 1e6:.1f} MB")
+            return served
+        except ValueError as e:
+            if strict and isinstance(e, ParityError):
+                raise
+            print(f"Cannot compile {type(model).__name__}, using sklearn backend: {e}")
+            return compile_model(model, predictors, "sklearn")
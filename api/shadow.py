@@ -0,0 +1,77 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ShadowScorer:
+    """Score the non-active (shadow) model off the request thread.
+
+    Jobs run on a small thread pool. At most `max_queue` jobs may be
+    outstanding; beyond that new jobs are dropped rather than queued, so a
+    slow shadow model can never build up unbounded backlog or memory.
+    """
+
+    def __init__(self, max_workers=1, max_queue=1000):
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shadow")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._dropped = 0
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+        self._total_lag = 0.0
+
+    def submit(self, score_fn, on_done):
+        """Run `score_fn()` in the background and pass its result and lag (s) to `on_done`.
+
+        Returns False when the queue is full and the job was dropped.
+        """
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self._dropped += 1
+                return False
+            self._pending += 1
+            self._submitted += 1
+
+        enqueued = time.perf_counter()
+
+        def job():
+            try:
+                result = score_fn()
+                lag = time.perf_counter() - enqueued
+                on_done(result, lag)
+                self._record(lag)
+            except Exception as e:
+                print(f"Shadow scoring failed: {e}")
+                with self._lock:
+                    self._failed += 1
+            finally:
+                with self._lock:
+                    self._pending -= 1
+
+        self._executor.submit(job)
+        return True
+
+    def _record(self, lag):
+        with self._lock:
+            self._completed += 1
+            self._last_lag = lag
+            self._max_lag = max(self._max_lag, lag)
+            self._total_lag += lag
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._pending,
+                "max_queue": self.max_queue,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "last_lag_ms": round(self._last_lag * 1000, 2),
+                "avg_lag_ms": round(self._total_lag / self._completed * 1000, 2) if self._completed else 0,
+                "max_lag_ms": round(self._max_lag * 1000, 2)
+            }
@@ -46,4 +46,12 @@ def get_model_path(config):
     
     # If path starts with 'models/', and we are in BASE_DIR (which has 'models/'), join them.
     full_path = os.path.join(BASE_DIR, model_rel_path)
-    return full_path
\ No newline at end of file
+    return full_path
+
+def get_data_dir():
+    # In Docker: /app/data (mounted volume next to util.py)
+    # Locally: ROOT/data
+    local_data = os.path.join(BASE_DIR, "data")
+    if os.path.exists(local_data):
+        return local_data
+    return os.path.join(os.path.dirname(BASE_DIR), "data")
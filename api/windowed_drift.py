@@ -0,0 +1,222 @@
+import bisect
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from reference_stats import FEATURES
+from streaming_drift import FEATURE_NAMES, PSI_EPS
+
+# Window name -> (bucket size in seconds, number of buckets)
+WINDOWS = {
+    "1h": (300, 12),
+    "24h": (3600, 24),
+    "7d": (3600, 168)
+}
+
+# PSI rule of thumb: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 significant shift
+PSI_MEDIUM = 0.1
+PSI_HIGH = 0.25
+
+MIN_SAMPLES = 5
+
+WIB = timezone(timedelta(hours=7))
+
+
+class Sketch:
+    """Mergeable summary of the predictions in one time bucket.
+
+    Per feature: counts on the reference histogram bins (outer bins
+    open-ended) plus sum and sum of squares. Two sketches merge by adding
+    their fields, so any window is assembled from its buckets without
+    keeping the raw requests.
+    """
+
+    __slots__ = ("count", "sums", "sumsq", "bins")
+
+    def __init__(self, n_bins):
+        self.count = 0
+        self.sums = [0.0] * len(FEATURES)
+        self.sumsq = [0.0] * len(FEATURES)
+        self.bins = [[0] * n_bins for _ in FEATURES]
+
+    def add(self, values, bin_indices):
+        self.count += 1
+        for i, v in enumerate(values):
+            self.sums[i] += v
+            self.sumsq[i] += v * v
+            self.bins[i][bin_indices[i]] += 1
+
+
+class WindowedDrift:
+    """Drift over wall-clock windows (1h, 24h, 7d) from per-bucket sketches.
+
+    Every successful prediction is added to the current 5-minute and
+    1-hour bucket. A window is the merge of its most recent buckets, so it
+    slides at bucket resolution (the newest bucket is partial); each bucket
+    on its own is a tumbling window and feeds the time series. Buckets
+    older than the longest window using their size are dropped.
+    """
+
+    def __init__(self, reference, windows=WINDOWS):
+        self.windows = windows
+        self.reference_size = reference["count"]
+        stats = reference["stats"]
+        self.inner_edges = {f: stats[f]["histogram"]["edges"][1:-1] for f in FEATURES}
+        self.n_bins = len(stats[FEATURES[0]]["histogram"]["counts"])
+        self.ref_props = {}
+        self.ref_cdf = {}
+        for f in FEATURES:
+            counts = np.asarray(stats[f]["histogram"]["counts"], dtype=np.float64)
+            props = counts / max(counts.sum(), 1)
+            self.ref_props[f] = np.maximum(props, PSI_EPS)
+            self.ref_cdf[f] = np.cumsum(props)
+        self.ref_mean = {f: stats[f]["mean"] for f in FEATURES}
+        self.ref_std = {f: stats[f]["std"] for f in FEATURES}
+
+        # Bucket size -> number of buckets to keep
+        self.retention = {}
+        for size, n in windows.values():
+            self.retention[size] = max(self.retention.get(size, 0), n)
+        # Bucket size -> {bucket index: Sketch}
+        self._buckets = {size: {} for size in self.retention}
+        self._lock = threading.Lock()
+
+    def add(self, values, ts=None):
+        """Add one successful prediction's feature values (FEATURES order)"""
+        ts = time.time() if ts is None else ts
+        bin_indices = [bisect.bisect_right(self.inner_edges[f], v) for f, v in zip(FEATURES, values)]
+        with self._lock:
+            for size, buckets in self._buckets.items():
+                key = int(ts // size)
+                sketch = buckets.get(key)
+                if sketch is None:
+                    sketch = buckets[key] = Sketch(self.n_bins)
+                    self._prune(size, key)
+                sketch.add(values, bin_indices)
+
+    def _prune(self, size, newest):
+        buckets = self._buckets[size]
+        oldest = newest - self.retention[size] + 1
+        for key in [k for k in buckets if k < oldest]:
+            del buckets[key]
+
+    def _window_buckets(self, window, now):
+        size, n = self.windows[window]
+        newest = int(now // size)
+        return size, newest - n + 1, newest
+
+    def drift(self, window, now=None):
+        """Drift report for the last `window` in the /drift schema, or None below MIN_SAMPLES"""
+        now = time.time() if now is None else now
+        size, first, last = self._window_buckets(window, now)
+        with self._lock:
+            sketches = [s for k, s in self._buckets[size].items() if first <= k <= last]
+            merged = self._merge(sketches)
+        if merged is None or merged["count"] < MIN_SAMPLES:
+            return None
+        report = self._report(merged)
+        report.update({
+            "window": window,
+            "window_start": self._format(first * size),
+            "window_end": self._format(now),
+            "buckets": len(sketches)
+        })
+        return report
+
+    def timeseries(self, window, now=None):
+        """One tumbling-window point per bucket of `window`, oldest first (empty buckets included)"""
+        now = time.time() if now is None else now
+        size, first, last = self._window_buckets(window, now)
+        with self._lock:
+            sketches = {k: self._merge([s]) for k, s in self._buckets[size].items() if first <= k <= last}
+
+        points = []
+        for key in range(first, last + 1):
+            merged = sketches.get(key)
+            point = {"start": self._format(key * size), "count": merged["count"] if merged else 0}
+            if merged and merged["count"] >= MIN_SAMPLES:
+                report = self._report(merged)
+                point["overall_status"] = report["overall_status"]
+                point["psi"] = {f: d["psi"] for f, d in report["features"].items()}
+                point["current_mean"] = {f: d["current_mean"] for f, d in report["features"].items()}
+            else:
+                point["overall_status"] = None
+            points.append(point)
+        return {"window": window, "bucket_seconds": size, "points": points}
+
+    def _merge(self, sketches):
+        if not sketches:
+            return None
+        return {
+            "count": sum(s.count for s in sketches),
+            "sums": np.sum([s.sums for s in sketches], axis=0),
+            "sumsq": np.sum([s.sumsq for s in sketches], axis=0),
+            "bins": np.sum([s.bins for s in sketches], axis=0)
+        }
+
+    def _report(self, merged):
+        m = merged["count"]
+        features = {}
+        for i, f in enumerate(FEATURES):
+            props = merged["bins"][i] / m
+            actual = np.maximum(props, PSI_EPS)
+            expected = self.ref_props[f]
+            psi = float(np.sum((actual - expected) * np.log(actual / expected)))
+            # KS distance between the binned CDFs (a lower bound of the exact D)
+            ks = float(np.max(np.abs(np.cumsum(props) - self.ref_cdf[f])))
+
+            mean = merged["sums"][i] / m
+            var = (merged["sumsq"][i] - m * mean * mean) / (m - 1) if m > 1 else 0.0
+            ref_std = self.ref_std[f]
+
+            if psi >= PSI_HIGH:
+                severity = "high"
+            elif psi >= PSI_MEDIUM:
+                severity = "medium"
+            else:
+                severity = "low"
+            features[f] = {
+                "feature_name": FEATURE_NAMES.get(f, f),
+                "drift_detected": psi >= PSI_MEDIUM,
+                "drift_score": round(psi, 4),
+                "p_value": None,
+                "stattest": "PSI (binned)",
+                "severity": severity,
+                "psi": round(psi, 4),
+                "ks_binned": round(ks, 4),
+                "z_score": round(abs(mean - self.ref_mean[f]) / ref_std, 4) if ref_std > 0 else 0,
+                "reference_mean": round(self.ref_mean[f], 2),
+                "current_mean": round(float(mean), 2),
+                "reference_std": round(ref_std, 2),
+                "current_std": round(math.sqrt(max(var, 0.0)), 2)
+            }
+
+        drifted_count = sum(1 for d in features.values() if d["drift_detected"])
+        drift_share = drifted_count / len(features)
+        dataset_drift = drift_share >= 0.5
+        severities = [d["severity"] for d in features.values()]
+        if dataset_drift or drifted_count >= 3 or "high" in severities:
+            overall_status = "high"
+        elif drifted_count >= 1 or "medium" in severities:
+            overall_status = "medium"
+        else:
+            overall_status = "low"
+
+        return {
+            "overall_status": overall_status,
+            "dataset_drift": dataset_drift,
+            "drift_share": round(drift_share, 2),
+            "drifted_features_count": drifted_count,
+            "total_features": len(features),
+            "features": features,
+            "sample_size": m,
+            "reference_size": self.reference_size,
+            "method": "windowed"
+        }
+
+    @staticmethod
+    def _format(ts):
+        return datetime.fromtimestamp(ts, WIB).strftime("%Y-%m-%d %H:%M:%S")
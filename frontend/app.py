@@ -1,4 +1,7 @@
+import json
 import os
+import threading
+import time
 
 import plotly.graph_objects as go
 import requests
@@ -41,6 +44,9 @@ def login_admin(username, password):
 
 def logout():
     st.session_state.role = None
+    feed = st.session_state.pop("log_feed", None)
+    if feed:
+        feed.stop()
     st.rerun()
 
 
@@ -93,6 +99,123 @@ def get_drift():
         return None
 
 
+def get_drift_timeseries(window="24h"):
+    try:
+        response = requests.get(
+            f"{API_URL}/drift/timeseries", params={"window": window}, timeout=5
+        )
+        if response.status_code == 200:
+            data = response.json()
+            if data.get("status") == "success":
+                return data.get("data")
+        return None
+    except:
+        return None
+
+
+# -----------------------------------------------------------------------------
+# LIVE LOG FEED
+# -----------------------------------------------------------------------------
+# Seconds between local re-renders of the log section (no API request involved)
+LOG_REFRESH_SECONDS = 2
+# Each /logs/stream connection is closed by the server after this many seconds
+LOG_STREAM_TIMEOUT = 60
+# The feed stops once the log section has not read it for this long
+# (page refreshed, tab closed, session expired)
+LOG_FEED_IDLE_SECONDS = 30
+
+
+def live_fragment(run_every):
+    """st.fragment with a rerun timer, on Streamlit versions that have it"""
+    if hasattr(st, "fragment"):
+        return st.fragment(run_every=run_every)
+    return lambda fn: fn
+
+
+def _sse_events(response):
+    """JSON payloads of the `data:` fields in a Server-Sent Events response"""
+    data = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line:
+            if line.startswith("data:"):
+                data.append(line[5:].strip())
+        elif data:
+            yield json.loads("\n".join(data))
+            data = []
+
+
+class LogFeed:
+    """Subscription to /logs/stream for one dashboard session.
+
+    A background thread keeps the newest `limit` entries and the latest
+    summary up to date. After the first snapshot only new entries cross
+    the wire; on disconnect it reconnects from the last cursor. It only
+    reconnects while snapshot() is being polled, and stops for good when
+    it has not been for LOG_FEED_IDLE_SECONDS.
+    """
+
+    def __init__(self, limit=50):
+        self.limit = limit
+        self.logs = []
+        self.summary = None
+        self.cursor = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_read = time.monotonic()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _idle(self):
+        return time.monotonic() - self._last_read > LOG_FEED_IDLE_SECONDS
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._idle():
+                self.stop()
+                return
+            params = {"limit": self.limit, "timeout": LOG_STREAM_TIMEOUT}
+            if self.cursor is not None:
+                params["after"] = self.cursor
+            try:
+                # Read timeout above the server's 15 s keepalive
+                with requests.get(
+                    f"{API_URL}/logs/stream", params=params, stream=True, timeout=(5, 30)
+                ) as response:
+                    if response.status_code == 200:
+                        for data in _sse_events(response):
+                            self._apply(data)
+                            if self._stop.is_set() or self._idle():
+                                break
+            except Exception:
+                pass
+            self._stop.wait(3)
+
+    def _apply(self, data):
+        with self._lock:
+            if self.cursor is None:
+                # Initial snapshot, newest first
+                self.logs = data.get("logs", [])
+            else:
+                # Increments arrive oldest first
+                self.logs = (data.get("logs", [])[::-1] + self.logs)[: self.limit]
+            self.summary = data.get("summary", {})
+            self.cursor = data["cursor"]["next_after"]
+
+    def snapshot(self):
+        """{"summary", "logs"} like /logs, or None before the first event"""
+        with self._lock:
+            self._last_read = time.monotonic()
+            if self.summary is None:
+                return None
+            return {"summary": self.summary, "logs": list(self.logs)}
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+
 # -----------------------------------------------------------------------------
 # PAGES
 # -----------------------------------------------------------------------------
@@ -191,6 +314,86 @@ def show_user_page():
             st.info("👈 Isi formulir di kiri untuk melihat estimasi.")
 
 
+@live_fragment(run_every=LOG_REFRESH_SECONDS)
+def show_prediction_logs():
+    """Summary and latest entries from the session's log feed; re-rendered locally on a timer"""
+    feed = st.session_state.get("log_feed")
+    if feed is None or feed.stopped:
+        # First render, or the previous feed stopped after going unread
+        feed = st.session_state.log_feed = LogFeed(limit=50)
+    logs_data = feed.snapshot()
+    if logs_data is None:
+        # Stream not connected (yet): fall back to a one-off request
+        logs_data = get_logs(limit=50)
+
+    if logs_data:
+        summary = logs_data.get("summary", {})
+        logs = logs_data.get("logs", [])
+
+        # Summary metrics
+        log_col1, log_col2, log_col3, log_col4 = st.columns(4)
+        with log_col1:
+            st.metric("Total Request", summary.get("total_requests", 0))
+        with log_col2:
+            st.metric(
+                "Sukses",
+                summary.get("success_count", 0),
+                delta="✓",
+                delta_color="normal",
+            )
+        with log_col3:
+            st.metric(
+                "Error",
+                summary.get("error_count", 0),
+                delta="✗" if summary.get("error_count", 0) > 0 else None,
+                delta_color="inverse",
+            )
+        with log_col4:
+            st.metric("Success Rate", f"{summary.get('success_rate', 0):.1f}%")
+
+        # Log table
+        if logs:
+            st.markdown("#### 📜 Riwayat Prediksi Terbaru")
+
+            # Convert logs to display format
+            log_display = []
+            for log in logs[:20]:  # Show last 20
+                input_data = log.get("input", {})
+                # Get model used if available
+                model_used = log.get("model_used", "Model 1")
+                # Shorten names for table
+                if "Linear" in model_used:
+                    model_used = "Linear Reg."
+                if "Forest" in model_used:
+                    model_used = "Random Forest"
+
+                log_display.append(
+                    {
+                        "Waktu": log.get("timestamp", "-"),
+                        "Model": model_used,
+                        "LB": input_data.get("LB", "-"),
+                        "LT": input_data.get("LT", "-"),
+                        "Prediksi (Rp)": f"{log.get('prediction', 0):,.0f}"
+                        if log.get("prediction")
+                        else "-",
+                        "Status": "✅" if log.get("status") == "success" else "❌",
+                    }
+                )
+
+            import pandas as pd
+
+            df_logs = pd.DataFrame(log_display)
+            st.dataframe(df_logs, use_container_width=True, hide_index=True)
+        else:
+            st.info(
+                "Belum ada log prediksi. Lakukan prediksi dari halaman User terlebih dahulu."
+            )
+    else:
+        st.warning(
+            "⚠️ Tidak dapat mengambil data log. Pastikan API berjalan dengan benar."
+        )
+
+
 def show_admin_page():
     st.markdown(
         '<div class="main-header">📊 Admin Dashboard</div>', unsafe_allow_html=True
@@ -264,74 +467,7 @@ def show_admin_page():
         st.markdown("---")
         st.markdown("### 📋 Monitoring Log Prediksi")
 
-        logs_data = get_logs(limit=50)
-
-        if logs_data:
-            summary = logs_data.get("summary", {})
-            logs = logs_data.get("logs", [])
-
-            # Summary metrics
-            log_col1, log_col2, log_col3, log_col4 = st.columns(4)
-            with log_col1:
-                st.metric("Total Request", summary.get("total_requests", 0))
-            with log_col2:
-                st.metric(
-                    "Sukses",
-                    summary.get("success_count", 0),
-                    delta="✓",
-                    delta_color="normal",
-                )
-            with log_col3:
-                st.metric(
-                    "Error",
-                    summary.get("error_count", 0),
-                    delta="✗" if summary.get("error_count", 0) > 0 else None,
-                    delta_color="inverse",
-                )
-            with log_col4:
-                st.metric("Success Rate", f"{summary.get('success_rate', 0):.1f}%")
-
-            # Log table
-            if logs:
-                st.markdown("#### 📜 Riwayat Prediksi Terbaru")
-
-                # Convert logs to display format
-                log_display = []
-                for log in logs[:20]:  # Show last 20
-                    input_data = log.get("input", {})
-                    # Get model used if available
-                    model_used = log.get("model_used", "Model 1")
-                    # Shorten names for table
-                    if "Linear" in model_used:
-                        model_used = "Linear Reg."
-                    if "Forest" in model_used:
-                        model_used = "Random Forest"
-
-                    log_display.append(
-                        {
-                            "Waktu": log.get("timestamp", "-"),
-                            "Model": model_used,
-                            "LB": input_data.get("LB", "-"),
-                            "LT": input_data.get("LT", "-"),
-                            "Prediksi (Rp)": f"{log.get('prediction', 0):,.0f}"
-                            if log.get("prediction")
-                            else "-",
-                            "Status": "✅" if log.get("status") == "success" else "❌",
-                        }
-                    )
-
-                import pandas as pd
-
-                df_logs = pd.DataFrame(log_display)
-                st.dataframe(df_logs, use_container_width=True, hide_index=True)
-            else:
-                st.info(
-                    "Belum ada log prediksi. Lakukan prediksi dari halaman User terlebih dahulu."
-                )
-        else:
-            st.warning(
-                "⚠️ Tidak dapat mengambil data log. Pastikan API berjalan dengan benar."
-            )
+        show_prediction_logs()
 
         # -------------------------------------------------------------------------
         # KUALITAS DATA - PEMANTAUAN KESEHATAN MODEL
@@ -1022,6 +1158,64 @@ def show_admin_page():
                         f"Data dianalisis dari {sample_count} prediksi terakhir • Diperbarui secara otomatis"
                     )
 
+            # Tren drift per periode waktu (dari sketch per bucket di API)
+            st.markdown("#### Tren Kualitas Data")
+            window_labels = {"1 Jam": "1h", "24 Jam": "24h", "7 Hari": "7d"}
+            window_label = st.radio(
+                "Periode",
+                list(window_labels),
+                index=1,
+                horizontal=True,
+                key="drift_window",
+            )
+            series = get_drift_timeseries(window_labels[window_label])
+            points = series.get("points", []) if series else []
+
+            if any(p["count"] > 0 for p in points):
+                times = [p["start"] for p in points]
+                fig_trend = go.Figure()
+                fig_trend.add_trace(
+                    go.Bar(
+                        x=times,
+                        y=[p["count"] for p in points],
+                        name="Jumlah prediksi",
+                        marker_color="#e9ecef",
+                        yaxis="y2",
+                    )
+                )
+                for feature in ["LB", "LT", "KT", "KM", "GRS"]:
+                    fig_trend.add_trace(
+                        go.Scatter(
+                            x=times,
+                            y=[p.get("psi", {}).get(feature) for p in points],
+                            name=feature,
+                            mode="lines+markers",
+                            connectgaps=False,
+                        )
+                    )
+                fig_trend.add_hline(
+                    y=0.1, line_dash="dot", line_color="#ffc107", annotation_text="Berubah"
+                )
+                fig_trend.add_hline(
+                    y=0.25, line_dash="dot", line_color="#dc3545", annotation_text="Berbeda"
+                )
+                fig_trend.update_layout(
+                    height=380,
+                    margin=dict(l=20, r=20, t=30, b=20),
+                    plot_bgcolor="white",
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, x=0),
+                    yaxis=dict(title="PSI", rangemode="tozero"),
+                    yaxis2=dict(
+                        title="Prediksi", overlaying="y", side="right", showgrid=False
+                    ),
+                )
+                st.plotly_chart(fig_trend, use_container_width=True)
+                st.caption(
+                    "PSI per fitur untuk setiap periode dibandingkan data historis. Di bawah 0.1 berarti sesuai, di atas 0.25 berarti berbeda jauh. Periode dengan kurang dari 5 prediksi tidak ditampilkan."
+                )
+            else:
+                st.info(f"Belum ada prediksi dalam {window_label.lower()} terakhir.")
+
         else:
             st.markdown(
                 """
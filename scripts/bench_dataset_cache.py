@@ -0,0 +1,73 @@
+"""Benchmark: reading the listings workbook with pd.read_excel vs the columnar dataset cache.
+
+Writes a synthetic workbook with the DATA RUMAH.xlsx columns, then times a
+cold load (hash + Excel parse + cache write), warm loads (hash + .npy
+columns) and a warm load of only the feature columns.
+
+Run from the project root:
+    python scripts/bench_dataset_cache.py [n_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+
+from dataset_cache import content_hash, load_dataset
+
+N_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+FEATURES = ["LB", "LT", "KT", "KM", "GRS"]
+AREAS = ["Tebet", "Kebayoran Baru", "Cilandak", "Pasar Minggu", "Jagakarsa", "Pesanggrahan"]
+
+
+def synthetic_listings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lb = rng.integers(30, 600, n)
+    return pd.DataFrame({
+        "NO": np.arange(1, n + 1),
+        "NAMA RUMAH": [f"Rumah {i} di {AREAS[i % len(AREAS)]}, Jakarta Selatan" for i in range(n)],
+        "HARGA": (lb * rng.uniform(15e6, 40e6, n)).astype(np.int64),
+        "LB": lb,
+        "LT": lb + rng.integers(0, 300, n),
+        "KT": rng.integers(1, 8, n),
+        "KM": rng.integers(1, 6, n),
+        "GRS": rng.integers(0, 4, n)
+    })
+
+
+def timed(label, fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    print(f"{label:<34}{(time.perf_counter() - start) / repeat:>10.3f} s")
+    return result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "raw", "DATA RUMAH.xlsx")
+        cache_dir = os.path.join(tmp, "cache")
+        os.makedirs(os.path.dirname(path))
+        print(f"Writing {N_ROWS} synthetic listings...")
+        synthetic_listings(N_ROWS).to_excel(path, index=False)
+        print(f"Workbook: {os.path.getsize(path) / 1e6:.1f} MB\n")
+
+        expected = timed("pd.read_excel", lambda: pd.read_excel(path))
+        timed("content hash only", lambda: content_hash(path), repeat=5)
+        cold = timed("cold (parse + write cache)", lambda: load_dataset(path, cache_dir=cache_dir))
+        warm = timed("warm (all columns)", lambda: load_dataset(path, cache_dir=cache_dir), repeat=5)
+        timed("warm (feature columns only)", lambda: load_dataset(path, columns=FEATURES, cache_dir=cache_dir), repeat=5)
+
+        pd.testing.assert_frame_equal(cold, expected)
+        pd.testing.assert_frame_equal(warm, expected)
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(cache_dir) for f in files)
+        print(f"\nCache: {size / 1e6:.1f} MB; warm and cold loads equal pd.read_excel.")
+
+
+if __name__ == "__main__":
+    main()
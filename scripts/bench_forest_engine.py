@@ -0,0 +1,63 @@
+"""Benchmark: flattened Random Forest engine vs sklearn's RandomForestRegressor.predict.
+
+Run from the project root (needs api/models/model_2.pkl from scripts/train.py):
+    python scripts/bench_forest_engine.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+
+import util as utils
+from compiled_models import CompiledForestModel, check_parity
+
+BATCH_SIZES = [1, 8, 64, 256, 1024, 8192]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    config = utils.load_params(utils.get_config_path())
+    predictors = config['prediktor']
+    model_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT_DIR, "api", "models", "model_2.pkl")
+    if not os.path.exists(model_path):
+        print(f"Model not found: {model_path}. Run scripts/train.py first.")
+        sys.exit(1)
+
+    model = utils.pickle_load(model_path)
+    start = time.perf_counter()
+    compiled = CompiledForestModel(model, predictors)
+    print(f"Compiled {compiled.n_trees} trees in {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    rng = np.random.default_rng(42)
+    X = np.column_stack([
+        rng.integers(config[f"rentang_{p}"][0], config[f"rentang_{p}"][1] + 1, size=max(BATCH_SIZES))
+        for p in predictors
+    ])
+    print(f"Parity OK: max rel err {check_parity(compiled, X[:compiled.SKLEARN_MIN_ROWS - 1]):.2g}")
+
+    fp = compiled.footprint()
+    print(f"Nodes: {fp['n_nodes']}, max depth: {fp['max_depth']}")
+    print(f"Memory: compiled arrays {fp['compiled_bytes'] / 1e6:.2f} MB, sklearn pickle {fp['sklearn_pickle_bytes'] / 1e6:.2f} MB")
+
+    print(f"{'rows':>6} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for n in BATCH_SIZES:
+        batch = X[:n]
+        repeat = 20 if n <= 256 else 3
+        t_sklearn = timed(lambda: model.predict(pd.DataFrame(batch, columns=predictors)), repeat)
+        t_compiled = timed(lambda: compiled.predict(batch), repeat)
+        print(f"{n:>6} {t_sklearn * 1e3:>11.2f} {t_compiled * 1e3:>12.2f} {t_sklearn / t_compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
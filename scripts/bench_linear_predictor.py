@@ -0,0 +1,72 @@
+"""Benchmark: per-request scoring of model_1.pkl, sklearn DataFrame path vs compiled dot product.
+
+Run from the project root:
+    python scripts/bench_linear_predictor.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+
+import util as utils
+from compiled_models import CompiledLinearModel
+
+N_REQUESTS = 20000
+
+
+def sklearn_request(model, predictors, data_json):
+    # What /predict used to do for every request
+    df = pd.DataFrame({p: [data_json[p]] for p in predictors})
+    for p in predictors:
+        df[p] = df[p].astype('int64')
+    return model.predict(df)[0]
+
+
+def compiled_request(compiled, predictors, data_json):
+    row = [int(data_json[p]) for p in predictors]
+    return compiled.predict_one(row)
+
+
+def main():
+    config = utils.load_params(utils.get_config_path())
+    predictors = config['prediktor']
+    model = utils.pickle_load(os.path.join(ROOT_DIR, "api", "models", "model_1.pkl"))
+    compiled = CompiledLinearModel(model, predictors)
+
+    rng = np.random.default_rng(42)
+    X = np.column_stack([
+        rng.integers(config[f"rentang_{p}"][0], config[f"rentang_{p}"][1] + 1, size=N_REQUESTS)
+        for p in predictors
+    ])
+    requests_json = [dict(zip(predictors, map(int, r))) for r in X]
+
+    # Parity: batch and single-row outputs must match sklearn bit for bit
+    expected = model.predict(pd.DataFrame(X, columns=predictors))
+    assert np.array_equal(compiled.predict(X), expected), "batch output differs from sklearn"
+    for r in requests_json[:2000]:
+        assert sklearn_request(model, predictors, r) == compiled_request(compiled, predictors, r), r
+    print(f"Parity OK: {N_REQUESTS} batch rows and 2000 single rows identical to sklearn")
+
+    n_slow = 2000
+    start = time.perf_counter()
+    for r in requests_json[:n_slow]:
+        sklearn_request(model, predictors, r)
+    t_sklearn = (time.perf_counter() - start) / n_slow
+
+    start = time.perf_counter()
+    for r in requests_json:
+        compiled_request(compiled, predictors, r)
+    t_compiled = (time.perf_counter() - start) / N_REQUESTS
+
+    print(f"sklearn (DataFrame) : {t_sklearn * 1e6:9.1f} us/request")
+    print(f"compiled (dot)      : {t_compiled * 1e6:9.1f} us/request")
+    print(f"speedup             : {t_sklearn / t_compiled:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
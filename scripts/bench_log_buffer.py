@@ -0,0 +1,112 @@
+"""Benchmark: prediction log as a deque of dicts vs the columnar LogBuffer.
+
+Measures memory per entry, append cost, rendering the newest 50 entries
+(/logs) and extracting the drift window's feature rows.
+
+Run from the project root:
+    python scripts/bench_log_buffer.py [n_entries]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+
+from log_buffer import LogBuffer
+from reference_stats import FEATURES
+
+N_ENTRIES = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+DRIFT_WINDOW = 100
+
+
+def request(i):
+    inputs = {"LB": 100 + i % 400, "LT": 120 + i % 300, "KT": 3, "KM": 2, "GRS": 1}
+    details = {
+        "model1": {"prediction": 1.4e9 + i, "r2": 0.5412523404654176},
+        "model2": {"prediction": 1.5e9 + i, "r2": 0.6446813272264516},
+        "switched": True
+    }
+    return inputs, 1.5e9 + i, details
+
+
+def dict_entry(i):
+    # What log_prediction used to allocate per request
+    inputs, prediction, details = request(i)
+    return {
+        "timestamp": datetime.now(timezone(timedelta(hours=7))).strftime("%Y-%m-%d %H:%M:%S"),
+        "input": inputs,
+        "prediction": prediction,
+        "status": "success",
+        "error": None,
+        "model_used": "Model 2 (Random Forest)",
+        "details": details,
+        "seq": i + 1
+    }
+
+
+def measure(label, build, tail, window):
+    tracemalloc.start()
+    start = time.perf_counter()
+    log = build()
+    append_s = time.perf_counter() - start
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(100):
+        tail(log)
+    tail_ms = (time.perf_counter() - start) / 100 * 1000
+
+    start = time.perf_counter()
+    for _ in range(100):
+        window(log)
+    window_ms = (time.perf_counter() - start) / 100 * 1000
+
+    print(f"{label:<22}{used / N_ENTRIES:>10.0f} B{append_s / N_ENTRIES * 1e6:>10.2f} us"
+          f"{tail_ms:>12.3f} ms{window_ms:>12.3f} ms")
+
+
+def build_deque():
+    log = deque(maxlen=N_ENTRIES)
+    for i in range(N_ENTRIES):
+        log.append(dict_entry(i))
+    return log
+
+
+def build_buffer():
+    log = LogBuffer(N_ENTRIES)
+    for i in range(N_ENTRIES):
+        inputs, prediction, details = request(i)
+        log.append(1.7e9 + i, inputs, prediction, "success", None, "Model 2 (Random Forest)", details)
+    return log
+
+
+def deque_window(log):
+    recent = list(log)[-DRIFT_WINDOW:]
+    return np.array([[e["input"][f] for f in FEATURES] for e in recent if e["status"] == "success"], dtype=np.float64)
+
+
+def buffer_window(log):
+    features, success = log.window(DRIFT_WINDOW)
+    return features[success]
+
+
+def main():
+    print(f"Entries: {N_ENTRIES}")
+    print(f"{'':<22}{'memory/entry':>12}{'append':>13}{'/logs (50)':>15}{'drift window':>15}")
+    measure("deque of dicts", build_deque, lambda log: list(log)[-50:][::-1], deque_window)
+    measure("LogBuffer", build_buffer, lambda log: log.entries(50), buffer_window)
+    columns = LogBuffer(N_ENTRIES).nbytes()
+    full = build_buffer().nbytes()
+    print(f"LogBuffer nbytes(): {columns / N_ENTRIES:.0f} B per entry preallocated (columns), "
+          f"{full / N_ENTRIES:.0f} B per entry when full (columns + indexes); size LOG_CAPACITY from the latter")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark: SQLite prediction log store throughput and caller-side append cost.
+
+Appends N synthetic prediction log entries as fast as possible, then waits
+for the background writer to drain. Also times the /logs-style reads.
+
+Run from the project root:
+    python scripts/bench_log_store.py [n_entries]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+
+from log_store import LogStore
+
+N_ENTRIES = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+
+def make_entry(i):
+    # Positional arguments of LogStore.append after (seq, ts)
+    return (
+        {"LB": 100 + i % 400, "LT": 120 + i % 300, "KT": 3, "KM": 2, "GRS": 1},
+        1.5e9 + i,
+        "success" if i % 50 else "error",
+        None if i % 50 else "LB out of range",
+        "Model 2 (Random Forest)",
+        {"model1": {"prediction": 1.4e9, "r2": 0.54}, "model2": {"prediction": 1.5e9, "r2": 0.64}, "switched": True}
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LogStore(os.path.join(tmp, "predictions.db"), max_queue=N_ENTRIES + 1)
+        store.start()
+        entries = [make_entry(i) for i in range(N_ENTRIES)]
+
+        start = time.perf_counter()
+        for i, entry in enumerate(entries):
+            store.append(i + 1, 1.7e9 + i, *entry)
+        append_s = time.perf_counter() - start
+        store.flush()
+        total_s = time.perf_counter() - start
+
+        print(f"Entries: {N_ENTRIES}")
+        print(f"append(): {append_s / N_ENTRIES * 1e6:.2f} us per entry (caller side)")
+        print(f"Written and committed: {total_s:.2f}s -> {N_ENTRIES / total_s:,.0f} entries/s "
+              f"in {store.batches} batches, {store.dropped} dropped")
+
+        for label, fn in [
+            ("recent(50)", lambda: store.recent(50)),
+            ("recent(50, status='error')", lambda: store.recent(50, "error")),
+            ("query(50, after=N-1000)", lambda: store.query(50, after=N_ENTRIES - 1000)),
+            ("counters().summary()", lambda: store.counters().summary())
+        ]:
+            start = time.perf_counter()
+            for _ in range(20):
+                fn()
+            print(f"{label}: {(time.perf_counter() - start) / 20 * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
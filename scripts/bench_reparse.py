@@ -0,0 +1,51 @@
+"""Benchmark: re-parsing the raw HTML archive, one process vs a process pool.
+
+Archives N generated listing pages (stub server markup, 20 cards each) in a
+temporary HtmlArchive, then parses all of them with 1 worker and with one
+worker per core, and checks that both return the same records.
+
+Run from the project root:
+    python scripts/bench_reparse.py [pages] [workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from html_archive import HtmlArchive, reparse
+from stub_listing_server import render_page
+
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = HtmlArchive(tmp)
+        raw_bytes = 0
+        start = time.perf_counter()
+        for page in range(1, PAGES + 1):
+            html = render_page(page, 20).encode("utf-8")
+            raw_bytes += len(html)
+            archive.put(f"http://stub/?page={page}", page, html)
+        stats = archive.stats()
+        print(f"Archived {PAGES} pages in {time.perf_counter() - start:.2f}s: "
+              f"{raw_bytes / 1e6:.1f} MB raw -> {stats['compressed_bytes'] / 1e6:.1f} MB gzip")
+
+        results = {}
+        for workers in dict.fromkeys([1, WORKERS]):
+            start = time.perf_counter()
+            results[workers] = reparse(archive, workers)
+            elapsed = time.perf_counter() - start
+            print(f"reparse, {workers} worker(s): {elapsed:.2f}s -> {PAGES / elapsed:,.0f} pages/s, "
+                  f"{len(results[workers])} records")
+
+        same = all(records == results[1] for records in results.values())
+        print(f"Same records: {same} ({os.cpu_count()} cores available)")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
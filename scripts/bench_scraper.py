@@ -0,0 +1,69 @@
+"""Benchmark: scraper fetch throughput against the local stub server (no network).
+
+Fetches the same pages the old way (one page at a time, new session per
+page, no rate limit) and with the concurrent fetcher, against a stub that
+adds latency, fails a share of pages with 503 and answers 429 above a
+request rate. Checks that both runs parse the same records and that the
+stub never saw more requests per second than the limiter allows.
+
+Run from the project root:
+    python scripts/bench_scraper.py [pages] [workers] [rate]
+"""
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from scraper import BURST, HEADERS_LIST, fetch_listings, page_url, parse_page
+from stub_listing_server import start_stub_server
+
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+RATE = float(sys.argv[3]) if len(sys.argv) > 3 else 20.0
+LATENCY = 0.25
+ERROR_RATE = 0.05
+
+
+def sequential(base_url):
+    """The fetch loop scrape_data() used before (without its 2-5 s sleeps)"""
+    records = []
+    for page in range(1, PAGES + 1):
+        for _ in range(10):
+            response = requests.Session().get(page_url(page, base_url), headers=HEADERS_LIST[0], timeout=30)
+            if response.status_code == 200:
+                records.extend(parse_page(response.content))
+                break
+    return records
+
+
+def run(label, fn, base_url):
+    start = time.perf_counter()
+    records = fn(base_url)
+    elapsed = time.perf_counter() - start
+    stats = requests.get(base_url.split("/jual")[0] + "/__stats").json()
+    print(f"{label}: {PAGES} pages in {elapsed:.2f}s -> {PAGES / elapsed:.1f} pages/s, {len(records)} records, "
+          f"server {stats}")
+    return records, stats
+
+
+def main():
+    server, base_url = start_stub_server(latency=LATENCY, error_rate=ERROR_RATE)
+    old, _ = run("sequential (old loop)", sequential, base_url)
+    server.shutdown()
+
+    # The stub rejects anything above rate + burst in any 1 s window, so no 429 means the limiter held
+    server, base_url = start_stub_server(latency=LATENCY, error_rate=ERROR_RATE, max_rate=RATE + BURST)
+    new, stats = run(f"concurrent ({WORKERS} workers, {RATE} req/s)",
+                     lambda url: fetch_listings(PAGES, url, workers=WORKERS, rate=RATE), base_url)
+    server.shutdown()
+
+    print(f"Same records: {old == new}")
+    print(f"Rate limit respected: {stats['rate_limited_429'] == 0} (max {stats['max_requests_per_s']} req/s)")
+    if old != new:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark: /predict throughput of the gunicorn pre-fork server by worker count.
+
+For each worker count, starts `gunicorn -c gunicorn.conf.py app:app` on a
+local port (with a throwaway SQLite log store), drives /predict from
+concurrent client threads for a fixed duration and reports requests/s,
+latency percentiles and worker memory (RSS vs PSS: PSS divides shared pages
+among the processes sharing them, so it shows what preloading saves).
+
+Run from the project root (needs gunicorn installed):
+    python scripts/bench_server.py [worker counts, default 1,2,4] [seconds]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT_DIR, "api")
+
+WORKER_COUNTS = [int(w) for w in (sys.argv[1] if len(sys.argv) > 1 else "1,2,4").split(",")]
+DURATION_S = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+CLIENTS = 16
+PORT = 5099
+URL = f"http://127.0.0.1:{PORT}"
+
+
+def start_server(workers, state_dir):
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        BIND=f"127.0.0.1:{PORT}",
+        LOG_STORE_PATH=os.path.join(state_dir, "predictions.db"),
+        DRIFT_STATE_DIR=state_dir,
+        DRIFT_SCHEDULE_INTERVAL="0",
+        MODEL_WATCH_INTERVAL="0"
+    )
+    server = subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            requests.get(f"{URL}/", timeout=1)
+            return server
+        except requests.RequestException:
+            time.sleep(0.5)
+    server.kill()
+    raise RuntimeError("gunicorn did not come up within 60s")
+
+
+def worker_memory(master_pid):
+    """(RSS, PSS) in MB summed over the worker processes of `master_pid` (Linux /proc)"""
+    rss = pss = 0
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        children = f.read().split()
+    for pid in children:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    rss += int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss += int(line.split()[1])
+    return rss / 1024, pss / 1024
+
+
+def load(duration):
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(i):
+        session = requests.Session()
+        own = []
+        n = 0
+        while time.perf_counter() < stop_at:
+            payload = {"LB": 100 + (i * 37 + n) % 400, "LT": 120 + n % 300, "KT": 3, "KM": 2, "GRS": 1}
+            start = time.perf_counter()
+            session.post(f"{URL}/predict", json=payload, timeout=30)
+            own.append(time.perf_counter() - start)
+            n += 1
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(CLIENTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.array(latencies) * 1000
+
+
+def main():
+    print(f"{CLIENTS} client threads, {DURATION_S:.0f}s per run, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>10}{'PSS MB':>10}")
+    for workers in WORKER_COUNTS:
+        with tempfile.TemporaryDirectory() as state_dir:
+            server = start_server(workers, state_dir)
+            try:
+                load(1)  # warm-up
+                latencies = load(DURATION_S)
+                rss, pss = worker_memory(server.pid)
+            finally:
+                server.terminate()
+                server.wait()
+        print(f"{workers:>8}{len(latencies) / DURATION_S:>10.0f}{np.percentile(latencies, 50):>10.2f}"
+              f"{np.percentile(latencies, 99):>10.2f}{rss:>10.0f}{pss:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
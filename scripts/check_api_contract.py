@@ -0,0 +1,125 @@
+"""Check: the HTTP contract of a running API (Flask app.py or the ASGI asgi_app.py).
+
+Sends the same requests to every base URL given and checks status codes and
+JSON shapes of /predict, /predict/batch, /metrics, /logs (filters and cursor
+pagination), /drift and /drift/timeseries. With two or more URLs it also
+checks that the servers return the same keys for every request.
+
+Start the servers, then run from the project root:
+    python api/app.py                                        # :5000
+    (cd api && uvicorn asgi_app:app --port 5001)             # :5001
+    python scripts/check_api_contract.py http://localhost:5000 http://localhost:5001
+"""
+import sys
+
+import requests
+
+LISTING = {"LB": 150, "LT": 200, "KT": 4, "KM": 3, "GRS": 1}
+
+
+def shape(value):
+    """Keys (recursively) and value types of a JSON document, for comparing servers"""
+    if isinstance(value, dict):
+        return {k: shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [shape(value[0])] if value else []
+    if isinstance(value, bool) or value is None:
+        return type(value).__name__
+    return "number" if isinstance(value, (int, float)) else type(value).__name__
+
+
+class Contract:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.failures = []
+        self.responses = {}
+
+    def call(self, name, method, path, expect_status, **kwargs):
+        response = requests.request(method, self.base_url + path, timeout=60, **kwargs)
+        body = response.json() if response.headers.get("content-type", "").startswith("application/json") else None
+        self.responses[name] = (response.status_code, body)
+        self.check(name, response.status_code in expect_status, f"status {response.status_code}, expected {expect_status}")
+        return body
+
+    def check(self, name, condition, message):
+        if not condition:
+            self.failures.append(f"{name}: {message}")
+
+    def run(self):
+        body = self.call("predict", "POST", "/predict", [200], json=LISTING)
+        self.check("predict", body and body.get("status") == "success", "status != success")
+        self.check("predict", isinstance(body.get("prediction"), float), "prediction is not a number")
+        self.check("predict", {"model1", "model2", "switched"} <= set(body.get("details", {})), "details incomplete")
+
+        body = self.call("predict_missing", "POST", "/predict", [400], json={"LB": 150})
+        self.check("predict_missing", "Missing features" in (body or {}).get("error", ""), "no missing-features error")
+
+        body = self.call("predict_invalid", "POST", "/predict", [400], json={**LISTING, "LB": "abc"})
+        self.check("predict_invalid", (body or {}).get("status") == "error" and body.get("message"), "no error message")
+
+        # Same validation as /predict/batch: no silent truncation of 3.7 to 3
+        body = self.call("predict_fraction", "POST", "/predict", [400], json={**LISTING, "KT": 3.7})
+        self.check("predict_fraction", "whole number" in (body or {}).get("message", ""), "fraction not rejected")
+
+        body = self.call("predict_batch", "POST", "/predict/batch", [200], json=[LISTING, {"LB": -1}])
+        summary = (body or {}).get("data", {}).get("summary", {})
+        self.check("predict_batch", summary.get("total") == 2, f"summary {summary}")
+        self.call("predict_batch_empty", "POST", "/predict/batch", [400], json=[])
+
+        body = self.call("metrics", "GET", "/metrics", [200, 404])
+        self.check("metrics", (body or {}).get("status") in ("success", "error"), "no status")
+
+        body = self.call("logs", "GET", "/logs", [200], params={"limit": 5})
+        data = (body or {}).get("data", {})
+        self.check("logs", len(data.get("logs", [])) <= 5, "limit not applied")
+        self.check("logs", {"total_requests", "success_count", "error_count", "success_rate"} <= set(data.get("summary", {})),
+                   "summary incomplete")
+        seqs = [log["seq"] for log in data.get("logs", [])]
+        self.check("logs", seqs == sorted(seqs, reverse=True), "not newest first")
+        last_seq = data.get("cursor", {}).get("last_seq", 0)
+
+        body = self.call("logs_after", "GET", "/logs", [200], params={"after": max(last_seq - 3, 0)})
+        seqs = [log["seq"] for log in (body or {}).get("data", {}).get("logs", [])]
+        self.check("logs_after", seqs == sorted(seqs) and all(s > last_seq - 3 for s in seqs), f"cursor page {seqs}")
+
+        body = self.call("logs_error", "GET", "/logs", [200], params={"status": "error"})
+        statuses = {log["status"] for log in (body or {}).get("data", {}).get("logs", [])}
+        self.check("logs_error", statuses <= {"error"}, f"statuses {statuses}")
+
+        self.call("logs_since_invalid", "GET", "/logs", [400], params={"since": "yesterday"})
+
+        body = self.call("drift", "GET", "/drift", [200])
+        self.check("drift", "overall_status" in (body or {}).get("data", {}), "no overall_status")
+
+        self.call("drift_window_invalid", "GET", "/drift", [400, 503], params={"window": "2w"})
+        self.call("drift_timeseries", "GET", "/drift/timeseries", [200, 503], params={"window": "1h"})
+        return not self.failures
+
+
+def main():
+    urls = sys.argv[1:] or ["http://localhost:5000"]
+    contracts = []
+    for url in urls:
+        contract = Contract(url)
+        ok = contract.run()
+        print(f"{url}: {len(contract.responses)} requests, {'OK' if ok else f'{len(contract.failures)} failures'}")
+        for failure in contract.failures:
+            print(f"  {failure}")
+        contracts.append(contract)
+
+    failures = sum(len(c.failures) for c in contracts)
+    first = contracts[0]
+    for other in contracts[1:]:
+        for name, (status, body) in first.responses.items():
+            other_status, other_body = other.responses[name]
+            if status != other_status or shape(body) != shape(other_body):
+                failures += 1
+                print(f"{name}: {first.base_url} and {other.base_url} differ (status {status} vs {other_status})")
+
+    if failures:
+        sys.exit(1)
+    print("All checks match.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,17 @@
 import pandas as pd
 import os
+import sys
 
 # Load data
-file_path = r"c:\Users\barun\Prediksi-Harga-Rumah\data\raw\DATA RUMAH.xlsx"
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+from dataset_cache import load_dataset
+
+file_path = os.path.join(ROOT_DIR, "data", "raw", "DATA RUMAH.xlsx")
 if not os.path.exists(file_path):
     print(f"File not found: {file_path}")
 else:
-    df = pd.read_excel(file_path)
+    df = load_dataset(file_path)
     print("--- Columns ---")
     print(df.columns.tolist())
     
@@ -0,0 +1,125 @@
+"""Check: streaming drift detectors vs Evidently (KS test), scipy and the z-score fallback.
+
+Feeds a stream of synthetic predictions (first in-distribution, then shifted)
+through StreamingDrift and, at a few checkpoints, recomputes the same window
+with Evidently's DataDriftTable(stattest="ks") (p-value and decision),
+scipy's ks_2samp (D statistic) and drift.calculate_drift_simple (z-score).
+Also reports the per-update cost of the streaming engine.
+
+Parity is against Evidently forced to K-S. The default /drift report lets
+Evidently choose the stattest (normed Wasserstein distance for numeric
+columns when the reference has more than 1000 rows), so its decisions are
+printed next to the streaming ones for information only: the two engines
+are expected to disagree sometimes.
+
+Run from the project root:
+    python scripts/check_drift_parity.py
+"""
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.stats import ks_2samp
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+
+import util as utils
+import drift
+from reference_stats import FEATURES
+from streaming_drift import StreamingDrift
+
+WINDOW = 100
+N_UPDATES = 1000
+CHECKPOINTS = [20, 100, 400, 700, 1000]
+# Evidently (scipy "auto") uses the exact KS distribution at these sample sizes,
+# the streaming engine the asymptotic one; they differ slightly for small windows
+P_TOLERANCE = 0.02
+
+
+def synthetic_stream(reference, config, n, seed=0):
+    """Reference rows resampled, with LB/LT scaled up in the second half"""
+    rng = np.random.default_rng(seed)
+    rows = reference[FEATURES].to_numpy()[rng.integers(0, len(reference), size=n)].astype(np.int64)
+    shifted = rows[n // 2:]
+    shifted[:, 0] = shifted[:, 0] * 1.6
+    shifted[:, 1] = shifted[:, 1] * 1.4
+    for j, f in enumerate(FEATURES):
+        lo, hi = config[f"rentang_{f}"]
+        rows[:, j] = np.clip(rows[:, j], lo, hi)
+    return rows
+
+
+def evidently_ks(ref, cur, stattest="ks"):
+    """Evidently's drift_by_columns; stattest=None keeps Evidently's own choice (the /drift default)"""
+    Report, DataDriftTable, _ = drift.load_evidently()
+    report = Report(metrics=[DataDriftTable(stattest=stattest)])
+    report.run(reference_data=ref, current_data=cur)
+    for metric in report.as_dict()["metrics"]:
+        if "DataDriftTable" in metric["metric"]:
+            return metric["result"]["drift_by_columns"]
+    return {}
+
+
+def main():
+    warnings.filterwarnings("ignore")
+    config = utils.load_params(utils.get_config_path())
+    drift.ensure_reference()
+    ref = drift.reference_data[FEATURES].copy()
+    print(f"Reference: {len(ref)} rows")
+
+    stream = StreamingDrift(ref, config, window=WINDOW)
+    rows = synthetic_stream(ref, config, N_UPDATES)
+
+    failures = 0
+    update_time = 0.0
+    for i, row in enumerate(rows, start=1):
+        start = time.perf_counter()
+        stream.update(row.tolist())
+        update_time += time.perf_counter() - start
+        if i not in CHECKPOINTS:
+            continue
+
+        cur = pd.DataFrame(rows[max(0, i - WINDOW):i], columns=FEATURES)
+        result = stream.result()
+        evid = evidently_ks(ref, cur)
+        default = evidently_ks(ref, cur, stattest=None)
+        simple = drift.calculate_drift_simple(cur.to_dict("records"), FEATURES)["features"]
+
+        print(f"\nAfter {i} updates (window {len(cur)}), streaming status: {result['overall_status']}")
+        print(f"{'feature':<6}{'D stream':>10}{'D scipy':>10}{'p stream':>10}{'p evid':>10}{'z stream':>10}{'z simple':>10}  decision"
+              f"  default Evidently")
+        for f in FEATURES:
+            s = result["features"][f]
+            e = evid[f]
+            # Evidently reports the KS p-value as drift_score
+            d = ks_2samp(ref[f], cur[f]).statistic
+            same_d = abs(s["drift_score"] - round(d, 4)) < 1e-4
+            same_p = abs(s["p_value"] - e["drift_score"]) < P_TOLERANCE
+            same_z = abs(s["z_score"] - simple[f]["drift_score"]) < 1e-3
+            borderline = abs(e["drift_score"] - 0.05) < P_TOLERANCE
+            same_decision = s["drift_detected"] == e["drift_detected"] or borderline
+            ok = same_d and same_p and same_z and same_decision
+            failures += not ok
+            print(f"{f:<6}{s['drift_score']:>10.4f}{d:>10.4f}{s['p_value']:>10.4f}{e['drift_score']:>10.4f}"
+                  f"{s['z_score']:>10.4f}{simple[f]['drift_score']:>10.4f}  {'OK' if ok else 'MISMATCH':<8}"
+                  f"  {default[f]['stattest_name']}: drift={default[f]['drift_detected']}"
+                  f"{'' if default[f]['drift_detected'] == s['drift_detected'] else ' (differs)'}")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        stream.result()
+    read_us = (time.perf_counter() - start) / 1000 * 1e6
+    print(f"\nStreaming update: {update_time / N_UPDATES * 1e6:.1f} us/prediction, result(): {read_us:.1f} us")
+
+    if failures:
+        print(f"{failures} feature checks did not match")
+        sys.exit(1)
+    print("All checks match.")
+
+
+if __name__ == "__main__":
+    main()
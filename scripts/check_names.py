@@ -1,7 +1,14 @@
+import os
+import sys
+
 import pandas as pd
 
 # Load data
-file_path = r"c:\Users\barun\Prediksi-Harga-Rumah\data\raw\DATA RUMAH.xlsx"
-df = pd.read_excel(file_path)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+from dataset_cache import load_dataset
+
+file_path = os.path.join(ROOT_DIR, "data", "raw", "DATA RUMAH.xlsx")
+df = load_dataset(file_path)
 print("--- NAMA RUMAH Samples ---")
 print(df['NAMA RUMAH'].head(10))
@@ -0,0 +1,146 @@
+"""Concurrent page fetcher for the scraper.
+
+One pooled requests.Session is shared by a bounded thread pool. Every request
+first takes a token from its host's token bucket, so the pool can fetch in
+parallel while a host never sees more than `rate` requests per second on
+average (plus a burst of `burst`). Responses with 429 or 5xx are retried with
+exponential backoff and jitter; a Retry-After header wins over the computed
+delay.
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """One token bucket per host"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        if self.rate <= 0:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+class Fetcher:
+    def __init__(self, headers_list, workers=4, rate=1.0, burst=2, max_retries=4, backoff=1.0, timeout=30):
+        self.headers_list = headers_list
+        self.workers = workers
+        self.limiter = HostRateLimiter(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        # Pool sized to the worker count, so no thread waits for a connection; retries are done here
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "failed": 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _delay(self, attempt, response):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def fetch(self, url):
+        """Response for `url` (status 200), or None after the retries are used up"""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(url)
+            self._count("requests")
+            response = None
+            try:
+                response = self.session.get(url, headers=random.choice(self.headers_list), timeout=self.timeout)
+                if response.status_code == 200:
+                    return response
+                if response.status_code not in RETRY_STATUSES:
+                    print(f"Failed to fetch {url}: {response.status_code}")
+                    break
+                reason = response.status_code
+            except requests.RequestException as e:
+                reason = e
+            if attempt < self.max_retries:
+                delay = self._delay(attempt, response)
+                print(f"Retrying {url} in {delay:.1f}s ({reason})")
+                self._count("retries")
+                time.sleep(delay)
+            else:
+                print(f"Giving up on {url} ({reason})")
+        self._count("failed")
+        return None
+
+    def imap(self, fn, urls):
+        """Yield fn(url, response) for every url in the order of `urls`.
+
+        At most `workers` pages are in flight ahead of the consumer, so a caller
+        that stops iterating early wastes at most that many requests.
+        """
+        def task(url):
+            return fn(url, self.fetch(url))
+
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="fetch") as pool:
+            pending = deque()
+            try:
+                for url in urls:
+                    pending.append(pool.submit(task, url))
+                    if len(pending) >= self.workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def map(self, fn, urls):
+        """fn(url, response) for every url, fetched concurrently; results in the order of `urls`"""
+        return list(self.imap(fn, urls))
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,156 @@
+"""Raw HTML archive of scraped pages, and the parse stage that runs over it.
+
+The scraper stores every fetched page here before parsing it, so a fixed
+parser (e.g. the KT/KM fallback regexes) can be re-applied to past pages
+without scraping them again:
+
+    data/listings/html/objects/<sha[:2]>/<sha256>.html.gz   gzip of the page, named by the hash of its bytes
+    data/listings/html/pages.jsonl                          one line per fetch: url, page, sha256, fetched_at
+
+Identical pages share one object. `reparse()` parses the archived pages
+with a process pool, one task per object, and returns the records of every
+fetch in fetch order.
+
+Usage (from the project root):
+    python scripts/html_archive.py stats
+    python scripts/html_archive.py reparse [--workers N] [--store DIR]
+
+With --store, the re-parsed records are appended to the listing store at DIR
+(use a new directory to compare against the current one before swapping),
+one append per archived fetch at its original fetch time, after seeding an
+empty store from the workbook like the scraper does.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from listing_store import STORE_DIR, ListingStore
+
+ARCHIVE_DIR = os.path.join(STORE_DIR, "html")
+
+
+class HtmlArchive:
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.manifest_path = os.path.join(root, "pages.jsonl")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.html.gz")
+
+    def put(self, url, page, html):
+        """Store the page's bytes (once per distinct content) and record the fetch; returns the hash"""
+        digest = hashlib.sha256(html).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(html)
+            os.replace(tmp, path)
+        line = json.dumps({"url": url, "page": page, "sha256": digest, "fetched_at": time.time()})
+        with self._lock, open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return digest
+
+    def get(self, digest):
+        with gzip.open(self.object_path(digest), "rb") as f:
+            return f.read()
+
+    def fetches(self):
+        """Manifest entries in fetch order"""
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def stats(self):
+        fetches = self.fetches()
+        objects = [os.path.join(d, name) for d, _, names in os.walk(self.objects_dir) for name in names]
+        return {
+            "fetches": len(fetches),
+            "objects": len(objects),
+            "compressed_bytes": sum(os.path.getsize(path) for path in objects)
+        }
+
+
+def _parse_object(args):
+    # Runs in a worker process: read one archived page and parse it
+    root, digest = args
+    from scraper import parse_page
+    return parse_page(HtmlArchive(root).get(digest))
+
+
+def reparse_fetches(archive, workers=None):
+    """(manifest entry, records) of every archived fetch, parsed with the current parser, in fetch order.
+
+    Each distinct object is parsed only once, in a pool of `workers`
+    processes (default: all cores).
+    """
+    fetches = archive.fetches()
+    digests = list(dict.fromkeys(entry["sha256"] for entry in fetches))
+    workers = workers or os.cpu_count() or 1
+    tasks = [(archive.root, digest) for digest in digests]
+    if workers == 1:
+        results = list(map(_parse_object, tasks))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_parse_object, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+    by_digest = dict(zip(digests, results))
+    return [(entry, by_digest[entry["sha256"]]) for entry in fetches]
+
+
+def reparse(archive, workers=None):
+    """Records of every archived fetch, flattened in fetch order.
+
+    A page fetched several times contributes its records once per fetch, as
+    the scraper appended them.
+    """
+    return [record for _, records in reparse_fetches(archive, workers) for record in records]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archived listing pages")
+    parser.add_argument("command", choices=["stats", "reparse"])
+    parser.add_argument("--workers", type=int, default=None, help="parse processes (default: all cores)")
+    parser.add_argument("--store", help="listing store directory to append the re-parsed records to")
+    args = parser.parse_args()
+
+    archive = HtmlArchive()
+    if args.command == "stats":
+        print(archive.stats())
+        return
+
+    started = time.perf_counter()
+    fetches = reparse_fetches(archive, args.workers)
+    stats = archive.stats()
+    print(f"Re-parsed {sum(len(records) for _, records in fetches)} records from {stats['fetches']} fetches "
+          f"({stats['objects']} distinct pages) in {time.perf_counter() - started:.1f}s")
+    if args.store:
+        from scraper import OUTPUT_FILE
+        store = ListingStore(args.store)
+        if store.count() == 0 and os.path.exists(OUTPUT_FILE):
+            # Listings that predate the archive, as in the scraper's store
+            print(f"Imported {OUTPUT_FILE}: {store.import_workbook(OUTPUT_FILE)}")
+        # Replayed as the scraper appended them: per fetch, dated by the fetch
+        totals = {"new": 0, "updated": 0, "unchanged": 0}
+        for entry, records in fetches:
+            counts = store.append(records, scraped_at=entry["fetched_at"])
+            for name in totals:
+                totals[name] += counts[name]
+        print(totals)
+        df = store.compact()
+        print(f"Snapshot: {len(df)} listings -> {store.snapshot_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Append-only store of scraped listings, partitioned by scrape date.
+
+System of record for the scraper instead of rewriting DATA RUMAH.xlsx:
+
+    data/listings/partitions/date=YYYY-MM-DD.jsonl   every new or changed listing, append-only
+    data/listings/index.db                           SQLite dedup index, latest version per listing
+    data/listings/snapshot/                          training snapshot (.npy columns, see dataset_cache)
+
+A listing is identified by (NAMA RUMAH, LB, LT, KT, KM), like the old
+drop_duplicates. Appending checks each record against the index only: an
+unchanged listing is skipped, a changed one (new price) is appended and
+becomes the latest version. The cost is O(new records), not O(history).
+`compact()` writes the latest version of every listing as the training
+snapshot, optionally also as an Excel workbook.
+
+Usage (from the project root):
+    python scripts/listing_store.py import "data/raw/DATA RUMAH.xlsx"
+    python scripts/listing_store.py compact [--excel "data/raw/DATA RUMAH.xlsx"]
+    python scripts/listing_store.py stats
+    python scripts/listing_store.py rebuild-index
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "api"))
+from dataset_cache import load_columns, load_dataset, save_columns
+
+STORE_DIR = os.getenv("LISTING_STORE_DIR") or os.path.join(ROOT_DIR, "data", "listings")
+KEY_COLUMNS = ["NAMA RUMAH", "LB", "LT", "KT", "KM"]
+VALUE_COLUMNS = ["HARGA", "GRS"]
+COLUMNS = ["NO", "NAMA RUMAH", "HARGA", "LB", "LT", "KT", "KM", "GRS"]
+
+WIB = timezone(timedelta(hours=7))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    nama TEXT NOT NULL,
+    lb INTEGER NOT NULL,
+    lt INTEGER NOT NULL,
+    kt INTEGER NOT NULL,
+    km INTEGER NOT NULL,
+    harga INTEGER NOT NULL,
+    grs INTEGER NOT NULL,
+    -- Write order of the latest version; the snapshot is sorted by it (like keep='last')
+    seq INTEGER NOT NULL,
+    partition TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (nama, lb, lt, kt, km)
+);
+CREATE INDEX IF NOT EXISTS idx_listings_seq ON listings (seq);
+"""
+
+
+def listing_key(record):
+    return (str(record["NAMA RUMAH"]), int(record["LB"]), int(record["LT"]), int(record["KT"]), int(record["KM"]))
+
+
+class ListingStore:
+    IMPORTED = "date=imported.jsonl"
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.partitions_dir = os.path.join(root, "partitions")
+        self.snapshot_dir = os.path.join(root, "snapshot")
+        os.makedirs(self.partitions_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"))
+        self.conn.executescript(SCHEMA)
+
+    def partition_path(self, date):
+        return os.path.join(self.partitions_dir, f"date={date}.jsonl")
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+
+    def append(self, records, scraped_at=None, partition=None):
+        """Add scraped records; returns counts of new, updated and unchanged listings.
+
+        New and changed records are appended to today's partition file first,
+        then the index is updated in one transaction.
+        """
+        scraped_at = time.time() if scraped_at is None else scraped_at
+        partition = partition or datetime.fromtimestamp(scraped_at, WIB).strftime("%Y-%m-%d")
+        lines, unchanged, counts = self._diff(records)
+
+        if lines:
+            with open(self.partition_path(partition), "a", encoding="utf-8") as f:
+                for key, values, _ in lines:
+                    record = dict(zip(KEY_COLUMNS, key), HARGA=values[0], GRS=values[1], scraped_at=scraped_at)
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        with self.conn:
+            self._index(lines, partition, scraped_at)
+            self.conn.executemany(
+                "UPDATE listings SET last_seen = ? WHERE nama = ? AND lb = ? AND lt = ? AND kt = ? AND km = ?",
+                [(scraped_at,) + key for key in unchanged]
+            )
+        return counts
+
+    def _diff(self, records):
+        """Records that are new or changed against the index (and earlier records of the same batch)"""
+        (seq,) = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM listings").fetchone()
+        counts = {"new": 0, "updated": 0, "unchanged": 0}
+        latest = {}
+        lines = []
+        unchanged = set()
+        for record in records:
+            key = listing_key(record)
+            values = (int(record["HARGA"]), int(record["GRS"]))
+            known = latest.get(key)
+            if known is None:
+                row = self.conn.execute(
+                    "SELECT harga, grs FROM listings WHERE nama = ? AND lb = ? AND lt = ? AND kt = ? AND km = ?", key
+                ).fetchone()
+                known = tuple(row) if row else None
+            if known == values:
+                counts["unchanged"] += 1
+                if key not in latest:
+                    unchanged.add(key)
+                continue
+            counts["updated" if known is not None else "new"] += 1
+            latest[key] = values
+            unchanged.discard(key)
+            seq += 1
+            lines.append((key, values, seq))
+        return lines, unchanged, counts
+
+    def _index(self, lines, partition, scraped_at):
+        self.conn.executemany(
+            "INSERT INTO listings (nama, lb, lt, kt, km, harga, grs, seq, partition, first_seen, last_seen) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (nama, lb, lt, kt, km) DO UPDATE SET harga = excluded.harga, grs = excluded.grs, "
+            "seq = excluded.seq, partition = excluded.partition, last_seen = excluded.last_seen",
+            [key + values + (seq, partition, scraped_at, scraped_at) for key, values, seq in lines]
+        )
+
+    def import_workbook(self, path):
+        """Seed the store from an existing workbook (one-time migration)"""
+        df = load_dataset(path)
+        records = df[KEY_COLUMNS + VALUE_COLUMNS].to_dict("records")
+        return self.append(records, scraped_at=os.path.getmtime(path), partition="imported")
+
+    def partition_names(self):
+        """Partition files in write order (the imported workbook first, then by date)"""
+        return sorted(os.listdir(self.partitions_dir), key=lambda n: (n != self.IMPORTED, n))
+
+    def rebuild_index(self):
+        """Recreate the index by replaying every partition (e.g. after a crash between the two writes)"""
+        with self.conn:
+            self.conn.execute("DELETE FROM listings")
+        for name in self.partition_names():
+            partition = name[len("date="):-len(".jsonl")]
+            with open(os.path.join(self.partitions_dir, name), encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            # Replay grouped by scrape run, so first_seen/last_seen survive the rebuild
+            runs = {}
+            for record in records:
+                runs.setdefault(record["scraped_at"], []).append(record)
+            for scraped_at, run in runs.items():
+                lines, _, _ = self._diff(run)
+                with self.conn:
+                    self._index(lines, partition, scraped_at)
+        return self.count()
+
+    def latest(self):
+        """Latest version of every listing as a DataFrame in the workbook layout"""
+        df = pd.read_sql_query(
+            'SELECT nama AS "NAMA RUMAH", harga AS HARGA, lb AS LB, lt AS LT, kt AS KT, km AS KM, grs AS GRS '
+            "FROM listings ORDER BY seq", self.conn
+        )
+        df.insert(0, "NO", range(1, len(df) + 1))
+        return df[COLUMNS]
+
+    def compact(self, excel_path=None):
+        """Write the training snapshot (and optionally an Excel export); returns the DataFrame"""
+        df = self.latest()
+        save_columns(df, self.snapshot_dir, compacted_at=time.time())
+        if excel_path:
+            os.makedirs(os.path.dirname(os.path.abspath(excel_path)), exist_ok=True)
+            df.to_excel(excel_path, index=False)
+        return df
+
+    def stats(self):
+        partitions = self.partition_names()
+        return {
+            "listings": self.count(),
+            "partitions": len(partitions),
+            "partition_bytes": sum(os.path.getsize(os.path.join(self.partitions_dir, p)) for p in partitions),
+            "latest_partition": partitions[-1] if partitions else None
+        }
+
+
+def load_snapshot(columns=None, root=STORE_DIR):
+    """The compacted training snapshot, or None if the store was never compacted"""
+    return load_columns(os.path.join(root, "snapshot"), columns)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    store = ListingStore()
+    command = sys.argv[1]
+    if command == "import":
+        print(store.import_workbook(sys.argv[2]))
+    elif command == "compact":
+        excel_path = sys.argv[sys.argv.index("--excel") + 1] if "--excel" in sys.argv else None
+        df = store.compact(excel_path)
+        print(f"Snapshot: {len(df)} listings -> {store.snapshot_dir}" + (f" and {excel_path}" if excel_path else ""))
+    elif command == "stats":
+        print(store.stats())
+    elif command == "rebuild-index":
+        print(f"Index rebuilt: {store.rebuild_index()} listings")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,216 +1,285 @@
-import requests
 from bs4 import BeautifulSoup
-import pandas as pd
-import random
+import argparse
+import json
 import time
 import os
 import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fetcher import Fetcher
+from html_archive import HtmlArchive
+from listing_store import ListingStore
 
 # --- Configurations ---
-BASE_URL = "https://www.rumah123.com/jual/jakarta-selatan/rumah/"
+# Override to scrape another listing or a local stub server (scripts/stub_listing_server.py)
+BASE_URL = os.getenv("SCRAPER_BASE_URL", "https://www.rumah123.com/jual/jakarta-selatan/rumah/")
+# Pages fetched in parallel over one pooled session
+WORKERS = int(os.getenv("SCRAPER_WORKERS", "4"))
+# Token bucket per host: average requests per second and burst size
+RATE_PER_HOST = float(os.getenv("SCRAPER_RATE", "1.0"))
+BURST = int(os.getenv("SCRAPER_BURST", "2"))
+# Retries of a page on 429/5xx or connection errors, with exponential backoff
+MAX_RETRIES = int(os.getenv("SCRAPER_MAX_RETRIES", "4"))
 OUTPUT_FILE = "data/raw/DATA RUMAH.xlsx"
+# Also rewrite the workbook after each run (the listing store is the system of record)
+EXPORT_EXCEL = os.getenv("SCRAPER_EXPORT_EXCEL", "0") == "1"
+# Incremental mode stops at the first page with at least this share of already known listings
+KNOWN_STOP_RATIO = float(os.getenv("SCRAPER_KNOWN_STOP_RATIO", "0.9"))
+CHECKPOINT_NAME = "scrape_checkpoint.json"
+# Keep the raw HTML of every fetched page (gzip, content-addressed) for re-parsing later
+ARCHIVE_HTML = os.getenv("SCRAPER_ARCHIVE_HTML", "1") == "1"
 HEADERS_LIST = [
     {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"},
     {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36"},
      {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36"}
 ]
 
-def scrape_data(pages=1):
-    all_data = []
-    
-    for page in range(1, pages + 1):
-        url = f"{BASE_URL}?page={page}"
-        print(f"Scraping page {page}: {url}")
-        
+# --- Parsing ---
+# Helper to extract text from span next to specific icon
+def get_spec_by_icon(soup_item, icon_id):
+    try:
+        icon = soup_item.find("use", href=lambda x: x and icon_id in x)
+        if not icon:
+            icon = soup_item.find("use", attrs={"xlink:href": lambda x: x and icon_id in x})
+        if icon:
+            svg = icon.find_parent("svg")
+            if svg:
+                span = svg.find_parent("span")
+                if span:
+                    txt = span.get_text(strip=True)
+                    # Clean non-digit chars if any
+                    clean_txt = re.sub(r'\D', '', txt)
+                    if clean_txt:
+                        return int(clean_txt)
+    except:
+        pass
+    return 0
+
+
+def parse_listing(item):
+    """Record of one listing card (soup element), or None if it has no price"""
+    # Full text content of the card
+    full_text = item.get_text(" ", strip=True) 
+
+    # 1. Title (H2 is usually reliable)
+    title_tag = item.find("h2")
+    nama_rumah = title_tag.get_text(strip=True) if title_tag else "N/A"
+
+    # 2. Price (Regex)
+    # Matches: Rp 7,5 Miliar, Rp 7.5 M, Rp 500 Juta, etc.
+    price_match = re.search(r'Rp\s*([\d\.,]+)\s+(Miliar|M|Juta|Jt)', full_text, re.IGNORECASE)
+    price = 0
+    if price_match:
+        val_str = price_match.group(1)
+        unit = price_match.group(2).lower()
+        val = float(val_str.replace(",", "."))
+
+        if 'm' in unit:
+            price = int(val * 1_000_000_000)
+        elif 'j' in unit:
+            price = int(val * 1_000_000)
+
+    # 3. Specs (Regex)
+    # LT: 60 m2, LB: 60 m2
+    lt, lb, kt, km = 0, 0, 0, 0
+
+    # LT
+    lt_match = re.search(r'LT\s*:\s*(\d+)', full_text, re.IGNORECASE)
+    if lt_match: lt = int(lt_match.group(1))
+
+    # LB
+    lb_match = re.search(r'LB\s*:\s*(\d+)', full_text, re.IGNORECASE)
+    if lb_match: lb = int(lb_match.group(1))
+
+    # Extraction Strategy 1: Look for specific SVG icons (Most Robust)
+    kt, km, grs = 0, 0, 0
+
+    kt = get_spec_by_icon(item, "#bedroom-icon")
+    km = get_spec_by_icon(item, "#bathroom-icon")
+    grs = get_spec_by_icon(item, "#carports-icon")
+
+    # Extraction Strategy 2: Regex on text (Fallback)
+    if kt == 0 or km == 0:
+        # Robust regex for "LB: X m² KT KM GRS?"
+        # matches "375 m² 3 3 1" or "375 m2 3 3"
+        specs_match = re.search(r'LB\s*:\s*\d+\s*m[²2]?\s+(\d+)\s+(\d+)(?:\s+(\d+))?', full_text, re.IGNORECASE)
+        if specs_match:
+            if kt == 0: kt = int(specs_match.group(1))
+            if km == 0: km = int(specs_match.group(2))
+            # Only split-second guess GRS if not found by icon
+            if grs == 0 and specs_match.group(3):
+                grs = int(specs_match.group(3))
+        else:
+            # Fallback: Try to find ANY two small integers (1-9) close to end of string if above fails
+            loose_match = re.findall(r'\s(\d)\s+(\d)\s', full_text)
+            if loose_match:
+                if kt == 0: kt = int(loose_match[0][0])
+                if km == 0: km = int(loose_match[0][1])
+
+    # Defaults
+    if kt == 0: kt = 2
+    if km == 0: km = 1
+    if grs == 0: grs = 1 # Default to 1 if genuinely not found (most houses have 1)
+
+    if price > 0:
+        return {
+            "NAMA RUMAH": nama_rumah,
+            "HARGA": price,
+            "LB": lb if lb > 0 else 60,
+            "LT": lt if lt > 0 else 60,
+            "KT": kt,
+            "KM": km,
+            "GRS": grs
+        }
+
+    return None
+
+
+def parse_page(html):
+    """Records of all listing cards in the HTML of one search results page"""
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Robust selector found via debugging
+    listings = soup.select('div[data-test-id^="srp-listing-card-"]')
+    records = []
+    for item in listings:
         try:
-            session = requests.Session()
-            response = session.get(url, headers=random.choice(HEADERS_LIST), timeout=30)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, "html.parser")
-                
-                # Robust selector found via debugging
-                listings = soup.select('div[data-test-id^="srp-listing-card-"]')
-                print(f"Found {len(listings)} listings on page {page}")
-
-                for item in listings:
-                    try:
-                        # Full text content of the card
-                        full_text = item.get_text(" ", strip=True) 
-
-                        # 1. Title (H2 is usually reliable)
-                        title_tag = item.find("h2")
-                        nama_rumah = title_tag.get_text(strip=True) if title_tag else "N/A"
-                        
-                        # 2. Price (Regex)
-                        # Matches: Rp 7,5 Miliar, Rp 7.5 M, Rp 500 Juta, etc.
-                        price_match = re.search(r'Rp\s*([\d\.,]+)\s+(Miliar|M|Juta|Jt)', full_text, re.IGNORECASE)
-                        price = 0
-                        if price_match:
-                            val_str = price_match.group(1)
-                            unit = price_match.group(2).lower()
-                            val = float(val_str.replace(",", "."))
-                            
-                            if 'm' in unit:
-                                price = int(val * 1_000_000_000)
-                            elif 'j' in unit:
-                                price = int(val * 1_000_000)
-                        
-                        # 3. Specs (Regex)
-                        # LT: 60 m2, LB: 60 m2
-                        lt, lb, kt, km = 0, 0, 0, 0
-                        
-                        # LT
-                        lt_match = re.search(r'LT\s*:\s*(\d+)', full_text, re.IGNORECASE)
-                        if lt_match: lt = int(lt_match.group(1))
-                        
-                        # LB
-                        lb_match = re.search(r'LB\s*:\s*(\d+)', full_text, re.IGNORECASE)
-                        if lb_match: lb = int(lb_match.group(1))
-                        
-                        # KT/KM (Regex Heuristic)
-                        # Pattern found: "LT: 76 m² LB: 375 m² 3 3"
-                        # We look for digits after LB and m2.
-                        
-                        # Find the substring after "LB"
-                        if "LB" in full_text:
-                            after_lb = full_text.split("LB")[1]
-                            # Find all numbers in the remainder
-                            specs_numbers = re.findall(r'\b(\d+)\b', after_lb)
-                            # specs_numbers[0] is LB value (already parsed)
-                            # specs_numbers[1] is likely KT
-                            # specs_numbers[2] is likely KM
-                            
-                            if len(specs_numbers) >= 2:
-                                # Skip the first one as it is the LB value
-                                # Note: Sometimes 'm2' is adjacent, so ensure we aren't picking up '2' from m2.
-                                # But re.findall(\b\d+\b) handles 'm2' as 'm' and '2'. 
-                                # Better: use specific regex for sequence
-                                pass
-
-                        # Extraction Strategy 1: Look for specific SVG icons (Most Robust)
-                        kt, km, grs = 0, 0, 0
-                        
-                        # Helper to extract text from span next to specific icon
-                        def get_spec_by_icon(soup_item, icon_id):
-                            try:
-                                icon = soup_item.find("use", href=lambda x: x and icon_id in x)
-                                if not icon:
-                                    icon = soup_item.find("use", attrs={"xlink:href": lambda x: x and icon_id in x})
-                                if icon:
-                                    svg = icon.find_parent("svg")
-                                    if svg:
-                                        span = svg.find_parent("span")
-                                        if span:
-                                            txt = span.get_text(strip=True)
-                                            # Clean non-digit chars if any
-                                            clean_txt = re.sub(r'\D', '', txt)
-                                            if clean_txt:
-                                                return int(clean_txt)
-                            except:
-                                pass
-                            return 0
-
-                        kt = get_spec_by_icon(item, "#bedroom-icon")
-                        km = get_spec_by_icon(item, "#bathroom-icon")
-                        grs = get_spec_by_icon(item, "#carports-icon")
-
-                        # Extraction Strategy 2: Regex on text (Fallback)
-                        if kt == 0 or km == 0:
-                            # Robust regex for "LB: X m² KT KM GRS?"
-                            # matches "375 m² 3 3 1" or "375 m2 3 3"
-                            specs_match = re.search(r'LB\s*:\s*\d+\s*m[²2]?\s+(\d+)\s+(\d+)(?:\s+(\d+))?', full_text, re.IGNORECASE)
-                            if specs_match:
-                                if kt == 0: kt = int(specs_match.group(1))
-                                if km == 0: km = int(specs_match.group(2))
-                                # Only split-second guess GRS if not found by icon
-                                if grs == 0 and specs_match.group(3):
-                                    grs = int(specs_match.group(3))
-                            else:
-                                # Fallback: Try to find ANY two small integers (1-9) close to end of string if above fails
-                                loose_match = re.findall(r'\s(\d)\s+(\d)\s', full_text)
-                                if loose_match:
-                                    if kt == 0: kt = int(loose_match[0][0])
-                                    if km == 0: km = int(loose_match[0][1])
-                        
-                        # Defaults
-                        if kt == 0: kt = 2
-                        if km == 0: km = 1
-                        if grs == 0: grs = 1 # Default to 1 if genuinely not found (most houses have 1)
-                        
-                        if price > 0:
-                            all_data.append({
-                                "NAMA RUMAH": nama_rumah,
-                                "HARGA": price,
-                                "LB": lb if lb > 0 else 60,
-                                "LT": lt if lt > 0 else 60,
-                                "KT": kt,
-                                "KM": km,
-                                "GRS": grs
-                            })
-                            
-                    except Exception as e:
-                        print(f"Error parsing item: {e}")
-                        continue
-            else:
-                print(f"Failed to fetch page {page}: {response.status_code}")
-                
-            time.sleep(random.uniform(2, 5))
-            
+            record = parse_listing(item)
+            if record is not None:
+                records.append(record)
         except Exception as e:
-            print(f"Request failed: {e}")
-
-    # ... Scrape logic ends ...
-
-    # Save Data (Append Mode)
-    if all_data:
-        new_df = pd.DataFrame(all_data)
-        print(f"Scraped {len(new_df)} new records.")
-        
-        if os.path.exists(OUTPUT_FILE):
-            print(f"Found existing dataset at {OUTPUT_FILE}. Appending...")
-            existing_df = pd.read_excel(OUTPUT_FILE)
-            
-            # Combine
-            combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            
-            # Remove Duplicates
-            # We assume if (NAMA, MRG) are same, it's same listing. 
-            # Or use all columns except NO/Index.
-            # Ideally duplicates are subset=['NAMA RUMAH', 'HARGA', 'LB', 'LT']
-            combined_df.drop_duplicates(subset=['NAMA RUMAH', 'LB', 'LT', 'KT', 'KM'], keep='last', inplace=True)
-            
-            # Re-index NO column
-            combined_df.reset_index(drop=True, inplace=True)
-            if 'NO' in combined_df.columns:
-                combined_df['NO'] = combined_df.index + 1
-            else:
-                combined_df.insert(0, 'NO', combined_df.index + 1)
-                
-            final_df = combined_df
-        else:
-            print("No existing dataset found. Creating new one.")
-            new_df.reset_index(inplace=True)
-            new_df.rename(columns={'index': 'NO'}, inplace=True)
-            new_df['NO'] = new_df['NO'] + 1
-            final_df = new_df
-        
-        # Save
-        os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-        final_df.to_excel(OUTPUT_FILE, index=False)
-        print(f"Successfully saved {len(final_df)} records to {OUTPUT_FILE}")
-    else:
-        print("No data scraped. Check selectors or anti-scraping blocking.")
+            print(f"Error parsing item: {e}")
+    return records
 
-def clean_price(price_text):
-    # Legacy wrapper if needed, but regex handles it inside loop now
-    return 0
 
-def parse_int(text):
+# --- Fetching ---
+def page_url(page, base_url=BASE_URL):
+    return f"{base_url}?page={page}"
+
+
+def iter_pages(pages, base_url=BASE_URL, workers=WORKERS, rate=RATE_PER_HOST, archive=None):
+    """Yield (page, records) for the given page numbers in order, fetched concurrently.
+
+    records is None when the page could not be fetched. With an `archive`
+    (HtmlArchive), each page's raw HTML is stored before it is parsed.
+    """
+    fetcher = Fetcher(HEADERS_LIST, workers=workers, rate=rate, burst=BURST, max_retries=MAX_RETRIES)
+    print(f"Scraping {len(pages)} pages from {base_url} ({workers} workers, {rate} req/s per host)")
+
+    def handle(page, response):
+        if response is None:
+            return page, None
+        if archive is not None:
+            archive.put(response.url, page, response.content)
+        records = parse_page(response.content)
+        print(f"Parsed {len(records)} listings from page {page}")
+        return page, records
+
+    started = time.perf_counter()
     try:
-         return int(''.join(filter(str.isdigit, text)))
-    except:
-        return 0
+        urls = {page_url(page, base_url): page for page in pages}
+        for result in fetcher.imap(lambda url, response: handle(urls[url], response), list(urls)):
+            yield result
+    finally:
+        fetcher.close()
+        print(f"Fetched in {time.perf_counter() - started:.1f}s: {fetcher.stats}")
+
+
+def fetch_listings(pages=1, base_url=BASE_URL, workers=WORKERS, rate=RATE_PER_HOST):
+    """Fetch and parse search result pages 1..pages concurrently; returns the records in page order"""
+    results = iter_pages(range(1, pages + 1), base_url, workers, rate)
+    return [record for _, records in results for record in records or []]
+
+
+# --- Checkpoint ---
+# Progress of the current run, so an interrupted scrape resumes where it stopped.
+# Records are already in the listing store page by page; the checkpoint only
+# says which pages are done.
+def checkpoint_path(store):
+    return os.path.join(store.root, CHECKPOINT_NAME)
+
+
+def load_checkpoint(store, base_url, pages, incremental):
+    """Pages already done by an unfinished run with the same settings"""
+    path = checkpoint_path(store)
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r") as f:
+        checkpoint = json.load(f)
+    if (checkpoint["base_url"], checkpoint["pages"], checkpoint["incremental"]) != (base_url, pages, incremental):
+        print(f"Ignoring checkpoint of a run with other settings: {checkpoint_path(store)}")
+        return set()
+    return set(checkpoint["done"])
+
+
+def save_checkpoint(store, base_url, pages, incremental, done):
+    path = checkpoint_path(store)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"base_url": base_url, "pages": pages, "incremental": incremental,
+                   "done": sorted(done), "updated_at": time.time()}, f)
+    os.replace(path + ".tmp", path)
+
+
+def scrape_data(pages=1, base_url=BASE_URL, workers=WORKERS, rate=RATE_PER_HOST, incremental=False, resume=True):
+    """Scrape up to `pages` result pages into the listing store, page by page.
+
+    Each page's records are appended as soon as it is parsed and the page is
+    checkpointed, so a crash loses at most the pages in flight; the next run
+    with the same settings skips the pages already done. In incremental mode
+    paging stops at the first page whose listings are (almost) all already in
+    the store's dedup index: the results are newest first, so everything
+    after it has been scraped before.
+    """
+    store = ListingStore()
+    if store.count() == 0 and os.path.exists(OUTPUT_FILE):
+        print(f"Empty listing store. Importing existing dataset {OUTPUT_FILE}...")
+        print(f"Imported: {store.import_workbook(OUTPUT_FILE)}")
+
+    done = load_checkpoint(store, base_url, pages, incremental) if resume else set()
+    todo = [page for page in range(1, pages + 1) if page not in done]
+    if done:
+        print(f"Resuming: {len(done)} of {pages} pages already done")
+
+    # Save Data (append-only listing store; only new or changed listings are written)
+    totals = {"new": 0, "updated": 0, "unchanged": 0}
+    failed = []
+    archive = HtmlArchive(os.path.join(store.root, "html")) if ARCHIVE_HTML else None
+    for page, records in iter_pages(todo, base_url, workers, rate, archive):
+        if records is None:
+            failed.append(page)
+            continue
+        counts = store.append(records)
+        for name in totals:
+            totals[name] += counts[name]
+        done.add(page)
+        save_checkpoint(store, base_url, pages, incremental, done)
+
+        if incremental and records and counts["unchanged"] / len(records) >= KNOWN_STOP_RATIO:
+            print(f"Page {page}: {counts['unchanged']} of {len(records)} listings already known. Stopping.")
+            break
+    print(f"New: {totals['new']}, updated: {totals['updated']}, unchanged: {totals['unchanged']}")
+
+    if failed:
+        print(f"Failed pages {failed}; run again to retry them (progress kept in {checkpoint_path(store)})")
+    elif os.path.exists(checkpoint_path(store)):
+        os.remove(checkpoint_path(store))
+
+    if totals["new"] or totals["updated"] or not os.path.exists(store.snapshot_dir):
+        # Training snapshot (and the workbook, if still wanted as an export)
+        excel_path = OUTPUT_FILE if EXPORT_EXCEL else None
+        final_df = store.compact(excel_path)
+        print(f"Successfully compacted {len(final_df)} listings to {store.snapshot_dir}"
+              + (f" and {excel_path}" if excel_path else ""))
+    elif not totals["unchanged"]:
+        print("No data scraped. Check selectors or anti-scraping blocking.")
+    else:
+        print("No new listings. Snapshot unchanged.")
 
 if __name__ == "__main__":
-    scrape_data(pages=2) # Try 2 pages
+    parser = argparse.ArgumentParser(description="Scrape house listings into data/listings")
+    parser.add_argument("--pages", type=int, default=2, help="number of result pages (upper bound in incremental mode)")
+    parser.add_argument("--incremental", action="store_true", help="stop at the first page of already known listings")
+    parser.add_argument("--fresh", action="store_true", help="ignore the checkpoint of an interrupted run")
+    args = parser.parse_args()
+    scrape_data(pages=args.pages, incremental=args.incremental, resume=not args.fresh)
@@ -0,0 +1,183 @@
+"""Local stand-in for the rumah123 search pages, for testing the scraper offline.
+
+Serves /<anything>?page=N from <pages dir>/page-N.html when a directory of
+saved pages is given, otherwise a generated page of listing cards in the
+same markup (srp-listing-card, price text, LT/LB, bedroom/bathroom/carport
+icons). It can add latency, fail a share of requests with 503 and answer
+429 (with Retry-After) when a client exceeds a request rate, so the
+fetcher's rate limiter and retries can be exercised. GET /__stats returns
+the request counters as JSON.
+
+Usage (from the project root):
+    python scripts/stub_listing_server.py --port 8123 [--pages-dir DIR] [--latency 0.2] [--error-rate 0.05] [--max-rate 5]
+    SCRAPER_BASE_URL=http://localhost:8123/jual/jakarta-selatan/rumah/ python scripts/scraper.py
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+CARD = """<div data-test-id="srp-listing-card-{id}"><div class="card-featured__middle-section">
+<h2>{name}</h2>
+<div class="card-featured__middle-section__price"><strong>Rp {price}</strong></div>
+<div class="attribute-grid">
+<span class="attribute-text"><svg><use href="#bedroom-icon"></use></svg>{kt}</span>
+<span class="attribute-text"><svg><use href="#bathroom-icon"></use></svg>{km}</span>
+<span class="attribute-text"><svg><use href="#carports-icon"></use></svg>{grs}</span>
+</div>
+<div class="attribute-info"><span>LT : {lt} m²</span><span>LB : {lb} m²</span></div>
+</div></div>"""
+
+AREAS = ["Kebayoran Baru", "Cilandak", "Pondok Indah", "Tebet", "Pancoran", "Jagakarsa", "Kemang", "Pesanggrahan"]
+
+
+def listing(page, i):
+    """Deterministic fake listing i of page `page` (same output on every request)"""
+    rng = random.Random(page * 1000 + i)
+    lb = rng.randint(45, 600)
+    price = rng.randint(8, 400) / 10
+    return {
+        "id": f"{page}-{i}",
+        "name": f"Rumah {rng.choice(AREAS)} {page}-{i}",
+        "price": f"{price:.1f}".replace(".", ",") + " Miliar" if price >= 1 else f"{int(price * 1000)} Juta",
+        "lb": lb,
+        "lt": max(30, lb + rng.randint(-40, 200)),
+        "kt": rng.randint(1, 7),
+        "km": rng.randint(1, 6),
+        "grs": rng.randint(1, 4)
+    }
+
+
+def render_page(page, per_page):
+    cards = "\n".join(CARD.format(**listing(page, i)) for i in range(per_page))
+    return f"<html><body><div class=\"listings\">\n{cards}\n</div></body></html>"
+
+
+class StubState:
+    def __init__(self, pages_dir=None, per_page=20, latency=0.0, error_rate=0.0, max_rate=0.0):
+        self.pages_dir = pages_dir
+        self.per_page = per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_rate = max_rate
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.counts = {"requests": 0, "ok": 0, "errors_503": 0, "rate_limited_429": 0, "not_found": 0}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.max_rate_seen = 0
+
+    def admit(self):
+        """Record one request; returns 429 when the last second already holds max_rate requests"""
+        now = time.monotonic()
+        with self.lock:
+            self.counts["requests"] += 1
+            while self.recent and now - self.recent[0] >= 1.0:
+                self.recent.popleft()
+            if self.max_rate and len(self.recent) >= self.max_rate:
+                self.counts["rate_limited_429"] += 1
+                return 429
+            self.recent.append(now)
+            self.max_rate_seen = max(self.max_rate_seen, len(self.recent))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return 200
+
+    def done(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def stats(self):
+        with self.lock:
+            return {**self.counts, "max_in_flight": self.max_in_flight, "max_requests_per_s": self.max_rate_seen}
+
+
+class Handler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/__stats":
+            self.send(200, json.dumps(self.state.stats()), "application/json")
+            return
+
+        state = self.state
+        if state.admit() == 429:
+            self.send(429, "Too Many Requests", headers={"Retry-After": "1"})
+            return
+        try:
+            time.sleep(state.latency)
+            if random.random() < state.error_rate:
+                state.count("errors_503")
+                self.send(503, "Service Unavailable")
+                return
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            if state.pages_dir:
+                path = os.path.join(state.pages_dir, f"page-{page}.html")
+                if not os.path.exists(path):
+                    state.count("not_found")
+                    self.send(404, "Not Found")
+                    return
+                with open(path, "r", encoding="utf-8") as f:
+                    body = f.read()
+            else:
+                body = render_page(page, state.per_page)
+            state.count("ok")
+            self.send(200, body)
+        finally:
+            state.done()
+
+
+def start_stub_server(port=0, **options):
+    """Start the stub in a background thread; returns (server, base_url). Stop with server.shutdown()"""
+    handler = type("StubHandler", (Handler,), {"state": StubState(**options)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/jual/jakarta-selatan/rumah/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub listing server for offline scraper tests")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--pages-dir", help="directory of saved pages named page-<N>.html")
+    parser.add_argument("--per-page", type=int, default=20, help="cards per generated page")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every page")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of pages answered with 503")
+    parser.add_argument("--max-rate", type=float, default=0.0, help="requests per second before 429 (0 = no limit)")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.port, pages_dir=args.pages_dir, per_page=args.per_page,
+                                         latency=args.latency, error_rate=args.error_rate, max_rate=args.max_rate)
+    print(f"Stub listing server at {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
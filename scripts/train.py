@@ -17,16 +17,30 @@ MODEL_1_PATH = os.path.join(MODEL_DIR, "model_1.pkl")
 MODEL_2_PATH = os.path.join(MODEL_DIR, "model_2.pkl")
 METRICS_PATH = os.path.join(MODEL_DIR, "metrics.json")
 
+# Reference-statistics helpers live with the API code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+from reference_stats import ARTIFACT_NAME, build_reference, save_reference
+from dataset_cache import load_dataset
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from listing_store import STORE_DIR, load_snapshot
+
+REFERENCE_PATH = os.path.join(MODEL_DIR, ARTIFACT_NAME)
+
 def train():
     print("Starting training process...")
     
-    if not os.path.exists(DATA_PATH):
-        print(f"Error: Data file not found at {DATA_PATH}")
-        sys.exit(1)
-
     # 1. Load Data
     print("Loading data...")
-    df = pd.read_excel(DATA_PATH)
+    # Compacted snapshot of the scraper's listing store; preferred over the workbook when present
+    df = load_snapshot()
+    if df is not None:
+        print(f"Using listing store snapshot at {STORE_DIR}")
+    elif os.path.exists(DATA_PATH):
+        df = load_dataset(DATA_PATH)
+    else:
+        print(f"Error: Data file not found at {DATA_PATH}")
+        sys.exit(1)
     
     # 2. Preprocessing
     # Filter features
@@ -105,5 +119,9 @@ def train():
         json.dump(metrics_data, f, indent=4)
     print(f"Metrics saved to {METRICS_PATH}")
 
+    # 8. Save reference statistics for drift detection
+    save_reference(build_reference(X_train, features), REFERENCE_PATH)
+    print(f"Reference stats saved to {REFERENCE_PATH}")
+
 if __name__ == "__main__":
     train()